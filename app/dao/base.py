@@ -4,15 +4,28 @@
 Повторяет ключевые идеи основного `BaseDAO` из проекта.
 """
 
-from typing import Any, Optional, Type, TypeVar, Iterable
+import json
+from time import monotonic, perf_counter
+from typing import Any, Iterable, Mapping, Optional, Sequence, Type, TypeVar, get_args
 
 from pydantic import BaseModel
 
-from sqlalchemy import Select, select
+from sqlalchemy import (
+    Column, ColumnElement, Row, Select, column, func, literal_column, or_, select, table, text, update, values,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
 
+from .columnar import Columns, columnar_query, to_columns
+
+from app.config.config_reader import env_config
 from app.database.models import Base
 from app.database.connection import db_connection
+from app.database.ids import IdAllocator
+from app.modules.profiling import current_sample, profiled
+from app.modules.query_budget import batched_queries
+from app.schemas.cascade import CascadeResult
+from app.schemas.count import CountResult, CountStrategy
 
 
 
@@ -21,6 +34,29 @@ TModel = TypeVar('TModel', bound=Base)
 # Тип переменной для Pydantic схем
 TSchema = TypeVar('TSchema', bound=BaseModel)
 
+# Максимум параметров в одном запросе PostgreSQL (протокол: int16)
+MAX_QUERY_PARAMS = 32767
+# Строк в одном `UPDATE ... FROM (VALUES ...)` по умолчанию
+UPDATE_MANY_CHUNK_SIZE = 5000
+# Начиная с этого числа строк `update_many` грузит их через COPY во временную таблицу
+UPDATE_MANY_COPY_THRESHOLD = 50_000
+# Максимум записей в кеше подсчётов одного DAO
+COUNT_CACHE_SIZE = 1024
+
+# Оценка числа строк таблицы так же, как её делает планировщик:
+# плотность строк из последнего ANALYZE на текущий размер таблицы.
+# Без плотности (таблицу не анализировали или она была пустой) — NULL,
+# и оценку даёт EXPLAIN: планировщик сам оценивает выросшую пустую таблицу
+_RELTUPLES = text("""
+    SELECT CASE
+        WHEN c.reltuples < 0 OR c.relpages = 0 THEN NULL
+        ELSE c.reltuples / c.relpages
+             * (pg_relation_size(c.oid) / current_setting('block_size')::int)
+    END::bigint
+    FROM pg_class AS c
+    WHERE c.oid = to_regclass(:table)
+""")
+
 
 
 class BaseDAO:
@@ -38,6 +74,7 @@ class BaseDAO:
             db: Объект подключения к базе данных.
         """
         self.db = db_connection
+        self._count_cache: dict[tuple, tuple[float, CountResult]] = {}
 
     def _return_dict_from_obj(self, obj: Any, model: type[Base]) -> dict:
         """
@@ -96,6 +133,45 @@ class BaseDAO:
         data = base._return_dict_from_obj(obj, model_cls)
         return schema_cls(**data)
 
+    def _to_schemas(self, objs: Iterable[Any], schema_cls: Type[TSchema]) -> list[TSchema]:
+        """
+        ## Конвертирует ORM-объекты модели `self.model` в список Pydantic-схем.
+
+        При активной выборке профилирования отдельно замеряет фазы
+        `to_dict` и `validate`.
+
+        Args:
+            objs: ORM-объекты, полученные из базы данных.
+            schema_cls: Класс Pydantic-схемы для результата.
+
+        Returns:
+            list[TSchema]: Список экземпляров схемы.
+        """
+        sample = current_sample()
+        if sample is None:
+            return [schema_cls(**self._return_dict_from_obj(obj, self.model)) for obj in objs]
+
+        started = perf_counter()
+        rows = [self._return_dict_from_obj(obj, self.model) for obj in objs]
+        converted = perf_counter()
+        result = [schema_cls(**row) for row in rows]
+        sample.add('to_dict', converted - started)
+        sample.add('validate', perf_counter() - converted)
+        return result
+
+    def _to_schema(self, obj: Any, schema_cls: Type[TSchema]) -> TSchema:
+        """
+        ## Конвертирует один ORM-объект модели `self.model` в Pydantic-схему.
+
+        Args:
+            obj: ORM-объект, полученный из базы данных.
+            schema_cls: Класс Pydantic-схемы для результата.
+
+        Returns:
+            TSchema: Экземпляр схемы.
+        """
+        return self._to_schemas((obj,), schema_cls)[0]
+
     async def _fetch_one(self, session: AsyncSession, query: Select):
         """
         ## Выполняет запрос и возвращает один объект или None.
@@ -107,8 +183,18 @@ class BaseDAO:
         Returns:
             Any | None: Один ORM-объект или `None`, если не найдено.
         """
+        sample = current_sample()
+        if sample is None:
+            res = await session.execute(query)
+            return res.scalar_one_or_none()
+
+        started = perf_counter()
         res = await session.execute(query)
-        return res.scalar_one_or_none()
+        executed = perf_counter()
+        obj = res.scalar_one_or_none()
+        sample.add('execute', executed - started)
+        sample.add('hydrate', perf_counter() - executed)
+        return obj
 
     async def _fetch_all(self, session: AsyncSession, query: Select) -> Iterable[Any]:
         """
@@ -121,9 +207,461 @@ class BaseDAO:
         Returns:
             Iterable[Any]: Последовательность ORM-объектов.
         """
+        sample = current_sample()
+        if sample is None:
+            res = await session.execute(query)
+            return res.scalars().all()
+
+        started = perf_counter()
+        res = await session.execute(query)
+        executed = perf_counter()
+        objs = res.scalars().all()
+        sample.add('execute', executed - started)
+        sample.add('hydrate', perf_counter() - executed)
+        return objs
+
+    async def _insert_values(self,
+        schema: BaseModel,
+        session: AsyncSession,
+        ids: Optional[IdAllocator] = None
+    ) -> dict[str, Any]:
+        """
+        ## Значения для `INSERT` из схемы, с id из пула, если он передан.
+
+        Пустой пул пополняется в транзакции `session`, а не во второй сессии.
+
+        Args:
+            schema: Pydantic-схема новой записи.
+            session: Асинхронная сессия БД, в которой выполняется вставка.
+            ids: Пул id на стороне клиента (`None` — id выдаёт БД).
+
+        Returns:
+            dict[str, Any]: Значения колонок.
+        """
+        values = schema.model_dump()
+        if ids is not None:
+            values['id'] = await ids.next_id(self.model.__tablename__, session)
+        return values
+
+    def _projection(self, fields: Sequence[str]) -> list[Column]:
+        """
+        ## Колонки `self.model` по именам для выборки части полей.
+
+        Raises:
+            ValueError: Если список пуст или содержит неизвестные колонки.
+
+        Returns:
+            list[Column]: Колонки в порядке `fields`.
+        """
+        table_columns = self.model.__table__.columns
+        if not fields:
+            raise ValueError('fields must not be empty')
+        unknown = set(fields) - set(table_columns.keys())
+        if unknown:
+            raise ValueError(f'unknown columns: {sorted(unknown)}')
+        return [table_columns[name] for name in fields]
+
+    async def _fetch_rows(self, session: AsyncSession, query: Select) -> list[Row]:
+        """
+        ## Выполняет запрос по отдельным колонкам и возвращает строки `Row`.
+
+        ORM-объекты и Pydantic-схемы не создаются: `Row` — кортеж
+        с доступом к полям по имени (`row.id`, `row.price`).
+
+        Args:
+            session: Асинхронная сессия БД.
+            query: Запрос `select(col, ...)`.
+
+        Returns:
+            list[Row]: Строки результата.
+        """
+        sample = current_sample()
+        if sample is None:
+            res = await session.execute(query)
+            return res.all()
+
+        started = perf_counter()
         res = await session.execute(query)
-        return res.scalars().all()
+        executed = perf_counter()
+        rows = res.all()
+        sample.add('execute', executed - started)
+        sample.add('hydrate', perf_counter() - executed)
+        return rows
+
+    async def _fetch_columns(self,
+        session: AsyncSession,
+        *where: ColumnElement[bool],
+        columns: Optional[Sequence[str]] = None,
+        use_numpy: bool = False
+    ) -> Columns:
+        """
+        ## Выполняет выборку `self.model` в колоночном режиме.
+
+        Args:
+            session: Асинхронная сессия БД.
+            *where: Условия фильтрации.
+            columns: Имена колонок (по умолчанию — все колонки модели).
+            use_numpy: Вернуть `numpy.ndarray` вместо `array`.
+
+        Raises:
+            ValueError: Если запрошена неизвестная колонка.
+
+        Returns:
+            Columns: Словарь `{"column": массив значений}`, упорядоченных по `id`.
+        """
+        table_columns = self.model.__table__.columns
+        names = list(columns) if columns else table_columns.keys()
+        unknown = set(names) - set(table_columns.keys())
+        if unknown:
+            raise ValueError(f'unknown columns: {sorted(unknown)}')
+
+        cols = [table_columns[name] for name in names]
+        query = columnar_query(cols, order_by=table_columns['id']).where(*where)
+        res = await session.execute(query)
+        return to_columns(res.one(), cols, use_numpy)
+
+    async def _count_exact(self, session: AsyncSession, where: Sequence[ColumnElement[bool]]) -> int:
+        """
+        ## Точный `SELECT count(*)`.
+
+        Если условие покрыто индексом (или условия нет), PostgreSQL
+        считает по индексу (index-only scan), не читая строки таблицы;
+        для этого карта видимости должна быть актуальной (VACUUM).
+        """
+        query = select(func.count()).select_from(self.model).where(*where)
+        res = await session.execute(query)
+        return res.scalar_one()
+
+    async def _count_estimate(self, session: AsyncSession, where: Sequence[ColumnElement[bool]]) -> int:
+        """
+        ## Оценка числа строк по статистике без чтения таблицы.
+
+        Вся таблица — `pg_class.reltuples`, приведённая к текущему размеру;
+        с условием (или если таблица ещё не анализировалась либо была пустой
+        при `ANALYZE`) — `Plan Rows` из `EXPLAIN` запроса. Точность зависит
+        от свежести `ANALYZE`.
+        """
+        if not where:
+            res = await session.execute(_RELTUPLES, {'table': self.model.__tablename__})
+            estimate = res.scalar_one_or_none()
+            if estimate is not None:
+                return max(estimate, 0)
+
+        conn = await session.connection()
+        query = select(literal_column('1')).select_from(self.model).where(*where)
+        sql = query.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+        res = await conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}')
+        plan = res.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    async def _count(self,
+        session: AsyncSession,
+        *where: ColumnElement[bool],
+        strategy: CountStrategy = 'auto',
+        cache_ttl: Optional[float] = None,
+        exact_threshold: int = env_config.COUNT_EXACT_THRESHOLD
+    ) -> CountResult:
+        """
+        ## Считает записи `self.model` выбранным способом.
+
+        `auto` сначала берёт оценку и считает точно, только если оценка
+        меньше `exact_threshold` (точный подсчёт тогда дешёвый).
+        С `cache_ttl` результат хранится в DAO указанное число секунд
+        отдельно для каждого движка, способа и условия.
+
+        Args:
+            session: Асинхронная сессия БД.
+            *where: Условия фильтрации.
+            strategy: `exact`, `estimate` или `auto`.
+            cache_ttl: Время жизни результата в кеше, в секундах (`None` — без кеша).
+            exact_threshold: Порог точного подсчёта для `auto`.
+
+        Raises:
+            ValueError: Если передан неизвестный `strategy`.
+
+        Returns:
+            CountResult: Число строк и признак точности.
+        """
+        if strategy not in get_args(CountStrategy):
+            raise ValueError(f'unknown count strategy: {strategy!r}')
+
+        key = None
+        if cache_ttl is not None:
+            condition = select(func.count()).select_from(self.model).where(*where)
+            key = (session.bind, strategy, str(condition.compile(compile_kwargs={'literal_binds': True})))
+            hit = self._count_cache.get(key)
+            if hit is not None and hit[0] > monotonic():
+                return hit[1].model_copy(update={'cached': True})
+
+        if strategy == 'exact':
+            result = CountResult(value=await self._count_exact(session, where), exact=True)
+        else:
+            estimate = await self._count_estimate(session, where)
+            if strategy == 'auto' and estimate < exact_threshold:
+                result = CountResult(value=await self._count_exact(session, where), exact=True)
+            else:
+                result = CountResult(value=estimate, exact=False)
+
+        if key is not None:
+            now = monotonic()
+            if len(self._count_cache) >= COUNT_CACHE_SIZE:
+                for stale in [k for k, (expires, _) in self._count_cache.items() if expires <= now]:
+                    del self._count_cache[stale]
+                while len(self._count_cache) >= COUNT_CACHE_SIZE:
+                    del self._count_cache[next(iter(self._count_cache))]
+            self._count_cache[key] = (now + cache_ttl, result)
+        return result
+
+    def _update_columns(self, updates: Mapping[int, Mapping[str, Any]]) -> list[str]:
+        """
+        ## Проверяет, что все строки `update_many` меняют один и тот же набор колонок.
+
+        Raises:
+            ValueError: Если набор колонок пуст, различается между строками,
+                содержит `id` или неизвестные колонки.
+
+        Returns:
+            list[str]: Имена изменяемых колонок.
+        """
+        names = list(next(iter(updates.values())))
+        known = self.model.__table__.columns.keys()
+        if not names:
+            raise ValueError('no columns to update')
+        if 'id' in names:
+            raise ValueError('id cannot be updated')
+        unknown = set(names) - set(known)
+        if unknown:
+            raise ValueError(f'unknown columns: {sorted(unknown)}')
+        if any(set(row) != set(names) for row in updates.values()):
+            raise ValueError('all rows must update the same columns')
+        return names
+
+    def _update_from(self, source: Any, names: Sequence[str]):
+        """
+        ## `UPDATE <model> SET col = src.col FROM src WHERE id = src.id` без no-op строк.
+
+        Строки, где все значения совпадают с текущими, не обновляются
+        (не создают новых версий строк и не попадают в `RETURNING`).
+        """
+        target = self.model.__table__.c
+        return (
+            update(self.model)
+            .where(
+                target.id == source.c.id,
+                or_(*[target[name].is_distinct_from(source.c[name]) for name in names]),
+            )
+            .values({name: source.c[name] for name in names})
+            .returning(target.id)
+        )
+
+    async def _update_via_copy(self,
+        updates: Mapping[int, Mapping[str, Any]],
+        names: Sequence[str],
+        session: AsyncSession
+    ) -> list[int]:
+        """
+        ## Обновление через COPY во временную таблицу и `UPDATE ... FROM`.
+
+        Для очень больших наборов: строки передаются потоком COPY без
+        лимита параметров, а соединение с целевой таблицей делает один запрос.
+        После успешного обновления временная таблица удаляется сразу, чтобы
+        повторный вызов в той же транзакции мог создать её снова; при ошибке
+        транзакция уже прервана, и таблицу удалит откат (`ON COMMIT DROP`).
+        """
+        conn = await session.connection()
+        table_columns = self.model.__table__.columns
+        tmp_name = f'_update_{self.model.__tablename__}'
+        column_sql = ', '.join(
+            f'{name} {table_columns[name].type.compile(dialect=conn.dialect)}'
+            for name in ['id', *names]
+        )
+        await session.execute(text(f'CREATE TEMP TABLE {tmp_name} ({column_sql}) ON COMMIT DROP'))
+        await self.db.driver.copy_records(
+            session, tmp_name, ['id', *names],
+            [(row_id, *[row[name] for name in names]) for row_id, row in updates.items()],
+        )
+        await session.execute(text(f'ANALYZE {tmp_name}'))
+        source = table(tmp_name, column('id'), *[column(name) for name in names])
+        res = await session.execute(self._update_from(source, names))
+        changed = list(res.scalars())
+        await session.execute(text(f'DROP TABLE {tmp_name}'))
+        return changed
+
+    @profiled
+    async def update_many(self,
+        updates: Mapping[int, Mapping[str, Any]],
+        session: AsyncSession,
+        chunk_size: int = UPDATE_MANY_CHUNK_SIZE,
+        copy_threshold: Optional[int] = UPDATE_MANY_COPY_THRESHOLD
+    ) -> list[int]:
+        """
+        ## Массово обновляет записи `self.model` по `id` без загрузки ORM-объектов.
+
+        На каждую пачку отправляется один запрос:
+
+            UPDATE t SET col = v.col
+            FROM (VALUES ($1::BIGINT, $2::INTEGER), ...) AS v (id, col)
+            WHERE t.id = v.id AND t.col IS DISTINCT FROM v.col
+            RETURNING t.id
+
+        Начиная с `copy_threshold` строк данные загружаются через COPY
+        во временную таблицу и обновляются одним `UPDATE ... FROM`.
+        Всё выполняется в транзакции вызывающего кода.
+
+        Args:
+            updates: `{id: {"column": value, ...}}`; набор колонок одинаков для всех строк.
+            session: Асинхронная сессия БД.
+            chunk_size: Строк в одном запросе с `VALUES`.
+            copy_threshold: С какого числа строк использовать COPY (`None` — никогда).
+
+        Raises:
+            ValueError: Если `chunk_size` меньше 1 или набор колонок некорректен.
+
+        Returns:
+            list[int]: ID записей, значения которых действительно изменились.
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be >= 1')
+        if not updates:
+            return []
+        names = self._update_columns(updates)
+
+        if copy_threshold is not None and len(updates) >= copy_threshold:
+            changed = await self._update_via_copy(updates, names, session)
+        else:
+            table_columns = self.model.__table__.columns
+            chunk_size = min(chunk_size, MAX_QUERY_PARAMS // (len(names) + 1))
+            items = list(updates.items())
+            changed = []
+            with batched_queries():
+                for start in range(0, len(items), chunk_size):
+                    source = values(
+                        *[column(name, table_columns[name].type) for name in ['id', *names]],
+                        name='v',
+                    ).data([
+                        (row_id, *[row[name] for name in names])
+                        for row_id, row in items[start:start + chunk_size]
+                    ])
+                    res = await session.execute(self._update_from(source, names))
+                    changed.extend(res.scalars())
+
+        # ORM-объекты в сессии могли устареть после UPDATE мимо identity map
+        session.expire_all()
+        return changed
+
+    async def _set_hidden_cascade(self,
+        parent_id: int,
+        hidden: bool,
+        child_fk: InstrumentedAttribute,
+        session: AsyncSession,
+        chunk_size: Optional[int] = None,
+        *child_where: ColumnElement[bool]
+    ) -> CascadeResult:
+        """
+        ## Меняет `is_hidden` у записи `self.model` и всех зависимых записей.
+
+        Родитель и дети обновляются одним запросом (data-modifying CTE):
+
+            WITH parent AS (UPDATE parent SET is_hidden = :h WHERE id = :id RETURNING id),
+                 children AS (UPDATE child SET is_hidden = :h
+                              WHERE id IN (SELECT id FROM child
+                                           WHERE fk IN (SELECT id FROM parent)
+                                             AND is_hidden <> :h)
+                              RETURNING id)
+            SELECT (SELECT count(*) FROM parent), (SELECT count(*) FROM children)
+
+        Если у детей есть колонка `hidden_by_cascade`, скрытие отмечает ею
+        изменённых детей, а восстановление трогает только отмеченных —
+        дети, скрытые отдельно, остаются скрытыми.
+
+        Без `chunk_size` всё меняется в транзакции вызывающего кода.
+        С `chunk_size` дети сначала обновляются пачками, каждая в своей
+        короткой сессии (`db.get_session()`, по одной за раз) со своим
+        коммитом, чтобы не держать блокировки долго. Затем запрос выше
+        один раз выполняется в `session`: он меняет родителя и детей,
+        появившихся за время пачек. Сессию вызывающего кода метод
+        не коммитит; при её откате закоммиченные пачки остаются, и вызов
+        можно повторить.
+
+        Args:
+            parent_id: ID родительской записи.
+            hidden: Новое значение `is_hidden`.
+            child_fk: Колонка внешнего ключа дочерней модели (`Order.user_id`).
+            session: Асинхронная сессия БД.
+            chunk_size: Размер пачки детей (`None` — все за один запрос).
+            *child_where: Дополнительные условия на изменяемых детей.
+
+        Raises:
+            ValueError: Если `chunk_size` меньше 1.
+
+        Returns:
+            CascadeResult: Найден ли родитель и сколько детей изменено.
+        """
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError('chunk_size must be >= 1')
+
+        child = child_fk.class_
+        child_values: dict[str, Any] = {'is_hidden': hidden}
+        if 'hidden_at' in child.__table__.columns:
+            child_values['hidden_at'] = func.now() if hidden else None
+        if 'hidden_by_cascade' in child.__table__.columns:
+            child_values['hidden_by_cascade'] = hidden
+            if not hidden:
+                child_where = (*child_where, child.hidden_by_cascade)
+
+        result = CascadeResult(found=False)
+        if chunk_size is not None:
+            chunk = (
+                update(child)
+                .where(child.id.in_(
+                    select(child.id)
+                    .where(child_fk == parent_id, child.is_hidden != hidden, *child_where)
+                    .limit(chunk_size)
+                ))
+                .values(**child_values)
+            )
+            with batched_queries():
+                while True:
+                    async with self.db.get_session() as chunk_session:
+                        res = await chunk_session.execute(chunk)
+                        await chunk_session.commit()
+                    result.orders += res.rowcount
+                    result.chunks += 1
+                    if res.rowcount < chunk_size:
+                        break
+
+        parent = (
+            update(self.model)
+            .where(self.model.id == parent_id)
+            .values(is_hidden=hidden)
+            .returning(self.model.id)
+            .cte('parent')
+        )
+        children = (
+            update(child)
+            .where(child.id.in_(
+                select(child.id)
+                .where(child_fk.in_(select(parent.c.id)), child.is_hidden != hidden, *child_where)
+            ))
+            .values(**child_values)
+            .returning(child.id)
+            .cte('children')
+        )
+        stmt = select(
+            select(func.count()).select_from(parent).scalar_subquery(),
+            select(func.count()).select_from(children).scalar_subquery(),
+        )
+        found, changed = (await session.execute(stmt)).one()
+        result.found = bool(found)
+        result.orders += changed
+        result.chunks += 1
+
+        # ORM-объекты в сессии могли устареть после UPDATE мимо identity map
+        session.expire_all()
+        return result
 
 
 # Публичный API модуля
-__all__ = ['BaseDAO', 'TModel', 'TSchema']
\ No newline at end of file
+__all__ = ['BaseDAO', 'TModel', 'TSchema', 'UPDATE_MANY_CHUNK_SIZE', 'UPDATE_MANY_COPY_THRESHOLD']
\ No newline at end of file
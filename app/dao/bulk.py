@@ -0,0 +1,94 @@
+"""Загрузка графа пользователей, товаров и заказов одним COPY на таблицу.
+
+Id выдаются на стороне клиента (`IdAllocator`), поэтому заказы могут
+ссылаться на пользователей и товары ещё до вставки, а вставка идёт без
+`RETURNING`: по одному `COPY ... FROM STDIN` на таблицу в порядке внешних
+ключей (`users`, `products`, затем `orders`).
+"""
+
+from typing import Any, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.ids import IdAllocator, id_allocator
+from app.database.models import Order, Product, User
+from app.schemas.order import NewOrder, ExistsOrder
+from app.schemas.product import NewProduct, ExistsProduct
+from app.schemas.user import NewUser, ExistsUser
+
+
+
+class BulkGraph:
+    """
+    ## Граф новых записей в памяти с id, выданными на стороне клиента.
+
+    Attributes:
+        allocator: Пул id (последовательности того же подключения, куда идёт COPY).
+        users: Пользователи в порядке добавления.
+        products: Товары в порядке добавления.
+        orders: Заказы в порядке добавления.
+    """
+
+    def __init__(self, allocator: IdAllocator = id_allocator) -> None:
+        self.allocator = allocator
+        self.users: list[ExistsUser] = []
+        self.products: list[ExistsProduct] = []
+        self.orders: list[ExistsOrder] = []
+
+    async def add_user(self, user: NewUser) -> ExistsUser:
+        """
+        ## Добавляет пользователя и сразу выдаёт ему id.
+        """
+        created = ExistsUser(id=await self.allocator.next_id(User.__tablename__), **user.model_dump())
+        self.users.append(created)
+        return created
+
+    async def add_product(self, product: NewProduct) -> ExistsProduct:
+        """
+        ## Добавляет товар и сразу выдаёт ему id.
+        """
+        created = ExistsProduct(id=await self.allocator.next_id(Product.__tablename__), **product.model_dump())
+        self.products.append(created)
+        return created
+
+    async def add_order(self, order: NewOrder) -> ExistsOrder:
+        """
+        ## Добавляет заказ (может ссылаться на записи этого же графа).
+        """
+        created = ExistsOrder(id=await self.allocator.next_id(Order.__tablename__), **order.model_dump())
+        self.orders.append(created)
+        return created
+
+    @staticmethod
+    def _records(rows: Sequence[Any], columns: Sequence[str]) -> list[tuple]:
+        """
+        ## Строки для COPY в порядке колонок.
+        """
+        return [tuple(getattr(row, col) for col in columns) for row in rows]
+
+    async def copy(self, session: AsyncSession) -> dict[str, int]:
+        """
+        ## Загружает граф: по одному COPY на таблицу в транзакции сессии.
+
+        Коммит выполняет вызывающий код. Ошибка в любой строке (например,
+        повторяющийся email) откатывает весь граф вместе с транзакцией.
+
+        Args:
+            session: Асинхронная сессия БД того же подключения, что и `allocator`.
+
+        Returns:
+            dict[str, int]: Число загруженных строк по таблицам.
+        """
+        driver = self.allocator.db.driver
+        loaded = {}
+        for model, rows in ((User, self.users), (Product, self.products), (Order, self.orders)):
+            if not rows:
+                continue
+            columns = [col for col in model.__table__.columns.keys() if col in type(rows[0]).model_fields]
+            await driver.copy_records(session, model.__tablename__, columns, self._records(rows, columns))
+            loaded[model.__tablename__] = len(rows)
+        return loaded
+
+
+# Публичный API модуля
+__all__ = ['BulkGraph']
@@ -0,0 +1,96 @@
+"""Колоночный режим выборки для аналитических чтений DAO.
+
+Вместо списка Pydantic-схем (сотни байт и микросекунды на строку) запрос
+возвращает по одному массиву на колонку. Колонки агрегируются на стороне
+PostgreSQL через `array_agg(col ORDER BY pk)`, поэтому драйвер получает
+одну строку с массивами и объекты-строки в Python не создаются.
+
+Целые колонки собираются в `array('q')`, булевы — в `array('b')`,
+строки — в `list[str]`. Если установлен NumPy и передан `use_numpy=True`,
+числовые и булевы колонки возвращаются как `numpy.ndarray`.
+"""
+
+from array import array
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import Boolean, Column, Integer, Select, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+try:
+    import numpy
+except ImportError:  # NumPy — необязательная зависимость
+    numpy = None
+
+
+
+# Колоночный результат: имя колонки -> массив значений
+Columns = dict[str, Sequence[Any]]
+
+# Доступен ли NumPy
+HAS_NUMPY = numpy is not None
+
+
+
+def columnar_query(columns: Sequence[Column], order_by: Column) -> Select:
+    """
+    ## Строит запрос `SELECT array_agg(col ORDER BY pk) AS col, ...`.
+
+    Одинаковый `ORDER BY` во всех агрегатах гарантирует согласованный
+    порядок элементов между колонками.
+
+    Args:
+        columns: Колонки модели для выборки.
+        order_by: Уникальная колонка для упорядочивания (обычно первичный ключ).
+
+    Returns:
+        Select: Запрос без `WHERE` — условия добавляет вызывающий код.
+    """
+    return select(*[
+        func.array_agg(aggregate_order_by(col, order_by)).label(col.key)
+        for col in columns
+    ])
+
+
+def _convert(values: Optional[list], col: Column, use_numpy: bool) -> Sequence[Any]:
+    """
+    ## Превращает список значений колонки в типизированный массив.
+    """
+    values = values or []
+    if isinstance(col.type, Boolean):
+        if use_numpy:
+            return numpy.array(values, dtype=numpy.bool_)
+        return array('b', values)
+    if isinstance(col.type, Integer):
+        if use_numpy:
+            return numpy.array(values, dtype=numpy.int64)
+        return array('q', values)
+    if use_numpy:
+        return numpy.array(values, dtype=object)
+    return values
+
+
+def to_columns(row: Any, columns: Sequence[Column], use_numpy: bool = False) -> Columns:
+    """
+    ## Собирает колоночный результат из строки с агрегированными массивами.
+
+    Args:
+        row: Единственная строка результата `columnar_query`.
+        columns: Те же колонки, что были переданы в `columnar_query`.
+        use_numpy: Вернуть `numpy.ndarray` (если NumPy установлен).
+
+    Raises:
+        RuntimeError: Если запрошен NumPy, но он не установлен.
+
+    Returns:
+        Columns: Словарь `{"column": массив значений}`.
+    """
+    if use_numpy and not HAS_NUMPY:
+        raise RuntimeError('numpy is not installed')
+    return {
+        col.key: _convert(values, col, use_numpy)
+        for col, values in zip(columns, row)
+    }
+
+
+# Публичный API модуля
+__all__ = ['Columns', 'HAS_NUMPY', 'columnar_query', 'to_columns']
@@ -1,12 +1,21 @@
 """DAO-слой для работы с заказами-примера (`Order`)."""
 
-from sqlalchemy import select, insert
+from typing import Optional, Sequence
+
+from sqlalchemy import (
+    ARRAY, BigInteger, Integer, Row, and_, case, exists, false, func, insert, literal, literal_column, select,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .base import BaseDAO
+from .columnar import Columns
 
-from app.database.models import Order
-from app.schemas.order import NewOrder, ExistsOrder
+from app.database.ids import IdAllocator
+from app.database.models import Order, OrderArchive, Product, User
+from app.modules.jobs import job_queue
+from app.modules.profiling import profiled
+from app.schemas.count import CountResult, CountStrategy
+from app.schemas.order import NewOrder, ExistsOrder, OrderRejection, PlacedOrder
 
 
 
@@ -26,48 +35,339 @@ class OrderDAO(BaseDAO):
         super().__init__()
         self.model = Order
 
-    async def create(self, order: NewOrder, session: AsyncSession) -> ExistsOrder:
+    @profiled
+    async def create(self,
+        order: NewOrder,
+        session: AsyncSession,
+        follow_up: Optional[str] = None,
+        ids: Optional[IdAllocator] = None
+    ) -> ExistsOrder:
         """
         ## Создаёт новый заказ.
 
         Args:
             order: Pydantic-модель с данными заказа.
             session: Асинхронная сессия БД.
+            follow_up: Очередь задач (`app/modules/jobs`) для последующей обработки
+                заказа. Задача ставится в той же транзакции и появится только
+                вместе с закоммиченным заказом.
+            ids: Пул id на стороне клиента (`id_allocator`): id берётся из заранее
+                зарезервированного блока, а не из последовательности при вставке.
+                Пул должен относиться к той же БД, что и `session`.
 
         Returns:
             ExistsOrder: Созданный заказ с заполненным `id`.
         """
         stmt = (
             insert(self.model)
-            .values(**order.model_dump())
+            .values(**await self._insert_values(order, session, ids))
             .returning(self.model)
         )
         res = await session.execute(stmt)
         await session.flush()
         obj = res.scalar_one()
-        return ExistsOrder(**self._return_dict_from_obj(obj, self.model))
+        created = self._to_schema(obj, ExistsOrder)
+        if follow_up is not None:
+            await job_queue.enqueue(session, follow_up, created.model_dump(mode='json'))
+        return created
+
+    def _place_statement(self, orders: Sequence[NewOrder], atomic: bool):
+        """
+        ## Строит запрос «проверить и вставить» для набора позиций.
+
+        Один запрос (data-modifying CTE):
+
+            WITH lines    AS (SELECT * FROM unnest(:user_ids, :product_ids, :quantities)
+                              WITH ORDINALITY AS lines (user_id, product_id, quantity, pos)),
+                 u        AS (SELECT id, is_hidden FROM users
+                              WHERE id IN (SELECT user_id FROM lines) FOR SHARE),
+                 p        AS (SELECT id, is_hidden FROM products
+                              WHERE id IN (SELECT product_id FROM lines) FOR SHARE),
+                 checked  AS (SELECT lines.*, u.*, p.*, <видимы оба> AS ok
+                              FROM lines LEFT JOIN u ... LEFT JOIN p ...),
+                 numbered AS (SELECT checked.*, CASE WHEN <ok> THEN nextval('orders_id_seq') END AS new_id
+                              FROM checked),
+                 ins      AS (INSERT INTO orders (id, user_id, product_id, quantity, is_hidden)
+                              SELECT new_id, ... FROM numbered WHERE new_id IS NOT NULL
+                              RETURNING ...)
+            SELECT numbered.*, ins.* FROM numbered LEFT JOIN ins ON ins.id = numbered.new_id
+            ORDER BY pos
+
+        `FOR SHARE` конфликтует с `UPDATE ... SET is_hidden`, поэтому пользователь
+        или товар не могут быть скрыты между проверкой и вставкой. `id` выдаётся
+        заранее (`nextval`), чтобы сопоставить вставленные строки с позициями.
+        """
+        lines = (
+            func.unnest(
+                literal([o.user_id for o in orders], ARRAY(BigInteger)),
+                literal([o.product_id for o in orders], ARRAY(BigInteger)),
+                literal([o.quantity for o in orders], ARRAY(Integer)),
+            )
+            .table_valued('user_id', 'product_id', 'quantity', with_ordinality='pos')
+            .render_derived(name='lines')
+        )
+        users = (
+            select(User.id, User.is_hidden)
+            .where(User.id.in_(select(lines.c.user_id)))
+            .with_for_update(read=True)
+            .cte('u')
+        )
+        products = (
+            select(Product.id, Product.is_hidden)
+            .where(Product.id.in_(select(lines.c.product_id)))
+            .with_for_update(read=True)
+            .cte('p')
+        )
+        ok = func.coalesce(and_(~users.c.is_hidden, ~products.c.is_hidden), false())
+        checked = (
+            select(
+                lines.c.pos,
+                lines.c.user_id,
+                lines.c.product_id,
+                lines.c.quantity,
+                users.c.id.is_not(None).label('user_found'),
+                users.c.is_hidden.label('user_hidden'),
+                products.c.id.is_not(None).label('product_found'),
+                products.c.is_hidden.label('product_hidden'),
+                ok.label('ok'),
+            )
+            .select_from(
+                lines
+                .outerjoin(users, users.c.id == lines.c.user_id)
+                .outerjoin(products, products.c.id == lines.c.product_id)
+            )
+            .cte('checked')
+        )
+        accepted = checked.c.ok
+        if atomic:
+            accepted = and_(accepted, ~exists().where(~checked.c.ok).select_from(checked))
+        sequence = literal_column(f"'{self.model.__tablename__}_id_seq'::regclass")
+        numbered = (
+            select(
+                checked,
+                case((accepted, func.nextval(sequence))).label('new_id'),
+            )
+            .cte('numbered')
+        )
+        returned = [self.model.__table__.c[col] for col in self.model.__table__.columns.keys()]
+        inserted = (
+            insert(self.model)
+            .from_select(
+                ['id', 'user_id', 'product_id', 'quantity', 'is_hidden'],
+                select(
+                    numbered.c.new_id,
+                    numbered.c.user_id,
+                    numbered.c.product_id,
+                    numbered.c.quantity,
+                    false(),
+                ).where(numbered.c.new_id.is_not(None)),
+            )
+            .returning(*returned)
+            .cte('ins')
+        )
+        return (
+            select(
+                numbered.c.user_found,
+                numbered.c.user_hidden,
+                numbered.c.product_found,
+                numbered.c.product_hidden,
+                *[inserted.c[col.key].label(f'order_{col.key}') for col in returned],
+            )
+            .select_from(numbered.outerjoin(inserted, inserted.c.id == numbered.c.new_id))
+            .order_by(numbered.c.pos)
+        )
+
+    @staticmethod
+    def _placement(row) -> PlacedOrder:
+        """
+        ## Превращает строку результата `_place_statement` в `PlacedOrder`.
+        """
+        data = row._mapping
+        if data['order_id'] is not None:
+            return PlacedOrder(order=ExistsOrder(**{
+                key.removeprefix('order_'): value
+                for key, value in data.items() if key.startswith('order_')
+            }))
+        failed: OrderRejection
+        if not data['user_found']:
+            failed = 'user_not_found'
+        elif data['user_hidden']:
+            failed = 'user_hidden'
+        elif not data['product_found']:
+            failed = 'product_not_found'
+        elif data['product_hidden']:
+            failed = 'product_hidden'
+        else:
+            failed = 'cart_rejected'
+        return PlacedOrder(failed=failed)
+
+    @profiled
+    async def place(self, order: NewOrder, session: AsyncSession) -> PlacedOrder:
+        """
+        ## Оформляет заказ с проверкой пользователя и товара за один запрос.
 
+        В отличие от `create`, заказ вставляется только если пользователь
+        и товар существуют и не скрыты; проверки и вставка выполняются
+        одним запросом (один round trip, без гонки между проверкой и вставкой).
+
+        Args:
+            order: Pydantic-модель с данными заказа.
+            session: Асинхронная сессия БД.
+
+        Returns:
+            PlacedOrder: Созданный заказ или невыполненное условие (`failed`).
+        """
+        res = await session.execute(self._place_statement([order], atomic=True))
+        return self._placement(res.one())
+
+    @profiled
+    async def place_many(self,
+        orders: Sequence[NewOrder],
+        session: AsyncSession,
+        atomic: bool = True
+    ) -> list[PlacedOrder]:
+        """
+        ## Оформляет корзину: все позиции проверяются и вставляются одним запросом.
+
+        Args:
+            orders: Позиции корзины.
+            session: Асинхронная сессия БД.
+            atomic: Если хотя бы одна позиция не прошла проверку, не вставлять
+                ни одной (корректные позиции получают `failed='cart_rejected'`).
+                При `False` вставляются все корректные позиции.
+
+        Returns:
+            list[PlacedOrder]: Результаты в порядке `orders`.
+        """
+        if not orders:
+            return []
+        res = await session.execute(self._place_statement(orders, atomic))
+        return [self._placement(row) for row in res]
+
+    @profiled
     async def get_by_user(self,
         user_id: int,
-        session: AsyncSession
-    ) -> list[ExistsOrder]:
+        session: AsyncSession,
+        include_archived: bool = False,
+        fields: Optional[Sequence[str]] = None
+    ) -> list[ExistsOrder] | list[Row]:
         """
         ## Возвращает все заказы указанного пользователя.
 
         Args:
             user_id: Идентификатор пользователя.
             session: Асинхронная сессия БД.
+            include_archived: Добавить заказы из архива `orders_archive`
+                (одним запросом через `UNION ALL`).
+            fields: Выбрать только эти колонки и вернуть `Row`. Для
+                `fields=('product_id',)` достаточно индекса `idx_order_user_product`
+                (index-only scan при актуальной карте видимости).
+
+        Raises:
+            ValueError: Если `fields` содержит неизвестные колонки (с `include_archived` —
+                и колонки, которых нет в архиве).
 
         Returns:
-            list[ExistsOrder]: Список заказов пользователя.
+            list[ExistsOrder] | list[Row]: Список заказов пользователя (`Row` при `fields`).
         """
+        if include_archived:
+            return await self._get_by_user_with_archive(user_id, session, fields)
+        if fields is not None:
+            query = select(*self._projection(fields)).where(self.model.user_id == user_id)
+            return await self._fetch_rows(session, query)
         query = select(self.model).where(self.model.user_id == user_id)
         objs = await self._fetch_all(session, query)
-        return [
-            ExistsOrder(**self._return_dict_from_obj(obj, self.model))
-            for obj in objs
-        ]
+        return self._to_schemas(objs, ExistsOrder)
+
+    async def _get_by_user_with_archive(self,
+        user_id: int,
+        session: AsyncSession,
+        fields: Optional[Sequence[str]] = None
+    ) -> list[ExistsOrder] | list[Row]:
+        """
+        ## Заказы пользователя из `orders` и `orders_archive`, по возрастанию `id`.
+
+        `id` выбирается внутри `UNION ALL` всегда, поэтому порядок сохраняется
+        и для `fields` без `id`. Без `fields` выбираются поля `ExistsOrder`:
+        служебных колонок `orders` (`hidden_by_cascade`) в архиве нет.
+
+        Raises:
+            ValueError: Если `fields` содержит колонки, которых нет в архиве.
+        """
+        if fields is None:
+            columns = list(ExistsOrder.model_fields)
+        else:
+            columns = [col.key for col in self._projection(fields)]
+            unknown = set(columns) - set(OrderArchive.__table__.columns.keys())
+            if unknown:
+                raise ValueError(f'columns not in orders_archive: {sorted(unknown)}')
+        selected = columns if 'id' in columns else ['id', *columns]
+        hot = select(*[self.model.__table__.c[col] for col in selected])
+        cold = select(*[OrderArchive.__table__.c[col] for col in selected])
+        both = (
+            hot.where(self.model.user_id == user_id)
+            .union_all(cold.where(OrderArchive.user_id == user_id))
+            .subquery('orders_all')
+        )
+        query = select(*[both.c[col] for col in columns]).order_by(both.c.id)
+        rows = await self._fetch_rows(session, query)
+        if fields is not None:
+            return rows
+        return [ExistsOrder(**row._mapping) for row in rows]
+
+    @profiled
+    async def count_by_user(self,
+        user_id: int,
+        session: AsyncSession,
+        strategy: CountStrategy = 'auto',
+        cache_ttl: Optional[float] = None
+    ) -> CountResult:
+        """
+        ## Возвращает число заказов пользователя (итог для списка `get_by_user`).
+
+        Точный подсчёт идёт по индексу `orders.user_id` (index-only scan),
+        оценка — по статистике планировщика для этого `user_id`.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            session: Асинхронная сессия БД.
+            strategy: `exact`, `estimate` или `auto` (оценка, а для небольших — точно).
+            cache_ttl: Время жизни результата в кеше DAO, в секундах.
+
+        Returns:
+            CountResult: Число заказов и признак точности.
+        """
+        return await self._count(
+            session, self.model.user_id == user_id, strategy=strategy, cache_ttl=cache_ttl
+        )
+
+    @profiled
+    async def get_by_user_columnar(self,
+        user_id: int,
+        session: AsyncSession,
+        columns: Optional[Sequence[str]] = None,
+        use_numpy: bool = False
+    ) -> Columns:
+        """
+        ## Возвращает заказы пользователя в колоночном виде (для отчётов).
+
+        Args:
+            user_id: Идентификатор пользователя.
+            session: Асинхронная сессия БД.
+            columns: Имена колонок (по умолчанию — все).
+            use_numpy: Вернуть `numpy.ndarray` вместо `array`.
+
+        Returns:
+            Columns: Словарь `{"column": массив значений}`, упорядоченных по `id`.
+        """
+        return await self._fetch_columns(
+            session,
+            self.model.user_id == user_id,
+            columns=columns,
+            use_numpy=use_numpy,
+        )
 
+    @profiled
     async def hide(self, order_id: int, session: AsyncSession) -> bool:
         """
         ## Скрывает заказ (мягкое удаление).
@@ -84,9 +384,12 @@ class OrderDAO(BaseDAO):
         if not obj:
             return False
         obj.is_hidden = True
+        obj.hidden_at = func.now()
+        obj.hidden_by_cascade = False
         await session.flush()
         return True
 
+    @profiled
     async def unhide(self, order_id: int, session: AsyncSession) -> bool:
         """
         ## Восстанавливает скрытый заказ.
@@ -103,6 +406,8 @@ class OrderDAO(BaseDAO):
         if not obj:
             return False
         obj.is_hidden = False
+        obj.hidden_at = None
+        obj.hidden_by_cascade = False
         await session.flush()
         return True
 
@@ -1,15 +1,29 @@
 """DAO-слой для работы с товарами-примера (`Product`)."""
 
-from sqlalchemy import select, insert
+from typing import Iterable, Mapping, Optional, Sequence
+
+from sqlalchemy import Row, select, insert, exists, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .base import BaseDAO
+from .base import BaseDAO, UPDATE_MANY_CHUNK_SIZE, UPDATE_MANY_COPY_THRESHOLD
+from .columnar import Columns
 
-from app.database.models import Product
+from app.config.config_reader import env_config
+from app.database.ids import IdAllocator
+from app.database.models import Product, User, Order
+from app.modules.profiling import profiled
+from app.modules.catalog import CATALOG_CHANNEL
+from app.schemas.cascade import CascadeResult
+from app.schemas.count import CountResult, CountStrategy
 from app.schemas.product import NewProduct, ExistsProduct
 
 
 
+# Максимальная длина payload `NOTIFY` (с запасом до лимита PostgreSQL в 8000 байт)
+_NOTIFY_PAYLOAD_LIMIT = 7900
+
+
+
 class ProductDAO(BaseDAO):
     """
     ## DAO для работы с товарами-примера (`Product`).
@@ -26,9 +40,62 @@ class ProductDAO(BaseDAO):
         super().__init__()
         self.model = Product
 
+    async def _notify_catalog(self,
+        op: str,
+        product_id: int,
+        session: AsyncSession
+    ) -> None:
+        """
+        ## Сообщает снимку каталога об изменении товара через `NOTIFY`.
+
+        Уведомление доставляется только после коммита транзакции сессии.
+        Ничего не делает, если `PRODUCT_CATALOG_ENABLED` выключен.
+
+        Args:
+            op: Тип изменения (`create`, `hide`, `unhide`).
+            product_id: ID изменённого товара.
+            session: Асинхронная сессия БД.
+        """
+        if not env_config.PRODUCT_CATALOG_ENABLED:
+            return
+        await session.execute(select(func.pg_notify(CATALOG_CHANNEL, f'{op}:{product_id}')))
+
+    async def _notify_catalog_many(self,
+        op: str,
+        product_ids: Iterable[int],
+        session: AsyncSession
+    ) -> None:
+        """
+        ## Сообщает снимку каталога об изменении многих товаров.
+
+        ID упаковываются через запятую в payload не длиннее `_NOTIFY_PAYLOAD_LIMIT`
+        (у `NOTIFY` ограничение 8000 байт), по одному `pg_notify` на payload.
+
+        Args:
+            op: Тип изменения (`update`).
+            product_ids: ID изменённых товаров.
+            session: Асинхронная сессия БД.
+        """
+        if not env_config.PRODUCT_CATALOG_ENABLED:
+            return
+        payloads: list[str] = []
+        current = ''
+        for product_id in product_ids:
+            part = f'{product_id}' if not current else f'{current},{product_id}'
+            if len(op) + 1 + len(part) > _NOTIFY_PAYLOAD_LIMIT:
+                payloads.append(current)
+                part = f'{product_id}'
+            current = part
+        if current:
+            payloads.append(current)
+        for payload in payloads:
+            await session.execute(select(func.pg_notify(CATALOG_CHANNEL, f'{op}:{payload}')))
+
+    @profiled
     async def create(self,
         product: NewProduct,
-        session: AsyncSession
+        session: AsyncSession,
+        ids: Optional[IdAllocator] = None
     ) -> ExistsProduct:
         """
         ## Создаёт новый товар.
@@ -36,37 +103,128 @@ class ProductDAO(BaseDAO):
         Args:
             product: Pydantic-модель с данными товара.
             session: Асинхронная сессия БД.
+            ids: Пул id на стороне клиента (`id_allocator`): id берётся из заранее
+                зарезервированного блока, а не из последовательности при вставке.
+                Пул должен относиться к той же БД, что и `session`.
 
         Returns:
             ExistsProduct: Созданный товар с заполненным `id`.
         """
         stmt = (
             insert(self.model)
-            .values(**product.model_dump())
+            .values(**await self._insert_values(product, session, ids))
             .returning(self.model)
         )
         res = await session.execute(stmt)
         await session.flush()
         obj = res.scalar_one()
-        return ExistsProduct(**self._return_dict_from_obj(obj, self.model))
+        await self._notify_catalog('create', obj.id, session)
+        return self._to_schema(obj, ExistsProduct)
 
-    async def get_all(self, session: AsyncSession) -> list[ExistsProduct]:
+    @profiled
+    async def get_all(self,
+        session: AsyncSession,
+        fields: Optional[Sequence[str]] = None
+    ) -> list[ExistsProduct] | list[Row]:
         """
         ## Возвращает список всех товаров.
 
         Args:
             session: Асинхронная сессия БД.
+            fields: Выбрать только эти колонки и вернуть `Row`. Для
+                `fields=('name', 'price')` достаточно индекса `idx_product_name_price`
+                (index-only scan при актуальной карте видимости).
+
+        Raises:
+            ValueError: Если `fields` содержит неизвестные колонки.
 
         Returns:
-            list[ExistsProduct]: Список всех товаров в базе.
+            list[ExistsProduct] | list[Row]: Все товары в базе (`Row` при `fields`).
         """
+        if fields is not None:
+            return await self._fetch_rows(session, select(*self._projection(fields)))
+
         query = select(self.model)
         objs = await self._fetch_all(session, query)
-        return [
-            ExistsProduct(**self._return_dict_from_obj(obj, self.model))
-            for obj in objs
-        ]
+        return self._to_schemas(objs, ExistsProduct)
+
+    @profiled
+    async def count(self,
+        session: AsyncSession,
+        strategy: CountStrategy = 'auto',
+        cache_ttl: Optional[float] = None
+    ) -> CountResult:
+        """
+        ## Возвращает число товаров (итог для списка `get_all`).
+
+        Args:
+            session: Асинхронная сессия БД.
+            strategy: `exact` — `count(*)`, `estimate` — `pg_class.reltuples`,
+                `auto` — оценка, а для небольших таблиц точное число.
+            cache_ttl: Время жизни результата в кеше DAO, в секундах.
+
+        Returns:
+            CountResult: Число товаров и признак точности (`display()` даёт `~12.4M`).
+        """
+        return await self._count(session, strategy=strategy, cache_ttl=cache_ttl)
+
+    @profiled
+    async def get_all_columnar(self,
+        session: AsyncSession,
+        columns: Optional[Sequence[str]] = None,
+        use_numpy: bool = False
+    ) -> Columns:
+        """
+        ## Возвращает все товары в колоночном виде (для отчётов).
+
+        Args:
+            session: Асинхронная сессия БД.
+            columns: Имена колонок (по умолчанию — все).
+            use_numpy: Вернуть `numpy.ndarray` вместо `array`.
 
+        Returns:
+            Columns: Словарь `{"column": массив значений}`, упорядоченных по `id`.
+        """
+        return await self._fetch_columns(session, columns=columns, use_numpy=use_numpy)
+
+    @profiled
+    async def update_prices(self,
+        prices: Mapping[int, int],
+        session: AsyncSession,
+        chunk_size: int = UPDATE_MANY_CHUNK_SIZE,
+        copy_threshold: Optional[int] = UPDATE_MANY_COPY_THRESHOLD
+    ) -> list[int]:
+        """
+        ## Массово меняет цены товаров (переоценка).
+
+        Один `UPDATE products SET price = v.price FROM (VALUES ...) v` на пачку
+        (или COPY во временную таблицу для очень больших наборов);
+        товары, цена которых не меняется, не обновляются.
+
+        Args:
+            prices: `{product_id: новая цена}`.
+            session: Асинхронная сессия БД.
+            chunk_size: Товаров в одном запросе.
+            copy_threshold: С какого числа товаров использовать COPY (`None` — никогда).
+
+        Raises:
+            ValueError: Если какая-то цена отрицательная.
+
+        Returns:
+            list[int]: ID товаров, цена которых изменилась.
+        """
+        if any(price < 0 for price in prices.values()):
+            raise ValueError('price must be >= 0')
+        changed = await self.update_many(
+            {product_id: {'price': price} for product_id, price in prices.items()},
+            session,
+            chunk_size=chunk_size,
+            copy_threshold=copy_threshold,
+        )
+        await self._notify_catalog_many('update', changed, session)
+        return changed
+
+    @profiled
     async def hide(self, product_id: int, session: AsyncSession) -> bool:
         """
         ## Скрывает товар (мягкое удаление).
@@ -84,8 +242,10 @@ class ProductDAO(BaseDAO):
             return False
         obj.is_hidden = True
         await session.flush()
+        await self._notify_catalog('hide', product_id, session)
         return True
 
+    @profiled
     async def unhide(self, product_id: int, session: AsyncSession) -> bool:
         """
         ## Восстанавливает скрытый товар.
@@ -103,9 +263,62 @@ class ProductDAO(BaseDAO):
             return False
         obj.is_hidden = False
         await session.flush()
+        await self._notify_catalog('unhide', product_id, session)
         return True
 
 
+    @profiled
+    async def hide_cascade(self,
+        product_id: int,
+        session: AsyncSession,
+        chunk_size: Optional[int] = None
+    ) -> CascadeResult:
+        """
+        ## Скрывает товара и все его заказы за один запрос.
+
+        Args:
+            product_id: ID товара.
+            session: Асинхронная сессия БД.
+            chunk_size: Размер пачки заказов. Если задан, заказы скрываются
+                пачками, каждая в отдельной сессии со своим коммитом; родитель
+                меняется в `session` (коммитит вызывающий код).
+
+        Returns:
+            CascadeResult: Найден ли товар и сколько заказов скрыто.
+        """
+        await self._notify_catalog('hide', product_id, session)
+        return await self._set_hidden_cascade(
+            product_id, True, Order.product_id, session, chunk_size
+        )
+
+    @profiled
+    async def unhide_cascade(self,
+        product_id: int,
+        session: AsyncSession,
+        chunk_size: Optional[int] = None
+    ) -> CascadeResult:
+        """
+        ## Восстанавливает товара и его заказы за один запрос.
+
+        Восстанавливаются только заказы, скрытые каскадом (`hide_cascade()`);
+        заказы, скрытые отдельно или чей пользователь скрыт, остаются скрытыми.
+
+        Args:
+            product_id: ID товара.
+            session: Асинхронная сессия БД.
+            chunk_size: Размер пачки заказов. Если задан, заказы восстанавливаются
+                пачками, каждая в отдельной сессии со своим коммитом; родитель
+                меняется в `session` (коммитит вызывающий код).
+
+        Returns:
+            CascadeResult: Найден ли товар и сколько заказов восстановлено.
+        """
+        await self._notify_catalog('unhide', product_id, session)
+        return await self._set_hidden_cascade(
+            product_id, False, Order.product_id, session, chunk_size,
+            ~exists().where(User.id == Order.user_id, User.is_hidden),
+        )
+
 
 # Создание экземпляра DAO для товаров
 product_dao = ProductDAO()
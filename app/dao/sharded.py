@@ -0,0 +1,208 @@
+"""DAO поверх шардированной БД (`ShardedDbConnection`).
+
+Классы маршрутизируют вызовы обычных `UserDAO` / `ProductDAO` / `OrderDAO`
+на нужный шард и сами управляют транзакцией: каждый метод — одна
+транзакция на шарде (или по одной на каждом шарде при рассылке).
+"""
+
+from typing import Optional, Sequence
+
+from sqlalchemy import Row, insert, select, text
+
+from .order import order_dao
+from .product import product_dao
+from .user import user_dao
+
+from app.database.admission import Priority
+from app.database.models import Order, Product
+from app.database.sharding import ShardedDbConnection
+from app.schemas.count import CountResult, CountStrategy
+from app.schemas.order import NewOrder, ExistsOrder, PlacedOrder
+from app.schemas.product import NewProduct, ExistsProduct
+from app.schemas.user import NewUser, ExistsUser
+
+
+
+class ShardedUserDAO:
+    """
+    ## Пользователи на шардах: размещение по email, поиск по id из id.
+
+    Attributes:
+        db: Шардированное подключение.
+    """
+    def __init__(self, db: ShardedDbConnection) -> None:
+        self.db = db
+
+    async def create(self, user: NewUser) -> ExistsUser:
+        """
+        ## Создаёт пользователя на шарде `crc32(email) % N`.
+        """
+        async with self.db.session_for_email(user.email, Priority.CRITICAL) as session:
+            created = await user_dao.create(user, session=session)
+            await session.commit()
+        return created
+
+    async def get_by_email(self,
+        email: str,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[ExistsUser | Row]:
+        """
+        ## Ищет пользователя только на его шарде.
+        """
+        async with self.db.session_for_email(email) as session:
+            return await user_dao.get_by_email(email, session=session, fields=fields)
+
+    async def hide(self, user_id: int) -> bool:
+        """
+        ## Скрывает пользователя на шарде, закодированном в `user_id`.
+        """
+        async with self.db.session_for_id(user_id) as session:
+            result = await user_dao.hide(user_id, session=session)
+            await session.commit()
+        return result
+
+    async def unhide(self, user_id: int) -> bool:
+        """
+        ## Восстанавливает пользователя на шарде, закодированном в `user_id`.
+        """
+        async with self.db.session_for_id(user_id) as session:
+            result = await user_dao.unhide(user_id, session=session)
+            await session.commit()
+        return result
+
+
+class ShardedProductDAO:
+    """
+    ## Товары — справочная таблица, реплицированная на все шарды.
+
+    Id выдаёт последовательность шарда 0, затем строка с этим id
+    вставляется на все шарды. Чтения идут на шарды по кругу.
+
+    Attributes:
+        db: Шардированное подключение.
+    """
+    def __init__(self, db: ShardedDbConnection) -> None:
+        self.db = db
+
+    async def create(self, product: NewProduct) -> ExistsProduct:
+        """
+        ## Создаёт товар с одинаковым id на всех шардах.
+        """
+        async with self.db.shards[0].get_session(Priority.CRITICAL) as session:
+            product_id = (await session.execute(text("SELECT nextval('products_id_seq')"))).scalar_one()
+            await session.commit()
+
+        stmt = insert(Product).values(id=product_id, **product.model_dump())
+        await self.db.fan_out(lambda s: s.execute(stmt), Priority.CRITICAL, commit=True)
+        return ExistsProduct(id=product_id, **product.model_dump())
+
+    async def get_all(self, fields: Optional[Sequence[str]] = None) -> list[ExistsProduct] | list[Row]:
+        """
+        ## Возвращает все товары с одной из реплик.
+        """
+        async with self.db.replica().get_session() as session:
+            return await product_dao.get_all(session=session, fields=fields)
+
+    async def count(self, strategy: CountStrategy = 'auto') -> CountResult:
+        """
+        ## Возвращает число товаров с одной из реплик.
+        """
+        async with self.db.replica().get_session() as session:
+            return await product_dao.count(session=session, strategy=strategy)
+
+    async def hide(self, product_id: int) -> bool:
+        """
+        ## Скрывает товар на всех шардах.
+        """
+        results = await self.db.fan_out(
+            lambda s: product_dao.hide(product_id, session=s), Priority.DEFAULT, commit=True
+        )
+        return all(results)
+
+    async def unhide(self, product_id: int) -> bool:
+        """
+        ## Восстанавливает товар на всех шардах.
+        """
+        results = await self.db.fan_out(
+            lambda s: product_dao.unhide(product_id, session=s), Priority.DEFAULT, commit=True
+        )
+        return all(results)
+
+
+class ShardedOrderDAO:
+    """
+    ## Заказы на шарде своего пользователя.
+
+    Attributes:
+        db: Шардированное подключение.
+    """
+    def __init__(self, db: ShardedDbConnection) -> None:
+        self.db = db
+
+    async def create(self, order: NewOrder) -> ExistsOrder:
+        """
+        ## Создаёт заказ на шарде пользователя `order.user_id`.
+        """
+        async with self.db.session_for_id(order.user_id, Priority.CRITICAL) as session:
+            created = await order_dao.create(order, session=session)
+            await session.commit()
+        return created
+
+    async def place(self, order: NewOrder) -> PlacedOrder:
+        """
+        ## Оформляет заказ с проверками на шарде пользователя (товары реплицированы).
+        """
+        async with self.db.session_for_id(order.user_id, Priority.CRITICAL) as session:
+            placed = await order_dao.place(order, session=session)
+            await session.commit()
+        return placed
+
+    async def get_by_user(self,
+        user_id: int,
+        fields: Optional[Sequence[str]] = None
+    ) -> list[ExistsOrder] | list[Row]:
+        """
+        ## Возвращает заказы пользователя с его шарда.
+        """
+        async with self.db.session_for_id(user_id) as session:
+            return await order_dao.get_by_user(user_id, session=session, fields=fields)
+
+    async def count_by_user(self, user_id: int, strategy: CountStrategy = 'auto') -> CountResult:
+        """
+        ## Возвращает число заказов пользователя с его шарда.
+        """
+        async with self.db.session_for_id(user_id) as session:
+            return await order_dao.count_by_user(user_id, session=session, strategy=strategy)
+
+    async def get_by_product(self, product_id: int) -> list[ExistsOrder]:
+        """
+        ## Глобальный отчёт: заказы товара со всех шардов, по возрастанию id.
+        """
+        async def read(session):
+            query = select(Order).where(Order.product_id == product_id)
+            return order_dao._to_schemas(await order_dao._fetch_all(session, query), ExistsOrder)
+
+        per_shard = await self.db.fan_out(read)
+        return sorted((o for orders in per_shard for o in orders), key=lambda o: o.id)
+
+    async def hide(self, order_id: int) -> bool:
+        """
+        ## Скрывает заказ на шарде, закодированном в `order_id`.
+        """
+        async with self.db.session_for_id(order_id) as session:
+            result = await order_dao.hide(order_id, session=session)
+            await session.commit()
+        return result
+
+    async def unhide(self, order_id: int) -> bool:
+        """
+        ## Восстанавливает заказ на шарде, закодированном в `order_id`.
+        """
+        async with self.db.session_for_id(order_id) as session:
+            result = await order_dao.unhide(order_id, session=session)
+            await session.commit()
+        return result
+
+
+# Публичный API модуля
+__all__ = ['ShardedOrderDAO', 'ShardedProductDAO', 'ShardedUserDAO']
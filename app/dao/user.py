@@ -1,12 +1,15 @@
 """DAO-слой для работы с пользователями-примера (`User`)."""
 
-from typing import Optional
-from sqlalchemy import select, insert
+from typing import Optional, Sequence
+from sqlalchemy import Row, select, insert, exists
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .base import BaseDAO
 
-from app.database.models import User
+from app.database.ids import IdAllocator
+from app.database.models import User, Product, Order
+from app.modules.profiling import profiled
+from app.schemas.cascade import CascadeResult
 from app.schemas.user import NewUser, ExistsUser
 
 
@@ -27,47 +30,69 @@ class UserDAO(BaseDAO):
         super().__init__()
         self.model = User
 
-    async def create(self, user: NewUser, session: AsyncSession) -> ExistsUser:
+    @profiled
+    async def create(self,
+        user: NewUser,
+        session: AsyncSession,
+        ids: Optional[IdAllocator] = None
+    ) -> ExistsUser:
         """
         ## Создаёт пользователя.
 
         Args:
             user: Pydantic-модель с данными пользователя.
             session: Асинхронная сессия БД.
+            ids: Пул id на стороне клиента (`id_allocator`): id берётся из заранее
+                зарезервированного блока, а не из последовательности при вставке.
+                Пул должен относиться к той же БД, что и `session`.
 
         Returns:
             ExistsUser: Созданный пользователь с заполненным `id`.
         """
         stmt = (
             insert(self.model)
-            .values(**user.model_dump())
+            .values(**await self._insert_values(user, session, ids))
             .returning(self.model)
         )
         res = await session.execute(stmt)
         await session.flush()
         obj = res.scalar_one()
-        return ExistsUser(**self._return_dict_from_obj(obj, self.model))
+        return self._to_schema(obj, ExistsUser)
 
+    @profiled
     async def get_by_email(self,
         email: str,
-        session: AsyncSession
-    ) -> Optional[ExistsUser]:
+        session: AsyncSession,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[ExistsUser | Row]:
         """
         ## Возвращает пользователя по email или None.
 
         Args:
             email: Email пользователя для поиска.
             session: Асинхронная сессия БД.
+            fields: Выбрать только эти колонки и вернуть `Row`
+                (`fields=('id',)` — без ORM-объекта и лишних колонок).
+
+        Raises:
+            ValueError: Если `fields` содержит неизвестные колонки.
 
         Returns:
-            ExistsUser | None: Найденный пользователь или `None`, если не найден.
+            ExistsUser | Row | None: Найденный пользователь (`Row` при `fields`)
+                или `None`, если не найден.
         """
+        if fields is not None:
+            query = select(*self._projection(fields)).where(self.model.email == email)
+            rows = await self._fetch_rows(session, query)
+            return rows[0] if rows else None
+
         query = select(self.model).where(self.model.email == email)
         obj = await self._fetch_one(session, query)
         if not obj:
             return None
-        return ExistsUser(**self._return_dict_from_obj(obj, self.model))
+        return self._to_schema(obj, ExistsUser)
 
+    @profiled
     async def hide(self, user_id: int, session: AsyncSession) -> bool:
         """
         ## Скрывает пользователя (мягкое удаление).
@@ -87,6 +112,7 @@ class UserDAO(BaseDAO):
         await session.flush()
         return True
 
+    @profiled
     async def unhide(self, user_id: int, session: AsyncSession) -> bool:
         """
         ## Восстанавливает скрытого пользователя.
@@ -106,6 +132,56 @@ class UserDAO(BaseDAO):
         await session.flush()
         return True
 
+    @profiled
+    async def hide_cascade(self,
+        user_id: int,
+        session: AsyncSession,
+        chunk_size: Optional[int] = None
+    ) -> CascadeResult:
+        """
+        ## Скрывает пользователя и все его заказы за один запрос.
+
+        Args:
+            user_id: ID пользователя.
+            session: Асинхронная сессия БД.
+            chunk_size: Размер пачки заказов. Если задан, заказы скрываются
+                пачками, каждая в отдельной сессии со своим коммитом; родитель
+                меняется в `session` (коммитит вызывающий код).
+
+        Returns:
+            CascadeResult: Найден ли пользователь и сколько заказов скрыто.
+        """
+        return await self._set_hidden_cascade(
+            user_id, True, Order.user_id, session, chunk_size
+        )
+
+    @profiled
+    async def unhide_cascade(self,
+        user_id: int,
+        session: AsyncSession,
+        chunk_size: Optional[int] = None
+    ) -> CascadeResult:
+        """
+        ## Восстанавливает пользователя и его заказы за один запрос.
+
+        Восстанавливаются только заказы, скрытые каскадом (`hide_cascade()`);
+        заказы, скрытые отдельно или чей товар скрыт, остаются скрытыми.
+
+        Args:
+            user_id: ID пользователя.
+            session: Асинхронная сессия БД.
+            chunk_size: Размер пачки заказов. Если задан, заказы восстанавливаются
+                пачками, каждая в отдельной сессии со своим коммитом; родитель
+                меняется в `session` (коммитит вызывающий код).
+
+        Returns:
+            CascadeResult: Найден ли пользователь и сколько заказов восстановлено.
+        """
+        return await self._set_hidden_cascade(
+            user_id, False, Order.user_id, session, chunk_size,
+            ~exists().where(Product.id == Order.product_id, Product.is_hidden),
+        )
+
 
 # Создание экземпляра DAO для пользователей
 user_dao = UserDAO()
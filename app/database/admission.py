@@ -0,0 +1,174 @@
+"""Контроль допуска к пулу соединений для примера SQLAlchemyExample.
+
+Ограничивает число одновременно открытых сессий, держит ограниченную
+очередь ожидающих с приоритетами и быстро отказывает, когда очередь
+переполнена или истёк дедлайн вызова. Так при деградации БД растёт
+число отказов, а не задержка у всех вызывающих.
+"""
+
+from asyncio import Future, TimeoutError, get_running_loop, wait_for
+from enum import IntEnum
+from heapq import heappop, heappush
+from itertools import count
+from typing import Optional
+
+
+
+class Priority(IntEnum):
+    """
+    ## Классы приоритета при допуске к БД (меньше — важнее).
+
+    Attributes:
+        CRITICAL: Оформление заказа и прочие пишущие операции.
+        DEFAULT: Обычные чтения.
+        BACKGROUND: Аналитика, отчёты, фоновые задачи.
+    """
+    CRITICAL = 0
+    DEFAULT = 1
+    BACKGROUND = 2
+
+
+class AdmissionRejectedError(RuntimeError):
+    """
+    ## Запрос к БД отклонён контролем допуска.
+
+    Attributes:
+        priority: Приоритет отклонённого вызова.
+        reason: Причина: `queue_full`, `deadline` или `preempted`.
+    """
+
+    def __init__(self, priority: Priority, reason: str) -> None:
+        super().__init__(f'db admission rejected ({priority.name}): {reason}')
+        self.priority = priority
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    ## Ограниченная приоритетная очередь допуска к сессиям БД.
+
+    Одновременно работает не больше `max_concurrency` сессий. Остальные ждут
+    в очереди длиной не больше `max_queue`; при переполнении новый вызов
+    вытесняет наименее приоритетного ожидающего либо сразу отклоняется.
+
+    Attributes:
+        max_concurrency: Максимум одновременно выданных разрешений.
+        max_queue: Максимальная длина очереди ожидания.
+        active: Текущее число выданных разрешений.
+        shed: Счётчики отказов по приоритетам.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int) -> None:
+        """
+        ## Инициализирует `AdmissionController`.
+
+        Args:
+            max_concurrency: Максимум одновременно открытых сессий.
+            max_queue: Максимальная длина очереди ожидания.
+
+        Raises:
+            ValueError: Если `max_concurrency` меньше 1 или `max_queue` отрицательный.
+        """
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be >= 1')
+        if max_queue < 0:
+            raise ValueError('max_queue must be >= 0')
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.shed: dict[Priority, int] = {p: 0 for p in Priority}
+        self._waiters: list[tuple[int, int, Future]] = []
+        self._seq = count()
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        ## Число вызовов, ожидающих допуска.
+        """
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    def stats(self) -> dict[str, int]:
+        """
+        ## Снимок метрик для логов и мониторинга.
+
+        Returns:
+            dict[str, int]: `active`, `queue_depth` и `shed_<priority>` по классам.
+        """
+        data = {'active': self.active, 'queue_depth': self.queue_depth}
+        data.update({f'shed_{p.name.lower()}': n for p, n in self.shed.items()})
+        return data
+
+    def _reject(self, priority: Priority, reason: str) -> AdmissionRejectedError:
+        self.shed[priority] += 1
+        return AdmissionRejectedError(priority, reason)
+
+    def _preempt_lowest(self, priority: Priority) -> bool:
+        """
+        ## Вытесняет самого неприоритетного ожидающего, если он ниже `priority`.
+        """
+        pending = [w for w in self._waiters if not w[2].done()]
+        if not pending:
+            return False
+        victim = max(pending, key=lambda w: (w[0], w[1]))
+        if victim[0] <= priority:
+            return False
+        victim_priority = Priority(victim[0])
+        victim[2].set_exception(self._reject(victim_priority, 'preempted'))
+        return True
+
+    async def acquire(self,
+        priority: Priority = Priority.DEFAULT,
+        timeout: Optional[float] = None
+    ) -> None:
+        """
+        ## Получает разрешение на работу с БД.
+
+        Args:
+            priority: Класс приоритета вызова.
+            timeout: Сколько секунд можно ждать в очереди (`None` — без ограничения).
+
+        Raises:
+            AdmissionRejectedError: Если очередь переполнена, вызов вытеснен
+                более приоритетным или истёк `timeout`.
+        """
+        if self.active < self.max_concurrency and not self.queue_depth:
+            self.active += 1
+            return
+
+        if self.queue_depth >= self.max_queue and not self._preempt_lowest(priority):
+            raise self._reject(priority, 'queue_full')
+
+        fut: Future = get_running_loop().create_future()
+        heappush(self._waiters, (int(priority), next(self._seq), fut))
+        try:
+            await wait_for(fut, timeout)
+        except TimeoutError:
+            # Разрешение могло быть выдано в той же итерации цикла, что и таймаут
+            self._return_granted(fut)
+            raise self._reject(priority, 'deadline') from None
+        except BaseException:
+            # Разрешение могло быть выдано одновременно с отменой — вернём его
+            self._return_granted(fut)
+            raise
+
+    def _return_granted(self, fut: Future) -> None:
+        """
+        ## Возвращает разрешение, выданное ожидающему, который уже не будет работать.
+        """
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            self.release()
+
+    def release(self) -> None:
+        """
+        ## Возвращает разрешение и передаёт его следующему по приоритету.
+        """
+        while self._waiters:
+            _, _, fut = heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+
+# Публичный API модуля
+__all__ = ['AdmissionController', 'AdmissionRejectedError', 'Priority']
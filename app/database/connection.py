@@ -1,12 +1,21 @@
 """Асинхронное подключение к БД для примера SQLAlchemyExample."""
 
-from typing import Optional
+from asyncio import Semaphore, TaskGroup
+from time import monotonic
+from typing import Any, Awaitable, Callable, Optional, TypeVar
 from contextlib import asynccontextmanager
 
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession, AsyncEngine
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncConnection, AsyncSession, AsyncEngine
 
 from app.config.config_reader import env_config
+from app.database.admission import AdmissionController, AdmissionRejectedError, Priority
+from app.database.drivers import DriverCapabilities, get_driver
+
+
+
+T = TypeVar('T')
 
 
 
@@ -20,22 +29,34 @@ class DbConnection:
     
     Attributes:
         engine: Глобальный асинхронный движок SQLAlchemy (singleton).
+        admission: Контроль допуска к сессиям (`None` — без ограничений).
+        driver: Драйвер-специфичные возможности (COPY, LISTEN).
         _sessionmaker: Фабрика для создания асинхронных сессий.
+        _leaders: Ограничение числа ведущих транзакций `gather_in_sessions(consistent=True)`
+            (на одну меньше ёмкости): хотя бы одно разрешение всегда остаётся их вызовам.
     """
 
-    def __init__(self, engine: AsyncEngine) -> None:
+    def __init__(self,
+        engine: AsyncEngine,
+        admission: Optional[AdmissionController] = None
+    ) -> None:
         """
         ## Инициализирует экземпляр `DbConnection`.
 
         Args:
             engine: Необязательный AsyncEngine. Если не указан, используется глобальный _engine.
+            admission: Необязательный контроль допуска к сессиям.
         """
         self.engine: AsyncEngine = engine
+        self.admission: Optional[AdmissionController] = admission
+        self.driver: DriverCapabilities = get_driver(engine.dialect.driver)
         self._sessionmaker: async_sessionmaker[AsyncSession] = async_sessionmaker(
             bind=self.engine,
             class_=AsyncSession,
             expire_on_commit=False,
         )
+        capacity = admission.max_concurrency if admission is not None else engine.pool.size()
+        self._leaders = Semaphore(max(1, capacity - 1))
 
     async def db_close(self, engine: Optional[AsyncEngine] = None) -> None:
         """
@@ -49,40 +70,228 @@ class DbConnection:
         if engine is not None:
             await engine.dispose()
 
+    @staticmethod
+    def _apply_deadline(session: AsyncSession, deadline: float) -> None:
+        """
+        ## Пробрасывает дедлайн сессии в PostgreSQL как `statement_timeout`.
+
+        В начале каждой транзакции сессии выполняется `SET LOCAL statement_timeout`
+        с оставшимся до дедлайна временем, поэтому настройка не «утекает» в пул.
+
+        Args:
+            session: Асинхронная сессия БД.
+            deadline: Момент `time.monotonic()`, после которого запросы прерываются.
+        """
+        def set_timeout(sync_session, transaction, connection) -> None:
+            remaining_ms = max(1, int((deadline - monotonic()) * 1000))
+            connection.exec_driver_sql(f'SET LOCAL statement_timeout = {remaining_ms}')
+
+        event.listen(session.sync_session, 'after_begin', set_timeout)
+
     @asynccontextmanager
-    async def get_session(self):
+    async def get_session(self,
+        priority: Priority = Priority.DEFAULT,
+        timeout: Optional[float] = env_config.DB_DEFAULT_DEADLINE
+    ):
         """
         ## Контекстный менеджер для получения асинхронной сессии.
 
+        Args:
+            priority: Класс приоритета при допуске (`CRITICAL` для оформления
+                заказа, `BACKGROUND` для аналитики).
+            timeout: Дедлайн всей сессии в секундах: ожидание в очереди допуска
+                плюс `statement_timeout` на запросы. `None` — без дедлайна.
+
         Yields:
             AsyncSession: Асинхронная сессия БД.
 
         Raises:
             RuntimeError: Если sessionmaker не инициализирован.
+            AdmissionRejectedError: Если очередь допуска переполнена
+                или дедлайн истёк до получения сессии.
             Exception: Пробрасывает любые ошибки работы с сессией
                 после отката транзакции.
         """
         if not self._sessionmaker:
             raise RuntimeError('Session manager not initialized')
 
-        async with self._sessionmaker() as session:
+        deadline = monotonic() + timeout if timeout is not None else None
+        if self.admission is not None:
+            await self.admission.acquire(priority, timeout)
+
+        try:
+            async with self._sessionmaker() as session:
+                if deadline is not None:
+                    self._apply_deadline(session, deadline)
+                try:
+                    session = session  # type: ignore[assignment]
+                    yield session
+                except Exception:
+                    await session.rollback()
+                    raise
+                finally:
+                    await session.close()
+        finally:
+            if self.admission is not None:
+                self.admission.release()
+
+    async def open_listener(self,
+        timeout: Optional[float] = env_config.DB_DEFAULT_DEADLINE
+    ) -> AsyncConnection:
+        """
+        ## Открывает долгоживущее соединение для `LISTEN`.
+
+        Соединение берётся из того же пула, что и сессии, поэтому на всё
+        время жизни занимает разрешение контроля допуска (`Priority.CRITICAL`):
+        иначе слушатели вместе с сессиями превысили бы размер пула.
+        Закрывается через `close_listener()`.
+
+        Args:
+            timeout: Сколько секунд можно ждать разрешения (`None` — без ограничения).
+
+        Raises:
+            AdmissionRejectedError: Если очередь допуска переполнена или истёк `timeout`.
+
+        Returns:
+            AsyncConnection: Соединение SQLAlchemy вне транзакции.
+        """
+        if self.admission is not None:
+            await self.admission.acquire(Priority.CRITICAL, timeout)
+        try:
+            return await self.engine.connect()
+        except BaseException:
+            if self.admission is not None:
+                self.admission.release()
+            raise
+
+    async def close_listener(self, conn: AsyncConnection) -> None:
+        """
+        ## Закрывает соединение из `open_listener()` и возвращает разрешение.
+
+        Args:
+            conn: Соединение, открытое `open_listener()`.
+        """
+        try:
+            await conn.close()
+        finally:
+            if self.admission is not None:
+                self.admission.release()
+
+    async def gather_in_sessions(self,
+        *calls: Callable[[AsyncSession], Awaitable[Any]],
+        consistent: bool = False,
+        priority: Priority = Priority.DEFAULT,
+        limit: Optional[int] = None
+    ) -> list[Any]:
+        """
+        ## Выполняет независимые вызовы DAO параллельно, каждый в своей сессии.
+
+        Одна `AsyncSession` не умеет выполнять запросы параллельно, поэтому
+        каждый вызов получает отдельную сессию из пула. Число одновременно
+        открытых сессий ограничено размером пула (или `limit`). При первой
+        ошибке остальные вызовы отменяются.
+
+        При `consistent=True` все вызовы видят один и тот же снимок данных:
+        ведущая транзакция `REPEATABLE READ` экспортирует снимок
+        (`pg_export_snapshot()`), а остальные импортируют его через
+        `SET TRANSACTION SNAPSHOT`. Ведущая транзакция занимает ещё одно соединение,
+        поэтому одновременно открыто не больше `ёмкость - 1` ведущих транзакций:
+        иначе они заняли бы все разрешения, а их вызовы ждали бы допуска вечно.
+
+        Args:
+            *calls: Корутины-фабрики `(session) -> ...`, например
+                `lambda s: user_dao.get_by_email(email, session=s)`.
+            consistent: Выполнить все вызовы на общем снимке данных.
+            priority: Класс приоритета при допуске.
+            limit: Максимум одновременных сессий (по умолчанию — ёмкость пула).
+
+        Raises:
+            ValueError: Если для `consistent=True` доступно меньше двух сессий.
+            Exception: Первая ошибка среди вызовов (остальные отменяются).
+
+        Returns:
+            list[Any]: Результаты в порядке `calls`.
+        """
+        if limit is None:
+            limit = (
+                self.admission.max_concurrency if self.admission is not None
+                else self.engine.pool.size()
+            )
+        if consistent and limit < 2:
+            raise ValueError('consistent mode needs at least 2 concurrent sessions')
+        # Ведущая транзакция тоже держит соединение
+        semaphore = Semaphore(limit - 1 if consistent else limit)
+
+        async def run(call: Callable[[AsyncSession], Awaitable[T]], snapshot: Optional[str]) -> T:
+            async with semaphore:
+                async with self.get_session(priority) as session:
+                    if snapshot is not None:
+                        await session.connection(
+                            execution_options={'isolation_level': 'REPEATABLE READ'}
+                        )
+                        await session.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot}'"))
+                    return await call(session)
+
+        async def run_all(snapshot: Optional[str]) -> list[Any]:
             try:
-                session = session  # type: ignore[assignment]
-                yield session
-            except Exception:
-                await session.rollback()
-                raise
-            finally:
-                await session.close()
+                async with TaskGroup() as group:
+                    tasks = [group.create_task(run(call, snapshot)) for call in calls]
+            except ExceptionGroup as errors:
+                raise errors.exceptions[0]
+            return [task.result() for task in tasks]
+
+        if not consistent:
+            return await run_all(None)
+
+        async with self._leaders:
+            async with self.get_session(priority) as leader:
+                await leader.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+                snapshot = (await leader.execute(text('SELECT pg_export_snapshot()'))).scalar_one()
+                return await run_all(snapshot)
+
+def build_engine(
+    driver: str = env_config.DB_DRIVER,
+    database: Optional[str] = None
+) -> AsyncEngine:
+    """
+    ## Создаёт AsyncEngine для указанного драйвера с настройками из `.env`.
+
+    Args:
+        driver: Имя драйвера (`asyncpg` или `psycopg`).
+        database: Имя базы данных (по умолчанию `POSTGRES_DB`).
+
+    Returns:
+        AsyncEngine: Асинхронный движок SQLAlchemy.
+    """
+    return create_async_engine(
+        url=env_config.database_url(driver, database),
+        echo=env_config.DB_ECHO,
+        pool_size=env_config.DB_POOL_SIZE,
+        max_overflow=env_config.DB_MAX_OVERFLOW,
+        connect_args=get_driver(driver).connect_args(),
+    )
+
 
 # Глобальный Engine (Singleton) - создаётся один раз при импорте модуля
-_engine: AsyncEngine = create_async_engine(
-    url=env_config.DATABASE_URL_asyncpg,
-    echo=env_config.DB_ECHO,
+_engine: AsyncEngine = build_engine()
+
+# Контроль допуска: не больше сессий, чем соединений в пуле
+_admission = AdmissionController(
+    max_concurrency=(
+        env_config.DB_ADMISSION_MAX_CONCURRENCY
+        or env_config.DB_POOL_SIZE + env_config.DB_MAX_OVERFLOW
+    ),
+    max_queue=env_config.DB_ADMISSION_MAX_QUEUE,
 )
 
 # Глобальный экземпляр DbConnection для использования в приложении
-db_connection = DbConnection(_engine)
+db_connection = DbConnection(_engine, _admission)
 
 # Публичный API модуля
-__all__ = ['db_connection', 'DbConnection']
\ No newline at end of file
+__all__ = [
+    'db_connection',
+    'DbConnection',
+    'build_engine',
+    'AdmissionRejectedError',
+    'Priority',
+]
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""Драйверы PostgreSQL для примера SQLAlchemyExample.
+
+Драйвер выбирается настройкой `DB_DRIVER` (`asyncpg` или `psycopg`).
+Всё, что SQLAlchemy не абстрагирует (COPY, LISTEN, подготовленные
+выражения), спрятано за небольшим интерфейсом
+`DriverCapabilities`, чтобы остальной код не зависел от драйвера.
+"""
+
+from abc import ABC, abstractmethod
+from asyncio import CancelledError, Task, create_task
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.config.config_reader import env_config
+
+
+
+# Колбэк уведомления: (channel, payload)
+NotifyCallback = Callable[[str, str], None]
+
+
+
+class DriverCapabilities(ABC):
+    """
+    ## Базовый интерфейс драйвер-специфичных возможностей.
+
+    Attributes:
+        name: Имя драйвера в URL SQLAlchemy (`postgresql+<name>`).
+    """
+    name: str = ''
+
+    def connect_args(self) -> dict[str, Any]:
+        """
+        ## Аргументы подключения драйвера для `create_async_engine`.
+        """
+        return {}
+
+    @staticmethod
+    async def raw_connection(conn: AsyncSession | AsyncConnection) -> Any:
+        """
+        ## Возвращает «сырое» соединение драйвера для сессии или соединения.
+
+        Args:
+            conn: Асинхронная сессия или соединение SQLAlchemy.
+
+        Returns:
+            Any: `asyncpg.Connection` или `psycopg.AsyncConnection`.
+        """
+        if isinstance(conn, AsyncSession):
+            conn = await conn.connection()
+        raw = await conn.get_raw_connection()
+        return raw.driver_connection
+
+    @abstractmethod
+    async def copy_records(self,
+        session: AsyncSession,
+        table: str,
+        columns: Sequence[str],
+        records: Iterable[Sequence[Any]]
+    ) -> None:
+        """
+        ## Загружает строки в таблицу через `COPY ... FROM STDIN`.
+
+        Args:
+            session: Асинхронная сессия БД (COPY идёт в её транзакции).
+            table: Имя таблицы.
+            columns: Имена колонок в порядке значений записи.
+            records: Строки для загрузки.
+        """
+
+    @abstractmethod
+    async def listen(self, raw: Any, channel: str, callback: NotifyCallback) -> None:
+        """
+        ## Подписывает «сырое» соединение на канал `LISTEN`.
+        """
+
+    @abstractmethod
+    async def unlisten(self, raw: Any, channel: str, callback: NotifyCallback) -> None:
+        """
+        ## Отписывает соединение от канала.
+        """
+
+
+class AsyncpgCapabilities(DriverCapabilities):
+    """
+    ## Возможности драйвера `asyncpg`.
+
+    Подготовленные выражения кешируются драйвером автоматически,
+    COPY — `copy_records_to_table`, уведомления — `add_listener`.
+    """
+    name = 'asyncpg'
+
+    def __init__(self) -> None:
+        self._listeners: dict[tuple[str, NotifyCallback], Callable] = {}
+
+    async def copy_records(self, session, table, columns, records) -> None:
+        raw = await self.raw_connection(session)
+        await raw.copy_records_to_table(table, records=records, columns=list(columns))
+
+    async def listen(self, raw, channel, callback) -> None:
+        def handler(connection, pid, channel_, payload) -> None:
+            callback(channel_, payload)
+        self._listeners[(channel, callback)] = handler
+        await raw.add_listener(channel, handler)
+
+    async def unlisten(self, raw, channel, callback) -> None:
+        handler = self._listeners.pop((channel, callback), None)
+        if handler is not None:
+            await raw.remove_listener(channel, handler)
+
+
+class PsycopgCapabilities(DriverCapabilities):
+    """
+    ## Возможности драйвера `psycopg` (3.x, асинхронный режим).
+
+    Параметры связываются на стороне сервера, запрос готовится после
+    `prepare_threshold` выполнений; `executemany` драйвер сам выполняет
+    в pipeline-режиме.
+    Для `LISTEN` соединение переводится в autocommit, уведомления читает
+    фоновая задача `notifies()`.
+    """
+    name = 'psycopg'
+
+    def __init__(self, prepare_threshold: Optional[int] = 5) -> None:
+        self.prepare_threshold = prepare_threshold
+        self._listeners: dict[tuple[str, NotifyCallback], Task] = {}
+
+    def connect_args(self) -> dict[str, Any]:
+        return {'prepare_threshold': self.prepare_threshold}
+
+    async def copy_records(self, session, table, columns, records) -> None:
+        raw = await self.raw_connection(session)
+        sql = f'COPY {table} ({", ".join(columns)}) FROM STDIN'
+        async with raw.cursor() as cur:
+            async with cur.copy(sql) as copy:
+                for record in records:
+                    await copy.write_row(record)
+
+    async def listen(self, raw, channel, callback) -> None:
+        await raw.set_autocommit(True)
+        await raw.execute(f'LISTEN "{channel}"')
+
+        async def consume() -> None:
+            async for notify in raw.notifies():
+                callback(notify.channel, notify.payload)
+
+        self._listeners[(channel, callback)] = create_task(consume())
+
+    async def unlisten(self, raw, channel, callback) -> None:
+        task = self._listeners.pop((channel, callback), None)
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except CancelledError:
+            pass
+        await raw.execute(f'UNLISTEN "{channel}"')
+        await raw.set_autocommit(False)
+
+
+def get_driver(name: str = env_config.DB_DRIVER) -> DriverCapabilities:
+    """
+    ## Возвращает реализацию `DriverCapabilities` по имени драйвера.
+
+    Args:
+        name: `asyncpg` или `psycopg`.
+
+    Raises:
+        ValueError: Если драйвер не поддерживается.
+
+    Returns:
+        DriverCapabilities: Возможности выбранного драйвера.
+    """
+    if name == AsyncpgCapabilities.name:
+        return AsyncpgCapabilities()
+    if name == PsycopgCapabilities.name:
+        return PsycopgCapabilities(env_config.DB_PSYCOPG_PREPARE_THRESHOLD)
+    raise ValueError(f'unsupported DB driver: {name}')
+
+
+# Публичный API модуля
+__all__ = [
+    'AsyncpgCapabilities',
+    'DriverCapabilities',
+    'PsycopgCapabilities',
+    'get_driver',
+]
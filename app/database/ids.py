@@ -0,0 +1,130 @@
+"""Выдача id на стороне клиента блоками из последовательностей (hi/lo).
+
+Обычный `create` узнаёт id только из `RETURNING`, поэтому вставки нельзя
+отправлять конвейером, а связанные строки (пользователь -> заказ) — одним
+COPY. `IdAllocator` резервирует у последовательности таблицы сразу блок id:
+
+    SELECT nextval(pg_get_serial_sequence('orders', 'id'))
+    FROM generate_series(1, :block_size)
+
+и раздаёт их внутри процесса без обращений к БД. Шаг последовательности
+не меняется, поэтому обычные `INSERT` и шардированные последовательности
+(`INCREMENT BY SHARD_ID_SPACE`) продолжают работать; id блока могут идти
+не подряд, если параллельно вставляют другие процессы.
+
+Последовательности не транзакционны: неиспользованные и откатившиеся id
+остаются «дырами», как и при обычных вставках. Поэтому блок можно
+резервировать и в транзакции вызывающего кода (`session=`): откат
+не вернёт id, а вторая сессия из пула не понадобится.
+"""
+
+from asyncio import Lock
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.config_reader import env_config
+from app.database.admission import Priority
+from app.database.connection import DbConnection, db_connection
+
+
+
+_RESERVE = text("""
+    SELECT nextval(pg_get_serial_sequence(:table, 'id'))
+    FROM generate_series(1, :count)
+""")
+
+
+
+class IdAllocator:
+    """
+    ## Пул заранее зарезервированных id по таблицам.
+
+    Attributes:
+        db: Подключение, чьи последовательности используются.
+        block_size: Сколько id резервируется за одно обращение к БД.
+    """
+
+    def __init__(self, db: DbConnection, block_size: int = env_config.ID_BLOCK_SIZE) -> None:
+        """
+        ## Инициализирует `IdAllocator`.
+
+        Raises:
+            ValueError: Если `block_size` меньше 1.
+        """
+        if block_size < 1:
+            raise ValueError('block_size must be >= 1')
+        self.db = db
+        self.block_size = block_size
+        self._pools: dict[str, deque[int]] = {}
+        self._locks: dict[str, Lock] = {}
+
+    async def _reserve(self,
+        table: str,
+        count: int,
+        session: Optional[AsyncSession] = None
+    ) -> list[int]:
+        """
+        ## Резервирует `count` id у последовательности таблицы.
+
+        С `session` запрос идёт в её транзакции, иначе — в отдельной сессии.
+        """
+        if session is not None:
+            res = await session.execute(_RESERVE, {'table': table, 'count': count})
+            return list(res.scalars())
+        async with self.db.get_session(Priority.CRITICAL) as own:
+            res = await own.execute(_RESERVE, {'table': table, 'count': count})
+            ids = list(res.scalars())
+            await own.commit()
+        return ids
+
+    async def allocate(self,
+        table: str,
+        count: int = 1,
+        session: Optional[AsyncSession] = None
+    ) -> list[int]:
+        """
+        ## Выдаёт `count` id для таблицы.
+
+        Пока в пуле есть id, вызов не обращается к БД. Пополняет пул
+        одна задача; остальные ждут её, а не резервируют блоки параллельно.
+        Пока идёт резервирование, вызовы без блокировки могут разобрать
+        пул, поэтому он пополняется до тех пор, пока id не хватит, и id
+        забираются до освобождения блокировки.
+
+        Вызывающий код, который уже держит сессию (и место в контроле
+        допуска), передаёт её в `session`: тогда пул пополняется на её
+        соединении, и вызов не ждёт вторую сессию, которую могут занимать
+        такие же вызовы.
+
+        Args:
+            table: Имя таблицы (`users`, `products`, `orders`).
+            count: Сколько id нужно.
+            session: Сессия `self.db` для резервирования (`None` — отдельная сессия).
+
+        Returns:
+            list[int]: Уникальные id (порядок возрастания не гарантируется).
+        """
+        pool = self._pools.setdefault(table, deque())
+        if len(pool) >= count:
+            return [pool.popleft() for _ in range(count)]
+        async with self._locks.setdefault(table, Lock()):
+            while len(pool) < count:
+                blocks = -(-(count - len(pool)) // self.block_size)
+                pool.extend(await self._reserve(table, blocks * self.block_size, session))
+            return [pool.popleft() for _ in range(count)]
+
+    async def next_id(self, table: str, session: Optional[AsyncSession] = None) -> int:
+        """
+        ## Выдаёт один id для таблицы (см. `allocate`).
+        """
+        return (await self.allocate(table, session=session))[0]
+
+
+# Глобальный пул id для основного подключения
+id_allocator = IdAllocator(db_connection)
+
+# Публичный API модуля
+__all__ = ['IdAllocator', 'id_allocator']
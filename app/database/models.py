@@ -1,7 +1,8 @@
 """SQLAlchemy-модели для абстрактного примера User / Product / Order."""
 
 from sqlalchemy.orm import DeclarativeBase, relationship
-from sqlalchemy import Column, BigInteger, Integer, String, ForeignKey, Index, Boolean
+from sqlalchemy import Column, BigInteger, Integer, String, Text, ForeignKey, Index, Boolean, DateTime, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 
 
 class Base(DeclarativeBase):
@@ -72,6 +73,9 @@ class Order(Base):
         product_id (int): Внешний ключ на товар.
         quantity (int): Количество единиц товара.
         is_hidden (bool): Флаг мягкого удаления (скрытия записи).
+        hidden_at (datetime | None): Когда заказ скрыт (для архивации).
+        hidden_by_cascade (bool): Скрыт каскадно вместе с пользователем / товаром
+            (`unhide_cascade()` восстанавливает только такие заказы).
     """
 
     __tablename__ = 'orders'
@@ -81,6 +85,8 @@ class Order(Base):
     product_id = Column(BigInteger, ForeignKey('products.id'), nullable=False, index=True)
     quantity = Column(Integer, nullable=False, default=1)
     is_hidden = Column(Boolean, nullable=False, default=False, index=True)
+    hidden_at = Column(DateTime(timezone=True), nullable=True)
+    hidden_by_cascade = Column(Boolean, nullable=False, default=False, server_default=text('false'))
 
     user = relationship('User', back_populates='orders')
     product = relationship('Product', back_populates='orders')
@@ -93,7 +99,78 @@ class Order(Base):
     )
 
 
+class OrderArchive(Base):
+    """
+    ## Архив скрытых заказов («холодная» таблица).
+
+    Сюда переносятся заказы, скрытые дольше срока хранения, чтобы таблица
+    `orders` и её индексы оставались небольшими. Внешних ключей нет —
+    архив только читается.
+
+    Attributes:
+        id (int): Первичный ключ (тот же, что был в `orders`).
+        user_id (int): ID пользователя.
+        product_id (int): ID товара.
+        quantity (int): Количество единиц товара.
+        is_hidden (bool): Флаг мягкого удаления на момент архивации.
+        hidden_at (datetime | None): Когда заказ был скрыт.
+        archived_at (datetime): Когда заказ перенесён в архив.
+    """
+
+    __tablename__ = 'orders_archive'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    user_id = Column(BigInteger, nullable=False)
+    product_id = Column(BigInteger, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    is_hidden = Column(Boolean, nullable=False)
+    hidden_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_order_archive_user_id', 'user_id'),
+    )
+
+
+class Job(Base):
+    """
+    ## Задача фоновой очереди (`app/modules/jobs`).
+
+    Задача доступна воркерам, пока `status = 'ready'` и `run_at` наступил.
+    Взятая задача сдвигает `run_at` на таймаут видимости: если воркер
+    не подтвердит её вовремя, задачу возьмёт другой воркер.
+
+    Attributes:
+        id (int): Первичный ключ.
+        queue (str): Имя очереди.
+        payload (dict): Данные задачи (JSONB).
+        status (str): `ready` — ждёт выполнения, `dead` — исчерпаны попытки.
+        attempts (int): Сколько раз задача выдавалась воркеру.
+        max_attempts (int): После скольких попыток задача уходит в `dead`.
+        run_at (datetime): Когда задача станет доступной.
+        last_error (str | None): Ошибка последней попытки.
+        created_at (datetime): Когда задача поставлена в очередь.
+    """
+
+    __tablename__ = 'jobs'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    queue = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    status = Column(String(16), nullable=False, server_default='ready')
+    attempts = Column(Integer, nullable=False, server_default=text('0'))
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # Частичный индекс только по ждущим задачам: выполненные удаляются, `dead` в него не попадают
+    __table_args__ = (
+        Index('idx_job_ready', 'queue', 'run_at', postgresql_where=text("status = 'ready'")),
+    )
+
+
 metadata_obj = Base.metadata
 
 # Публичный API модуля
-__all__ = ['Base', 'User', 'Product', 'Order', 'metadata_obj']
\ No newline at end of file
+__all__ = ['Base', 'User', 'Product', 'Order', 'OrderArchive', 'Job', 'metadata_obj']
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""Горизонтальное шардирование пользователей и заказов.
+
+Схема размещения:
+    - пользователь попадает на шард `crc32(email) % N` — так `get_by_email`
+      сразу знает шард без таблицы соответствий;
+    - `users.id` и `orders.id` генерируются последовательностями шарда
+      с шагом `SHARD_ID_SPACE` и стартом `SHARD_ID_SPACE + shard`, поэтому
+      `id % SHARD_ID_SPACE` — номер шарда, а id уникальны глобально;
+    - заказы живут на шарде своего пользователя (`orders.user_id`),
+      внешний ключ на `users` остаётся локальным;
+    - `products` — справочная таблица, реплицированная на все шарды
+      (внешний ключ `orders.product_id` тоже локальный).
+
+Для проверки достаточно нескольких баз в одном экземпляре PostgreSQL:
+`POSTGRES_SHARDS=shard_0,shard_1,shard_2`.
+"""
+
+from asyncio import TaskGroup
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+from zlib import crc32
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.config_reader import env_config
+from app.database.admission import Priority
+from app.database.connection import DbConnection, build_engine
+from app.database.models import metadata_obj
+
+
+
+# Ёмкость пространства шардов: id % SHARD_ID_SPACE — номер шарда
+SHARD_ID_SPACE = 1024
+
+# Таблицы, id которых кодируют номер шарда
+SHARDED_TABLES = ('users', 'orders')
+
+T = TypeVar('T')
+
+
+
+class ShardedDbConnection:
+    """
+    ## Набор `DbConnection` по шардам с маршрутизацией по ключу шарда.
+
+    Attributes:
+        shards: Подключения к шардам (индекс — номер шарда).
+    """
+
+    def __init__(self, shards: list[DbConnection]) -> None:
+        """
+        ## Инициализирует `ShardedDbConnection`.
+
+        Args:
+            shards: Подключения к шардам в порядке номеров.
+
+        Raises:
+            ValueError: Если шардов нет или больше `SHARD_ID_SPACE`.
+        """
+        if not shards:
+            raise ValueError('at least one shard is required')
+        if len(shards) > SHARD_ID_SPACE:
+            raise ValueError(f'at most {SHARD_ID_SPACE} shards are supported')
+        self.shards = shards
+        self._next_replica = 0
+
+    @classmethod
+    def from_databases(cls, databases: list[str]) -> 'ShardedDbConnection':
+        """
+        ## Создаёт шарды по именам баз на сервере из `.env`.
+
+        Args:
+            databases: Имена баз данных шардов.
+
+        Returns:
+            ShardedDbConnection: Подключение ко всем шардам.
+        """
+        return cls([
+            DbConnection(build_engine(database=database))
+            for database in databases
+        ])
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def shard_for_email(self, email: str) -> int:
+        """
+        ## Номер шарда пользователя по email.
+        """
+        return crc32(email.lower().encode('utf-8')) % len(self.shards)
+
+    def shard_for_id(self, entity_id: int) -> int:
+        """
+        ## Номер шарда по `users.id`, `orders.id` или `orders.user_id`.
+
+        Raises:
+            ValueError: Если id указывает на несуществующий шард.
+        """
+        shard = entity_id % SHARD_ID_SPACE
+        if shard >= len(self.shards):
+            raise ValueError(f'id {entity_id} belongs to unknown shard {shard}')
+        return shard
+
+    def replica(self) -> DbConnection:
+        """
+        ## Следующий шард по кругу — для чтения реплицированных таблиц.
+        """
+        shard = self.shards[self._next_replica % len(self.shards)]
+        self._next_replica += 1
+        return shard
+
+    @asynccontextmanager
+    async def session_for_email(self,
+        email: str,
+        priority: Priority = Priority.DEFAULT
+    ) -> AsyncIterator[AsyncSession]:
+        """
+        ## Сессия на шарде пользователя с указанным email.
+
+        Yields:
+            AsyncSession: Сессия нужного шарда (для `UserDAO.create` / `get_by_email`).
+        """
+        async with self.shards[self.shard_for_email(email)].get_session(priority) as session:
+            yield session
+
+    @asynccontextmanager
+    async def session_for_id(self,
+        entity_id: int,
+        priority: Priority = Priority.DEFAULT
+    ) -> AsyncIterator[AsyncSession]:
+        """
+        ## Сессия на шарде по `user_id` / `order_id`.
+
+        Yields:
+            AsyncSession: Сессия нужного шарда (для `UserDAO.hide`,
+                `OrderDAO.create` / `get_by_user` / `hide`).
+        """
+        async with self.shards[self.shard_for_id(entity_id)].get_session(priority) as session:
+            yield session
+
+    async def fan_out(self,
+        call: Callable[[AsyncSession], Awaitable[T]],
+        priority: Priority = Priority.BACKGROUND,
+        commit: bool = False
+    ) -> list[T]:
+        """
+        ## Выполняет `call` параллельно на всех шардах и собирает результаты.
+
+        Каждый шард работает в своей сессии; при ошибке на одном шарде
+        остальные задачи отменяются, а все сессии откатываются. Коммит
+        (если `commit=True`) выполняется только после успеха на всех шардах,
+        но по отдельности — атомарности между шардами нет.
+
+        Args:
+            call: Корутина-фабрика, получающая сессию шарда.
+            priority: Класс приоритета при допуске.
+            commit: Закоммитить сессии всех шардов.
+
+        Returns:
+            list[T]: Результаты в порядке номеров шардов.
+        """
+        async with AsyncExitStack() as stack:
+            sessions = [
+                await stack.enter_async_context(shard.get_session(priority))
+                for shard in self.shards
+            ]
+            try:
+                async with TaskGroup() as group:
+                    tasks = [group.create_task(call(session)) for session in sessions]
+            except ExceptionGroup as errors:
+                raise errors.exceptions[0]
+            if commit:
+                for session in sessions:
+                    await session.commit()
+            return [task.result() for task in tasks]
+
+    async def prepare(self) -> None:
+        """
+        ## Создаёт схему на всех шардах и настраивает последовательности id.
+
+        Последовательности `users` / `orders` получают шаг `SHARD_ID_SPACE`
+        и следующее значение `k * SHARD_ID_SPACE + shard`, большее текущего
+        максимального id.
+        """
+        for number, shard in enumerate(self.shards):
+            async with shard.get_session() as session:
+                conn = await session.connection()
+                await conn.run_sync(metadata_obj.create_all)
+                for table in SHARDED_TABLES:
+                    await session.execute(text(
+                        f"ALTER SEQUENCE {table}_id_seq INCREMENT BY {SHARD_ID_SPACE}"
+                    ))
+                    await session.execute(text(
+                        f"SELECT setval('{table}_id_seq', "
+                        f"(coalesce(max(id), 0) / {SHARD_ID_SPACE} + 1) * {SHARD_ID_SPACE} + {number}, "
+                        f"false) FROM {table}"
+                    ))
+                await session.commit()
+
+    async def db_close(self) -> None:
+        """
+        ## Закрывает соединения всех шардов.
+        """
+        for shard in self.shards:
+            await shard.db_close()
+
+
+def _shard_databases() -> list[str]:
+    """
+    ## Имена баз шардов из `POSTGRES_SHARDS` (пустой список — шардирование выключено).
+    """
+    return [name.strip() for name in env_config.POSTGRES_SHARDS.split(',') if name.strip()]
+
+
+def build_sharded_connection() -> Optional[ShardedDbConnection]:
+    """
+    ## Создаёт `ShardedDbConnection` по `.env` или None, если шарды не заданы.
+    """
+    databases = _shard_databases()
+    if not databases:
+        return None
+    return ShardedDbConnection.from_databases(databases)
+
+
+# Публичный API модуля
+__all__ = [
+    'SHARD_ID_SPACE',
+    'ShardedDbConnection',
+    'build_sharded_connection',
+]
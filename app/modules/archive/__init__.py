@@ -0,0 +1,7 @@
+"""Архивация скрытых заказов для проекта SQLAlchemyExample."""
+
+from .archiver import ArchiveStats, OrderArchiver
+
+
+# Публичный API модуля
+__all__ = ['ArchiveStats', 'OrderArchiver']
@@ -0,0 +1,43 @@
+"""Запуск архивации скрытых заказов.
+
+Запускать из корня (можно по расписанию, в том числе в часы пик):
+python -m app.modules.archive
+python -m app.modules.archive --max-batches 100
+"""
+
+from argparse import ArgumentParser
+from asyncio import run
+
+from app.database.connection import db_connection
+from app.modules.logging import get_logger, setup_logging
+
+from .archiver import OrderArchiver
+
+
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+
+async def main() -> None:
+    """
+    ## Переносит заказы, скрытые дольше срока хранения, в `orders_archive`.
+    """
+    parser = ArgumentParser(description='Архивация скрытых заказов')
+    parser.add_argument('--max-batches', type=int, default=None)
+    args = parser.parse_args()
+
+    stats = await OrderArchiver(db_connection).run(max_batches=args.max_batches)
+    await db_connection.db_close()
+    logger.info(
+        f"✓ Перенесено {stats.moved} заказов за {stats.batches} пачек "
+        f"({stats.seconds:.1f} с), последний id {stats.last_id}"
+    )
+    if stats.stamped:
+        logger.info(f"Скрытых заказов без hidden_at отмечено: {stats.stamped} (архивируются позже)")
+
+
+
+if __name__ == "__main__":
+    run(main())
@@ -0,0 +1,219 @@
+"""Перенос старых скрытых заказов в архив `orders_archive`.
+
+Каждая пачка — одна транзакция и один запрос:
+
+    WITH batch AS (
+        SELECT id FROM orders
+        WHERE is_hidden AND hidden_at < now() - :retention
+          AND id > :after
+        ORDER BY id LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    moved AS (
+        DELETE FROM orders USING batch WHERE orders.id = batch.id
+        RETURNING orders.*
+    )
+    INSERT INTO orders_archive (...) SELECT ... FROM moved RETURNING id
+
+`SKIP LOCKED` пропускает строки, занятые пользовательскими транзакциями,
+поэтому задачу можно запускать в часы пик. Из-за него же неполная пачка
+ещё не значит, что заказы кончились: проход заканчивается только пустой
+пачкой. Между пачками — пауза `throttle`, прогресс сохраняется
+в контрольную точку.
+
+Скрытый заказ без `hidden_at` (скрыт в обход DAO) не архивируется:
+при первом запуске, который его видит, ему ставится `hidden_at = now()`,
+и срок хранения отсчитывается с этого момента.
+"""
+
+from asyncio import sleep
+from dataclasses import dataclass
+from datetime import timedelta
+from time import perf_counter
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, text, update
+
+from app.config.config_reader import env_config
+from app.database.admission import Priority
+from app.database.connection import DbConnection
+from app.database.models import Order, OrderArchive
+from app.modules.checkpoint import FileCheckpoint
+from app.modules.logging import get_logger
+
+
+
+logger = get_logger(__name__)
+
+# Колонки, переносимые из `orders` в `orders_archive`
+_COLUMNS = ('id', 'user_id', 'product_id', 'quantity', 'is_hidden', 'hidden_at')
+
+
+
+@dataclass
+class ArchiveStats:
+    """
+    ## Итоги запуска архивации.
+
+    Attributes:
+        moved: Сколько заказов перенесено.
+        stamped: Скольким скрытым заказам без `hidden_at` поставлено `now()`.
+        batches: Сколько пачек выполнено.
+        last_id: Последний обработанный `orders.id`.
+        seconds: Длительность запуска.
+    """
+    moved: int = 0
+    stamped: int = 0
+    batches: int = 0
+    last_id: int = 0
+    seconds: float = 0.0
+
+
+class OrderArchiver:
+    """
+    ## Пакетная архивация скрытых заказов.
+
+    Attributes:
+        db: Подключение к БД.
+        retention: Сколько заказ должен пробыть скрытым до архивации.
+        batch_size: Размер пачки.
+        throttle: Пауза между пачками, в секундах.
+        checkpoint: Контрольная точка прогресса.
+    """
+
+    def __init__(self,
+        db: DbConnection,
+        retention: timedelta = timedelta(days=env_config.ARCHIVE_RETENTION_DAYS),
+        batch_size: int = env_config.ARCHIVE_BATCH_SIZE,
+        throttle: float = env_config.ARCHIVE_THROTTLE,
+        checkpoint: Optional[FileCheckpoint] = None
+    ) -> None:
+        """
+        ## Инициализирует `OrderArchiver`.
+
+        Raises:
+            ValueError: Если `batch_size` меньше 1.
+        """
+        if batch_size < 1:
+            raise ValueError('batch_size must be >= 1')
+        self.db = db
+        self.retention = retention
+        self.batch_size = batch_size
+        self.throttle = throttle
+        self.checkpoint = checkpoint or FileCheckpoint(env_config.ARCHIVE_CHECKPOINT_PATH)
+
+    def _batch_statement(self, after_id: int):
+        """
+        ## Строит запрос переноса одной пачки.
+        """
+        batch = (
+            select(Order.id)
+            .where(
+                Order.is_hidden,
+                Order.hidden_at < func.now() - self.retention,
+                Order.id > after_id,
+            )
+            .order_by(Order.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .cte('batch')
+        )
+        moved = (
+            delete(Order)
+            .where(Order.id == batch.c.id)
+            .returning(*[Order.__table__.c[col] for col in _COLUMNS])
+            .cte('moved')
+        )
+        return (
+            insert(OrderArchive)
+            .from_select(list(_COLUMNS), select(*[moved.c[col] for col in _COLUMNS]))
+            .returning(OrderArchive.id)
+        )
+
+    def _stamp_statement(self):
+        """
+        ## Строит запрос, ставящий `hidden_at = now()` пачке скрытых заказов без него.
+        """
+        batch = (
+            select(Order.id)
+            .where(Order.is_hidden, Order.hidden_at.is_(None))
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        return update(Order).where(Order.id.in_(batch)).values(hidden_at=func.now())
+
+    async def stamp_hidden(self) -> int:
+        """
+        ## Ставит `hidden_at = now()` скрытым заказам без него, пачками.
+
+        Пачки повторяются, пока очередная не окажется пустой.
+
+        Returns:
+            int: Сколько заказов отмечено.
+        """
+        stamped = 0
+        while True:
+            async with self.db.get_session(Priority.BACKGROUND) as session:
+                await session.execute(text("SET LOCAL lock_timeout = '1s'"))
+                res = await session.execute(self._stamp_statement())
+                await session.commit()
+            if not res.rowcount:
+                return stamped
+            stamped += res.rowcount
+            await sleep(self.throttle)
+
+    async def run_batch(self, after_id: int) -> list[int]:
+        """
+        ## Переносит одну пачку в отдельной транзакции.
+
+        Args:
+            after_id: Рассматриваются только заказы с `id > after_id`.
+
+        Returns:
+            list[int]: ID перенесённых заказов.
+        """
+        async with self.db.get_session(Priority.BACKGROUND) as session:
+            await session.execute(text("SET LOCAL lock_timeout = '1s'"))
+            res = await session.execute(self._batch_statement(after_id))
+            ids = list(res.scalars())
+            await session.commit()
+        return ids
+
+    async def run(self, max_batches: Optional[int] = None) -> ArchiveStats:
+        """
+        ## Архивирует пачками до исчерпания подходящих заказов.
+
+        Сначала отмечает скрытые заказы без `hidden_at` (`stamp_hidden`).
+        Продолжает с контрольной точки, если предыдущий запуск был прерван;
+        после полного прохода (до пустой пачки) контрольная точка удаляется.
+
+        Args:
+            max_batches: Ограничение числа пачек за запуск (`None` — без ограничения).
+
+        Returns:
+            ArchiveStats: Итоги запуска.
+        """
+        state = self.checkpoint.load()
+        stats = ArchiveStats(last_id=state.get('last_id', 0), moved=state.get('moved', 0))
+        started = perf_counter()
+        stats.stamped = await self.stamp_hidden()
+
+        while max_batches is None or stats.batches < max_batches:
+            ids = await self.run_batch(stats.last_id)
+            if not ids:
+                self.checkpoint.clear()
+                break
+            stats.batches += 1
+            stats.moved += len(ids)
+            stats.last_id = max(ids)
+            self.checkpoint.save({'last_id': stats.last_id, 'moved': stats.moved})
+            logger.info(f'Архивация: пачка {stats.batches}, перенесено {stats.moved}, id <= {stats.last_id}')
+            await sleep(self.throttle)
+
+        stats.seconds = perf_counter() - started
+        return stats
+
+
+# Публичный API модуля
+__all__ = ['ArchiveStats', 'OrderArchiver']
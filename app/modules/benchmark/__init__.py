@@ -0,0 +1,7 @@
+"""Бенчмарки для проекта SQLAlchemyExample."""
+
+from .runner import BenchResult, measure
+
+
+# Публичный API модуля
+__all__ = ['BenchResult', 'measure']
@@ -0,0 +1,91 @@
+"""Запуск бенчмарков.
+
+Запускать из корня на отдельной тестовой БД:
+python -m app.modules.benchmark drivers -n 200
+python -m app.modules.benchmark jobs -n 10000 --workers 1 2 4 8
+python -m app.modules.benchmark projection -n 200   # после python -m app.modules.explain --seed
+"""
+
+from argparse import ArgumentParser
+from asyncio import run
+
+from app.database.connection import db_connection
+from app.modules.logging import get_logger, setup_logging
+
+from .drivers import compare_drivers
+from .jobs import CONCURRENCY_LEVELS, bench_jobs
+from .projection import bench_projection
+
+
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+
+async def bench_drivers(iterations: int) -> None:
+    """
+    ## Сравнивает драйверы `asyncpg` и `psycopg` на всех операциях DAO.
+    """
+    report = await compare_drivers(iterations=iterations)
+    for driver, results in report.items():
+        logger.info("="*70)
+        if results is None:
+            logger.info(f"{driver}: драйвер не установлен, пропущен")
+            continue
+        for result in results:
+            logger.info(str(result))
+
+
+async def bench_queue(jobs: int, levels: tuple[int, ...], batch_size: int) -> None:
+    """
+    ## Замеряет пропускную способность очереди задач по числу циклов воркера.
+    """
+    try:
+        for result in await bench_jobs(jobs, levels, batch_size):
+            logger.info(str(result))
+    finally:
+        await db_connection.db_close()
+
+
+async def bench_fields(iterations: int) -> None:
+    """
+    ## Сравнивает чтение полных моделей и только нужных колонок (`fields=`).
+    """
+    try:
+        for result in await bench_projection(iterations):
+            logger.info(str(result))
+    finally:
+        await db_connection.db_close()
+
+
+async def main() -> None:
+    """
+    ## Разбирает аргументы и запускает выбранный бенчмарк.
+    """
+    parser = ArgumentParser(description='Бенчмарки SQLAlchemyExample')
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    drivers = sub.add_parser('drivers', help='asyncpg против psycopg на операциях DAO')
+    drivers.add_argument('-n', '--iterations', type=int, default=200)
+
+    jobs = sub.add_parser('jobs', help='очередь задач: задач в секунду по числу воркеров')
+    jobs.add_argument('-n', '--jobs', type=int, default=10_000)
+    jobs.add_argument('--workers', type=int, nargs='+', default=list(CONCURRENCY_LEVELS))
+    jobs.add_argument('--batch-size', type=int, default=10)
+
+    projection = sub.add_parser('projection', help='fields= против полных моделей: задержка и размер строк')
+    projection.add_argument('-n', '--iterations', type=int, default=200)
+
+    args = parser.parse_args()
+    if args.bench == 'drivers':
+        await bench_drivers(args.iterations)
+    elif args.bench == 'jobs':
+        await bench_queue(args.jobs, tuple(args.workers), args.batch_size)
+    elif args.bench == 'projection':
+        await bench_fields(args.iterations)
+
+
+
+if __name__ == "__main__":
+    run(main())
@@ -0,0 +1,145 @@
+"""Сравнение драйверов `asyncpg` и `psycopg` на всех операциях DAO.
+
+Для каждого драйвера создаётся собственный Engine, все операции выполняются
+в одной транзакции, которая в конце откатывается, — БД не меняется.
+Для `psycopg` дополнительно сравниваются пачка независимых запросов
+по одному и та же пачка в pipeline-режиме (`conn.pipeline()`).
+"""
+
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+from app.dao.order import order_dao
+from app.dao.product import product_dao
+from app.dao.user import user_dao
+from app.database.connection import DbConnection, build_engine
+from app.database.models import metadata_obj
+from app.schemas.order import NewOrder
+from app.schemas.product import NewProduct
+from app.schemas.user import NewUser
+
+from .runner import BenchResult, measure
+
+
+
+# Драйверы, которые сравниваются по умолчанию
+DRIVERS = ('asyncpg', 'psycopg')
+
+# Размер пачки независимых запросов для сравнения pipeline-режима
+PIPELINE_BATCH = 10
+
+
+async def _psycopg_batch(raw: Any, pipeline: bool) -> None:
+    """
+    ## Выполняет пачку независимых `SELECT` на «сыром» соединении `psycopg`.
+
+    Args:
+        raw: `psycopg.AsyncConnection` сессии.
+        pipeline: Отправить пачку в pipeline-режиме (один round trip на синхронизацию)
+            вместо ожидания ответа на каждый запрос.
+    """
+    if not pipeline:
+        for n in range(PIPELINE_BATCH):
+            cursor = await raw.execute('SELECT %s', (n,))
+            await cursor.fetchone()
+        return
+    async with raw.pipeline():
+        cursors = [await raw.execute('SELECT %s', (n,)) for n in range(PIPELINE_BATCH)]
+    for cursor in cursors:
+        await cursor.fetchone()
+
+
+async def bench_driver(driver: str, iterations: int = 200) -> list[BenchResult]:
+    """
+    ## Замеряет все операции DAO на указанном драйвере.
+
+    Args:
+        driver: Имя драйвера (`asyncpg` или `psycopg`).
+        iterations: Число выполнений каждой операции.
+
+    Returns:
+        list[BenchResult]: Результаты по операциям.
+    """
+    db = DbConnection(build_engine(driver))
+    results = []
+    try:
+        async with db.get_session() as session:
+            conn = await session.connection()
+            await conn.run_sync(metadata_obj.create_all)
+
+            user = await user_dao.create(
+                NewUser(email=f'bench-{driver}@example.com', full_name='Bench'), session=session
+            )
+            product = await product_dao.create(NewProduct(name='Bench', price=1), session=session)
+            order = await order_dao.create(
+                NewOrder(user_id=user.id, product_id=product.id), session=session
+            )
+
+            cases = {
+                'UserDAO.create': lambda i: user_dao.create(
+                    NewUser(email=f'bench-{driver}-{i}@example.com', full_name='Bench'),
+                    session=session,
+                ),
+                'UserDAO.get_by_email': lambda i: user_dao.get_by_email(user.email, session=session),
+                'UserDAO.hide': lambda i: user_dao.hide(user.id, session=session),
+                'UserDAO.unhide': lambda i: user_dao.unhide(user.id, session=session),
+                'ProductDAO.create': lambda i: product_dao.create(
+                    NewProduct(name=f'Bench {i}', price=i % 1000 + 1), session=session
+                ),
+                'ProductDAO.get_all': lambda i: product_dao.get_all(session=session),
+                'ProductDAO.hide': lambda i: product_dao.hide(product.id, session=session),
+                'ProductDAO.unhide': lambda i: product_dao.unhide(product.id, session=session),
+                'OrderDAO.create': lambda i: order_dao.create(
+                    NewOrder(user_id=user.id, product_id=product.id), session=session
+                ),
+                'OrderDAO.get_by_user': lambda i: order_dao.get_by_user(user.id, session=session),
+                'OrderDAO.hide': lambda i: order_dao.hide(order.id, session=session),
+                'OrderDAO.unhide': lambda i: order_dao.unhide(order.id, session=session),
+                'COPY products x1000': lambda i: db.driver.copy_records(
+                    session, 'products', ('name', 'price', 'is_hidden'),
+                    [(f'Copy {i}-{n}', n, False) for n in range(1000)],
+                ),
+                'SELECT 1 (round trip)': lambda i: session.execute(text('SELECT 1')),
+            }
+            if driver == 'psycopg':
+                raw = await db.driver.raw_connection(session)
+                cases[f'SELECT x{PIPELINE_BATCH} (sequential)'] = lambda i: _psycopg_batch(raw, False)
+                cases[f'SELECT x{PIPELINE_BATCH} (pipeline)'] = lambda i: _psycopg_batch(raw, True)
+            for name, call in cases.items():
+                result = await measure(f'{driver}: {name}', call, iterations)
+                results.append(result)
+
+            await session.rollback()
+    finally:
+        await db.db_close()
+    return results
+
+
+async def compare_drivers(
+    drivers: tuple[str, ...] = DRIVERS,
+    iterations: int = 200
+) -> dict[str, Optional[list[BenchResult]]]:
+    """
+    ## Запускает `bench_driver` для каждого драйвера.
+
+    Драйвер, который не установлен, пропускается (значение `None`).
+
+    Args:
+        drivers: Имена драйверов.
+        iterations: Число выполнений каждой операции.
+
+    Returns:
+        dict[str, list[BenchResult] | None]: Результаты по драйверам.
+    """
+    report: dict[str, Optional[list[BenchResult]]] = {}
+    for driver in drivers:
+        try:
+            report[driver] = await bench_driver(driver, iterations)
+        except ImportError:
+            report[driver] = None
+    return report
+
+
+# Публичный API модуля
+__all__ = ['DRIVERS', 'PIPELINE_BATCH', 'bench_driver', 'compare_drivers']
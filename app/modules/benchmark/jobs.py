@@ -0,0 +1,108 @@
+"""Пропускная способность очереди задач в зависимости от числа циклов воркера.
+
+Для каждого значения `concurrency` в отдельную очередь ставится `jobs`
+пустых задач, после чего воркер выбирает их до опустошения очереди
+(`drain=True`). Обработчик ничего не делает, поэтому замер показывает
+накладные расходы самой очереди: выдачу пачки, подтверждение и
+конкуренцию воркеров за строки (`SKIP LOCKED`). Очередь бенчмарка
+очищается после каждого замера.
+"""
+
+from dataclasses import dataclass
+from time import perf_counter
+
+from sqlalchemy import delete
+
+from app.database.admission import Priority
+from app.database.connection import DbConnection, db_connection
+from app.database.models import Job
+from app.modules.jobs import JobQueue, QueuedJob, Worker
+
+
+
+# Имя очереди бенчмарка
+BENCH_QUEUE = 'bench'
+# Число циклов воркера, которые сравниваются по умолчанию
+CONCURRENCY_LEVELS = (1, 2, 4, 8)
+
+
+@dataclass
+class JobsBenchResult:
+    """
+    ## Результат замера очереди для одного `concurrency`.
+
+    Attributes:
+        concurrency: Число циклов воркера.
+        batch_size: Задач в одной выдаче.
+        jobs: Сколько задач выполнено.
+        enqueue_per_sec: Скорость постановки (один `INSERT` на все задачи).
+        jobs_per_sec: Скорость выполнения.
+    """
+    concurrency: int
+    batch_size: int
+    jobs: int
+    enqueue_per_sec: float
+    jobs_per_sec: float
+
+    def __str__(self) -> str:
+        return (
+            f'workers={self.concurrency:<3} batch={self.batch_size:<4} jobs={self.jobs:<7} '
+            f'enqueue={self.enqueue_per_sec:10.1f}/s dequeue+ack={self.jobs_per_sec:10.1f} jobs/s'
+        )
+
+
+async def _noop(job: QueuedJob) -> None:
+    """
+    ## Пустой обработчик.
+    """
+
+
+async def bench_jobs(
+    jobs: int = 10_000,
+    levels: tuple[int, ...] = CONCURRENCY_LEVELS,
+    batch_size: int = 10,
+    db: DbConnection = db_connection
+) -> list[JobsBenchResult]:
+    """
+    ## Замеряет задачи в секунду для каждого числа циклов воркера.
+
+    Число одновременных циклов ограничено ёмкостью пула соединений
+    (`DB_POOL_SIZE + DB_MAX_OVERFLOW`) и очередью допуска.
+
+    Args:
+        jobs: Число задач на замер.
+        levels: Сравниваемые значения `concurrency`.
+        batch_size: Задач в одной выдаче.
+        db: Подключение к тестовой БД.
+
+    Returns:
+        list[JobsBenchResult]: Результаты по `concurrency`.
+    """
+    queue = JobQueue(db)
+    results = []
+    try:
+        for concurrency in levels:
+            started = perf_counter()
+            async with db.get_session(Priority.CRITICAL) as session:
+                await queue.enqueue_many(session, BENCH_QUEUE, ({'n': n} for n in range(jobs)))
+                await session.commit()
+            enqueued = perf_counter() - started
+
+            worker = Worker(queue, BENCH_QUEUE, _noop, concurrency=concurrency, batch_size=batch_size)
+            stats = await worker.run(drain=True)
+            results.append(JobsBenchResult(
+                concurrency=concurrency,
+                batch_size=batch_size,
+                jobs=stats.done,
+                enqueue_per_sec=jobs / enqueued,
+                jobs_per_sec=stats.jobs_per_second,
+            ))
+    finally:
+        async with db.get_session(Priority.BACKGROUND) as session:
+            await session.execute(delete(Job).where(Job.queue == BENCH_QUEUE))
+            await session.commit()
+    return results
+
+
+# Публичный API модуля
+__all__ = ['BENCH_QUEUE', 'CONCURRENCY_LEVELS', 'JobsBenchResult', 'bench_jobs']
@@ -0,0 +1,157 @@
+"""Чтение только нужных колонок (`fields=`) против полных моделей.
+
+Каждый кейс вызывает метод DAO дважды — без проекции и с `fields=` —
+и сравнивает задержку (`measure`) и размер строк результата: отправленный
+методом SQL перехватывается событием `before_cursor_execute` и
+повторяется внутри `sum(pg_column_size(q.*))`. Это размер строк на
+сервере (с заголовком составного значения на каждую строку), а не байты
+в протоколе, но разница между полной и узкой выборкой видна так же.
+Проекции кейсов покрываются индексами (`idx_product_name_price`,
+`idx_order_user_product`), поэтому на БД после `ANALYZE` / `VACUUM`
+запрос может обойтись index-only scan.
+
+Запускать на тестовой БД, наполненной `python -m app.modules.explain --seed`.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dao.order import order_dao
+from app.dao.product import product_dao
+from app.dao.user import user_dao
+from app.database.connection import DbConnection, db_connection
+
+from .runner import BenchResult, measure
+
+
+
+# Вызов метода DAO: `(session, sample, fields) -> ...`
+ProjectionCall = Callable[[AsyncSession, dict[str, Any], Any], Awaitable[Any]]
+
+# Кейсы: имя, вызов DAO и колонки для проекции
+PROJECTION_CASES: list[tuple[str, ProjectionCall, tuple[str, ...]]] = [
+    (
+        'UserDAO.get_by_email',
+        lambda s, x, fields: user_dao.get_by_email(x['email'], session=s, fields=fields),
+        ('id',),
+    ),
+    (
+        'ProductDAO.get_all',
+        lambda s, x, fields: product_dao.get_all(session=s, fields=fields),
+        ('name', 'price'),
+    ),
+    (
+        'OrderDAO.get_by_user',
+        lambda s, x, fields: order_dao.get_by_user(x['user_id'], session=s, fields=fields),
+        ('product_id',),
+    ),
+]
+
+
+
+@dataclass
+class ProjectionResult:
+    """
+    ## Сравнение полного и проецированного чтения для одного метода DAO.
+
+    Attributes:
+        fields: Выбранные колонки.
+        full: Замер без проекции.
+        projected: Замер с `fields=`.
+        full_row_size: Размер строк результата без проекции, байт.
+        projected_row_size: Размер строк результата с проекцией, байт.
+    """
+    fields: tuple[str, ...]
+    full: BenchResult
+    projected: BenchResult
+    full_row_size: int
+    projected_row_size: int
+
+    def __str__(self) -> str:
+        speedup = self.full.mean_ms / self.projected.mean_ms if self.projected.mean_ms else 0.0
+        return (
+            f'{self.full}\n{self.projected}\n'
+            f'{"":<40} row size {self.full_row_size} -> {self.projected_row_size} B, '
+            f'x{speedup:.2f} быстрее'
+        )
+
+
+async def _sample(session: AsyncSession) -> dict[str, Any]:
+    """
+    ## Выбирает пользователя с заказами, на котором запускаются кейсы.
+    """
+    row = (await session.execute(text(
+        "SELECT u.id, u.email FROM orders o JOIN users u ON u.id = o.user_id ORDER BY o.id LIMIT 1"
+    ))).one()
+    return {'user_id': row[0], 'email': row[1]}
+
+
+async def result_row_size(session: AsyncSession, call: Callable[[], Awaitable[Any]]) -> int:
+    """
+    ## Выполняет вызов DAO и считает размер строк результата всех его запросов.
+
+    Args:
+        session: Асинхронная сессия БД.
+        call: Вызов метода DAO без аргументов.
+
+    Returns:
+        int: Сумма `pg_column_size(q.*)` по строкам результатов, байт (не байты в протоколе).
+    """
+    captured: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        captured.append((statement, parameters))
+
+    conn = await session.connection()
+    event.listen(conn.sync_connection, 'before_cursor_execute', capture)
+    try:
+        await call()
+    finally:
+        event.remove(conn.sync_connection, 'before_cursor_execute', capture)
+
+    total = 0
+    for statement, parameters in captured:
+        res = await conn.exec_driver_sql(
+            f'SELECT coalesce(sum(pg_column_size(q.*)), 0) FROM ({statement}) AS q', parameters
+        )
+        total += res.scalar_one()
+    return total
+
+
+async def bench_projection(
+    iterations: int = 200,
+    db: DbConnection = db_connection
+) -> list[ProjectionResult]:
+    """
+    ## Замеряет методы DAO с проекцией колонок и без неё.
+
+    Args:
+        iterations: Число выполнений каждого вызова.
+        db: Подключение к наполненной тестовой БД.
+
+    Returns:
+        list[ProjectionResult]: Результаты по кейсам `PROJECTION_CASES`.
+    """
+    results = []
+    async with db.get_session() as session:
+        sample = await _sample(session)
+        for name, call, fields in PROJECTION_CASES:
+            full = await measure(name, lambda i: call(session, sample, None), iterations)
+            projected = await measure(
+                f"{name}({', '.join(fields)})", lambda i: call(session, sample, fields), iterations
+            )
+            results.append(ProjectionResult(
+                fields=fields,
+                full=full,
+                projected=projected,
+                full_row_size=await result_row_size(session, lambda: call(session, sample, None)),
+                projected_row_size=await result_row_size(session, lambda: call(session, sample, fields)),
+            ))
+    return results
+
+
+# Публичный API модуля
+__all__ = ['PROJECTION_CASES', 'ProjectionResult', 'bench_projection', 'result_row_size']
@@ -0,0 +1,76 @@
+"""Общий измеритель для бенчмарков проекта SQLAlchemyExample."""
+
+from dataclasses import dataclass
+from statistics import mean, quantiles
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+
+
+@dataclass
+class BenchResult:
+    """
+    ## Результат замера одной операции.
+
+    Attributes:
+        name: Имя операции.
+        iterations: Число выполнений.
+        mean_ms: Среднее время, мс.
+        p50_ms: Медиана, мс.
+        p95_ms: 95-й перцентиль, мс.
+        ops_per_sec: Пропускная способность при последовательном выполнении.
+    """
+    name: str
+    iterations: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    ops_per_sec: float
+
+    def __str__(self) -> str:
+        return (
+            f'{self.name:<40} n={self.iterations:<6} mean={self.mean_ms:8.3f}ms '
+            f'p50={self.p50_ms:8.3f}ms p95={self.p95_ms:8.3f}ms {self.ops_per_sec:10.1f} op/s'
+        )
+
+
+async def measure(
+    name: str,
+    call: Callable[[int], Awaitable[Any]],
+    iterations: int = 200,
+    warmup: int = 10
+) -> BenchResult:
+    """
+    ## Выполняет корутину `iterations` раз и считает статистику задержек.
+
+    Args:
+        name: Имя операции для отчёта.
+        call: Фабрика корутины, получает номер итерации.
+        iterations: Число замеряемых выполнений.
+        warmup: Число выполнений на прогрев (не учитываются).
+
+    Returns:
+        BenchResult: Статистика по замеру.
+    """
+    for i in range(warmup):
+        await call(-i - 1)
+
+    timings = []
+    for i in range(iterations):
+        started = perf_counter()
+        await call(i)
+        timings.append((perf_counter() - started) * 1000)
+
+    cuts = quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+    return BenchResult(
+        name=name,
+        iterations=iterations,
+        mean_ms=mean(timings),
+        p50_ms=cuts[49],
+        p95_ms=cuts[94],
+        ops_per_sec=1000 / mean(timings),
+    )
+
+
+# Публичный API модуля
+__all__ = ['BenchResult', 'measure']
@@ -0,0 +1,19 @@
+"""Снимок каталога товаров в памяти для проекта SQLAlchemyExample."""
+
+from .snapshot import (
+    CATALOG_CHANNEL,
+    CatalogProduct,
+    CatalogStaleError,
+    ProductCatalog,
+    product_catalog,
+)
+
+
+# Публичный API модуля
+__all__ = [
+    'CATALOG_CHANNEL',
+    'CatalogProduct',
+    'CatalogStaleError',
+    'ProductCatalog',
+    'product_catalog',
+]
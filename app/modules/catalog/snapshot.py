@@ -0,0 +1,417 @@
+"""Снимок каталога товаров в памяти процесса.
+
+Товары меняются редко, а читаются почти при каждом заказе. `ProductCatalog`
+один раз загружает таблицу `products` в компактные массивы и дальше
+поддерживает её в актуальном состоянии по уведомлениям PostgreSQL
+`LISTEN/NOTIFY`, которые рассылает `ProductDAO` (`create` / `hide` / `unhide` / `update_prices`).
+
+Хранение (на 1M товаров, CPython 3.12, 64 бит, оценка):
+    - `_ids` / `_prices` (`array('q')`): 8 МБ + 8 МБ;
+    - `_visible` (`bytearray`): 1 МБ;
+    - `_name_next` (`array('q')`, цепочки одинаковых имён): 8 МБ;
+    - `_names` (список ссылок): 8 МБ + сами строки
+      (~60-90 байт на имя из 10-20 символов, кириллица — 2 байта на символ);
+    - `_name_head` (dict имя -> позиция): ~40 МБ на таблицу + 28 байт на int.
+
+Итого порядка 160-200 МБ на 1M товаров против ~1 ГБ и больше для
+`list[ExistsProduct]`. Записи `CatalogProduct` создаются только при чтении.
+"""
+
+from array import array
+from asyncio import CancelledError, Queue, Task, create_task, sleep
+from bisect import bisect_left
+from time import monotonic
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config.config_reader import env_config
+from app.database.connection import DbConnection, db_connection
+from app.database.models import Product
+from app.modules.logging import get_logger
+
+
+
+# Канал PostgreSQL, в который `ProductDAO` пишет изменения товаров
+CATALOG_CHANNEL = 'products_changed'
+# Служебный payload для проверки «свежести» снимка
+_PING = 'ping'
+
+logger = get_logger(__name__)
+
+
+
+class CatalogStaleError(RuntimeError):
+    """
+    ## Снимок каталога отстаёт от БД больше допустимого.
+
+    Вызывающий код должен прочитать данные напрямую через `ProductDAO`.
+    """
+
+
+class CatalogProduct:
+    """
+    ## Лёгкая запись товара из снимка каталога.
+
+    Attributes:
+        id (int): Первичный ключ товара.
+        name (str): Название товара.
+        price (int): Цена товара в условных единицах.
+    """
+    __slots__ = ('id', 'name', 'price')
+
+    def __init__(self, id: int, name: str, price: int) -> None:
+        self.id = id
+        self.name = name
+        self.price = price
+
+    def __repr__(self) -> str:
+        return f'CatalogProduct(id={self.id}, name={self.name!r}, price={self.price})'
+
+
+class ProductCatalog:
+    """
+    ## Снимок видимых товаров с инкрементальным обновлением по `NOTIFY`.
+
+    Поиск по `id` — бинарный поиск по отсортированному `array('q')`,
+    поиск по имени — словарь «имя -> последняя позиция» плюс цепочка
+    позиций с тем же именем. Скрытые товары остаются в массивах с флагом
+    `_visible = 0`, поэтому `unhide` не требует перестройки.
+
+    Attributes:
+        db: Подключение к БД, из которого читаются товары.
+        max_staleness: Допустимое отставание снимка от БД, в секундах.
+    """
+
+    def __init__(self,
+        db: DbConnection,
+        max_staleness: float = env_config.PRODUCT_CATALOG_MAX_STALENESS
+    ) -> None:
+        """
+        ## Инициализирует пустой `ProductCatalog`.
+
+        Args:
+            db: Подключение к БД.
+            max_staleness: Допустимое отставание снимка от БД, в секундах.
+        """
+        self.db = db
+        self.max_staleness = max_staleness
+        self._reset()
+        self._verified_at: float = float('-inf')
+        self._reload_required = False
+        self._listener: Optional[AsyncConnection] = None
+        self._events: Queue[str] = Queue()
+        self._tasks: list[Task] = []
+
+    def _reset(self) -> None:
+        """
+        ## Очищает массивы снимка.
+        """
+        self._ids = array('q')
+        self._prices = array('q')
+        self._visible = bytearray()
+        self._names: list[str] = []
+        self._name_next = array('q')
+        self._name_head: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """
+        ## Количество видимых товаров в снимке.
+        """
+        return self._visible.count(1)
+
+    @property
+    def staleness(self) -> float:
+        """
+        ## Сколько секунд прошло с последней подтверждённой синхронизации.
+        """
+        return monotonic() - self._verified_at
+
+    def _check_fresh(self) -> None:
+        """
+        ## Проверяет, что снимок не старше `max_staleness`.
+
+        Raises:
+            CatalogStaleError: Если снимок устарел или ещё не загружен.
+        """
+        if self.staleness > self.max_staleness:
+            raise CatalogStaleError(
+                f'product catalog is stale ({self.staleness:.1f}s > {self.max_staleness}s)'
+            )
+
+    def _record(self, pos: int) -> CatalogProduct:
+        return CatalogProduct(self._ids[pos], self._names[pos], self._prices[pos])
+
+    def _pos(self, product_id: int) -> int:
+        """
+        ## Позиция товара в массивах или -1.
+        """
+        pos = bisect_left(self._ids, product_id)
+        if pos < len(self._ids) and self._ids[pos] == product_id:
+            return pos
+        return -1
+
+    def get(self, product_id: int) -> Optional[CatalogProduct]:
+        """
+        ## Возвращает видимый товар по `id` или None.
+
+        Args:
+            product_id: ID товара.
+
+        Raises:
+            CatalogStaleError: Если снимок устарел.
+
+        Returns:
+            CatalogProduct | None: Запись товара или `None`.
+        """
+        self._check_fresh()
+        pos = self._pos(product_id)
+        if pos < 0 or not self._visible[pos]:
+            return None
+        return self._record(pos)
+
+    def get_by_name(self, name: str) -> list[CatalogProduct]:
+        """
+        ## Возвращает все видимые товары с указанным названием.
+
+        Args:
+            name: Название товара.
+
+        Raises:
+            CatalogStaleError: Если снимок устарел.
+
+        Returns:
+            list[CatalogProduct]: Товары в порядке убывания `id`.
+        """
+        self._check_fresh()
+        result = []
+        pos = self._name_head.get(name, -1)
+        while pos >= 0:
+            if self._visible[pos]:
+                result.append(self._record(pos))
+            pos = self._name_next[pos]
+        return result
+
+    def _append(self, product_id: int, name: str, price: int, is_hidden: bool) -> None:
+        """
+        ## Добавляет товар в конец массивов (`id` должен быть больше последнего).
+        """
+        pos = len(self._ids)
+        self._ids.append(product_id)
+        self._prices.append(price)
+        self._visible.append(0 if is_hidden else 1)
+        self._names.append(name)
+        self._name_next.append(self._name_head.get(name, -1))
+        self._name_head[name] = pos
+
+    def _load_rows(self, rows: Iterable[Any]) -> None:
+        """
+        ## Полностью перестраивает снимок из строк `(id, name, price, is_hidden)`.
+        """
+        self._reset()
+        for row in rows:
+            self._append(row[0], row[1], row[2], row[3])
+
+    def _columns_query(self):
+        model = Product
+        return select(model.id, model.name, model.price, model.is_hidden)
+
+    async def load(self) -> None:
+        """
+        ## Загружает весь каталог из БД одним запросом.
+        """
+        started = monotonic()
+        async with self.db.get_session() as session:
+            res = await session.execute(self._columns_query().order_by(Product.id))
+            self._load_rows(res.all())
+        self._verified_at = started
+        logger.info(f'Каталог товаров загружен: {len(self)} видимых')
+
+    async def _apply(self, product_ids: set[int]) -> None:
+        """
+        ## Перечитывает изменённые товары и применяет их к снимку.
+
+        Если товар с таким `id` уже есть — обновляются цена и видимость;
+        новые товары с `id` больше последнего дописываются в конец.
+        Всё остальное (смена имени, вставка «в середину») приводит
+        к полной перезагрузке.
+
+        Args:
+            product_ids: ID изменённых товаров.
+        """
+        query = self._columns_query().where(Product.id.in_(product_ids)).order_by(Product.id)
+        async with self.db.get_session() as session:
+            rows = (await session.execute(query)).all()
+
+        for product_id, name, price, is_hidden in rows:
+            pos = self._pos(product_id)
+            if pos >= 0 and self._names[pos] == name:
+                self._prices[pos] = price
+                self._visible[pos] = 0 if is_hidden else 1
+            elif pos < 0 and (not self._ids or product_id > self._ids[-1]):
+                self._append(product_id, name, price, is_hidden)
+            else:
+                await self.load()
+                return
+
+    def _on_notify(self, channel: str, payload: str) -> None:
+        """
+        ## Колбэк уведомления: кладёт payload в очередь обработки.
+        """
+        self._events.put_nowait(payload)
+
+    async def _consume(self) -> None:
+        """
+        ## Фоновая задача: пачками применяет уведомления из очереди.
+
+        Уведомления обрабатываются в порядке получения, поэтому `ping`
+        подтверждает, что все изменения до него уже в снимке. Нераспознанный
+        payload пишется в лог, а снимок перезагружается целиком: какие товары
+        изменились, из такого уведомления не узнать. Если применить пачку
+        не удалось, её изменения потеряны для снимка: до успешной полной
+        перезагрузки (её повторяет каждая следующая пачка, хотя бы ping)
+        `ping` не принимаются и снимок стареет.
+        """
+        while True:
+            payloads = [await self._events.get()]
+            while not self._events.empty():
+                payloads.append(self._events.get_nowait())
+
+            changed: set[int] = set()
+            verified: Optional[float] = None
+            reload = self._reload_required
+            for payload in payloads:
+                kind, _, value = payload.partition(':')
+                try:
+                    if kind == _PING:
+                        verified = float(value)
+                    else:
+                        changed.update(int(product_id) for product_id in value.split(','))
+                except ValueError:
+                    logger.error(f'Некорректное уведомление каталога: {payload!r}')
+                    reload = True
+            try:
+                if reload:
+                    await self.load()
+                elif changed:
+                    await self._apply(changed)
+            except Exception:
+                logger.exception('Не удалось применить изменения каталога, снимок будет перезагружен')
+                self._reload_required = True
+                continue
+            self._reload_required = False
+            if verified is not None:
+                self._verified_at = max(self._verified_at, verified)
+
+    async def _heartbeat(self) -> None:
+        """
+        ## Фоновая задача: периодически отправляет `ping` через канал.
+
+        Уведомления доставляются в порядке коммита транзакций, поэтому
+        вернувшийся ping подтверждает, что все изменения, закоммиченные
+        до его отправки, уже получены — так ограничивается отставание снимка.
+
+        Ошибки пишутся в лог, задача продолжает работу. Если ping не
+        возвращается дольше `max_staleness` (например, соединение `LISTEN`
+        разорвано), подписка пересоздаётся и снимок перезагружается.
+        """
+        interval = self.max_staleness / 2
+        while True:
+            try:
+                if self.staleness > self.max_staleness:
+                    logger.warning('Каталог товаров устарел, переподписываемся на канал')
+                    await self._resubscribe()
+                await self._send_ping()
+            except Exception:
+                logger.exception('Ошибка фоновой синхронизации каталога товаров')
+            await sleep(interval)
+
+    async def _send_ping(self) -> None:
+        payload = f'{_PING}:{monotonic()}'
+        async with self.db.get_session() as session:
+            await session.execute(select(func.pg_notify(CATALOG_CHANNEL, payload)))
+            await session.commit()
+
+    async def start(self) -> None:
+        """
+        ## Подписывается на канал, загружает снимок и запускает фоновые задачи.
+
+        Подписка выполняется до загрузки, чтобы не потерять изменения,
+        сделанные во время первого чтения.
+        """
+        if self._listener is not None:
+            return
+        await self._subscribe()
+        await self.load()
+        self._tasks = [create_task(self._consume()), create_task(self._heartbeat())]
+
+    async def _subscribe(self) -> None:
+        """
+        ## Открывает соединение `LISTEN` на канал каталога.
+
+        Соединение занимает одно разрешение контроля допуска до `_unsubscribe()`.
+        """
+        listener = await self.db.open_listener()
+        try:
+            raw = await self.db.driver.raw_connection(listener)
+            await self.db.driver.listen(raw, CATALOG_CHANNEL, self._on_notify)
+        except BaseException:
+            await self.db.close_listener(listener)
+            raise
+        self._listener = listener
+
+    async def _unsubscribe(self) -> None:
+        """
+        ## Отписывается от канала и закрывает соединение `LISTEN`.
+        """
+        listener, self._listener = self._listener, None
+        if listener is None:
+            return
+        try:
+            raw = await self.db.driver.raw_connection(listener)
+            await self.db.driver.unlisten(raw, CATALOG_CHANNEL, self._on_notify)
+        finally:
+            await self.db.close_listener(listener)
+
+    async def _resubscribe(self) -> None:
+        """
+        ## Пересоздаёт подписку и перезагружает снимок целиком.
+
+        Уведомления, пришедшие, пока соединения не было, потеряны,
+        поэтому после новой подписки снимок читается заново.
+        """
+        try:
+            await self._unsubscribe()
+        except Exception:
+            logger.exception('Не удалось закрыть старое соединение LISTEN каталога')
+        await self._subscribe()
+        await self.load()
+        self._reload_required = False
+
+    async def stop(self) -> None:
+        """
+        ## Останавливает фоновые задачи и возвращает соединение в пул.
+        """
+        for task in self._tasks:
+            task.cancel()
+            try:
+                await task
+            except CancelledError:
+                pass
+        self._tasks = []
+        await self._unsubscribe()
+        self._verified_at = float('-inf')
+
+
+# Глобальный снимок каталога (запускается явно через `await product_catalog.start()`)
+product_catalog = ProductCatalog(db_connection)
+
+# Публичный API модуля
+__all__ = [
+    'CATALOG_CHANNEL',
+    'CatalogProduct',
+    'CatalogStaleError',
+    'ProductCatalog',
+    'product_catalog',
+]
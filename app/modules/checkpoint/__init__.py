@@ -0,0 +1,7 @@
+"""Контрольные точки фоновых задач для проекта SQLAlchemyExample."""
+
+from .store import FileCheckpoint
+
+
+# Публичный API модуля
+__all__ = ['FileCheckpoint']
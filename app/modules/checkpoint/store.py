@@ -0,0 +1,65 @@
+"""Файловые контрольные точки для длительных фоновых задач.
+
+Позволяют продолжить прерванную задачу (архивацию, сканирование)
+с последней сохранённой позиции.
+"""
+
+import json
+from os import replace
+from pathlib import Path
+from typing import Any
+
+
+
+class FileCheckpoint:
+    """
+    ## Контрольная точка в JSON-файле.
+
+    Запись атомарна: данные пишутся во временный файл, который затем
+    переименовывается поверх основного.
+
+    Attributes:
+        path: Путь к файлу контрольной точки.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """
+        ## Инициализирует `FileCheckpoint`.
+
+        Args:
+            path: Путь к файлу контрольной точки.
+        """
+        self.path = Path(path)
+
+    def load(self) -> dict[str, Any]:
+        """
+        ## Читает сохранённое состояние.
+
+        Returns:
+            dict[str, Any]: Состояние или пустой словарь, если точки нет.
+        """
+        if not self.path.exists():
+            return {}
+        return json.loads(self.path.read_text(encoding='utf-8'))
+
+    def save(self, state: dict[str, Any]) -> None:
+        """
+        ## Атомарно сохраняет состояние.
+
+        Args:
+            state: JSON-сериализуемое состояние задачи.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp.write_text(json.dumps(state, ensure_ascii=False), encoding='utf-8')
+        replace(tmp, self.path)
+
+    def clear(self) -> None:
+        """
+        ## Удаляет контрольную точку (задача завершена).
+        """
+        self.path.unlink(missing_ok=True)
+
+
+# Публичный API модуля
+__all__ = ['FileCheckpoint']
@@ -0,0 +1,29 @@
+"""Регрессионная проверка планов запросов DAO для проекта SQLAlchemyExample."""
+
+from .plan_check import (
+    CaseResult,
+    DEFAULT_CASES,
+    PlanCase,
+    PlanSummary,
+    check_case,
+    explain_case,
+    run_plan_checks,
+    seed,
+    summarize_plan,
+    vacuum,
+)
+
+
+# Публичный API модуля
+__all__ = [
+    'CaseResult',
+    'DEFAULT_CASES',
+    'PlanCase',
+    'PlanSummary',
+    'check_case',
+    'explain_case',
+    'run_plan_checks',
+    'seed',
+    'summarize_plan',
+    'vacuum',
+]
@@ -0,0 +1,69 @@
+"""Запуск проверки планов запросов DAO.
+
+Запускать из корня на отдельной тестовой БД:
+python -m app.modules.explain --seed      # создать таблицы и наполнить данными
+python -m app.modules.explain             # проверить планы и снимки
+python -m app.modules.explain --update    # перезаписать снимки планов
+python -m app.modules.explain --write-missing  # создать только отсутствующие снимки
+"""
+
+import sys
+from argparse import ArgumentParser
+from asyncio import run
+
+from app.database.connection import db_connection
+from app.modules.logging import get_logger, setup_logging
+
+from .plan_check import run_plan_checks, seed, vacuum
+
+
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+
+async def main() -> int:
+    """
+    ## Разбирает аргументы, при необходимости наполняет БД и проверяет планы.
+
+    Returns:
+        int: Код выхода — 0, если все кейсы прошли, иначе 1.
+    """
+    parser = ArgumentParser(description='EXPLAIN-проверка планов запросов DAO')
+    parser.add_argument('--seed', action='store_true', help='наполнить БД тестовыми данными')
+    parser.add_argument('--update', action='store_true', help='перезаписать снимки планов')
+    parser.add_argument(
+        '--write-missing', action='store_true', help='создать отсутствующие снимки, остальные сравнить'
+    )
+    args = parser.parse_args()
+
+    if args.seed:
+        async with db_connection.get_session() as session:
+            await seed(session)
+            await session.commit()
+        await vacuum(db_connection)
+        logger.info("✓ Тестовые данные созданы")
+
+    results = await run_plan_checks(
+        db_connection, update=args.update, write_missing=args.write_missing
+    )
+    await db_connection.db_close()
+
+    failed = 0
+    for result in results:
+        for plan in result.plans:
+            logger.info(f"{result.case}: {' -> '.join(plan.nodes)} (buffers={plan.buffers})")
+        if result.snapshot_created:
+            logger.warning(f"{result.case}: снимок плана создан, закоммитьте его")
+        for error in result.errors:
+            logger.error(f"{result.case}: {error}")
+        failed += bool(result.errors)
+
+    logger.info(f"Кейсов: {len(results)}, с ошибками: {failed}")
+    return 1 if failed else 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
@@ -0,0 +1,423 @@
+"""Проверка планов запросов DAO через `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`.
+
+Сценарий:
+    1. `seed()` наполняет таблицы реалистичными объёмами через `generate_series`
+       (на стороне сервера, без передачи строк из Python) и выполняет `ANALYZE`,
+       `vacuum()` затем заполняет карту видимости для index-only scan.
+    2. Для каждого `PlanCase` вызывается метод DAO; все отправленные им SQL
+       перехватываются событием `before_cursor_execute` и затем повторяются
+       под `EXPLAIN`. Транзакция откатывается, данные не меняются.
+    3. Из JSON-плана строится `PlanSummary`: узлы, использованные индексы,
+       `Seq Scan` по таблицам и число прочитанных буферов.
+    4. Сводка проверяется на ожидания кейса и сравнивается со снимком
+       в `snapshots/<case>.json` — изменение плана видно в diff на ревью.
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dao.order import order_dao
+from app.dao.product import product_dao
+from app.dao.user import user_dao
+from app.database.connection import DbConnection
+from app.database.models import metadata_obj
+from app.schemas.order import NewOrder
+from app.schemas.product import NewProduct
+from app.schemas.user import NewUser
+
+
+
+# Каталог со снимками планов по умолчанию
+SNAPSHOT_DIR = Path(__file__).parent / 'snapshots'
+
+# Объёмы данных для `seed()` по умолчанию
+DEFAULT_VOLUMES = {'users': 100_000, 'products': 10_000, 'orders': 1_000_000}
+
+
+
+@dataclass
+class PlanSummary:
+    """
+    ## Сжатое описание плана одного SQL-запроса.
+
+    Attributes:
+        statement: Текст SQL-запроса.
+        nodes: Узлы плана в порядке обхода (`Index Scan using ix on t`).
+        indexes: Использованные индексы.
+        seq_scans: Таблицы, прочитанные через `Seq Scan`.
+        buffers: Число разделяемых буферов (hit + read) для всего запроса.
+    """
+    statement: str
+    nodes: list[str] = field(default_factory=list)
+    indexes: list[str] = field(default_factory=list)
+    seq_scans: list[str] = field(default_factory=list)
+    buffers: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        ## Стабильная часть сводки для снимка (без буферов и таймингов).
+        """
+        return {'statement': self.statement, 'nodes': self.nodes}
+
+
+@dataclass
+class PlanCase:
+    """
+    ## Кейс проверки плана для одного метода DAO.
+
+    Attributes:
+        name: Имя кейса (и файла снимка).
+        call: Корутина-фабрика `(session, sample) -> ...`, вызывающая метод DAO.
+        expect_indexes: Хотя бы один из индексов должен быть использован.
+        forbid_seq_scan: Таблицы, по которым запрещён `Seq Scan`.
+        max_buffers: Бюджет буферов на каждый запрос кейса (`None` — без проверки).
+    """
+    name: str
+    call: Callable[[AsyncSession, dict[str, Any]], Awaitable[Any]]
+    expect_indexes: tuple[str, ...] = ()
+    forbid_seq_scan: tuple[str, ...] = ()
+    max_buffers: Optional[int] = None
+
+
+@dataclass
+class CaseResult:
+    """
+    ## Результат проверки одного кейса.
+
+    Attributes:
+        case: Имя кейса.
+        plans: Сводки планов всех запросов кейса.
+        errors: Нарушенные ожидания и расхождения со снимком.
+        snapshot_created: Снимка не было, он записан (`write_missing=True`).
+    """
+    case: str
+    plans: list[PlanSummary]
+    errors: list[str] = field(default_factory=list)
+    snapshot_created: bool = False
+
+
+def summarize_plan(statement: str, plan_json: Any) -> PlanSummary:
+    """
+    ## Строит `PlanSummary` из результата `EXPLAIN (FORMAT JSON)`.
+
+    Args:
+        statement: Текст SQL-запроса.
+        plan_json: Значение, которое вернул `EXPLAIN` (список или JSON-строка).
+
+    Returns:
+        PlanSummary: Сводка плана.
+    """
+    if isinstance(plan_json, str):
+        plan_json = json.loads(plan_json)
+    root = plan_json[0]['Plan']
+    summary = PlanSummary(
+        statement=' '.join(statement.split()),
+        buffers=root.get('Shared Hit Blocks', 0) + root.get('Shared Read Blocks', 0),
+    )
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        label = node['Node Type']
+        if 'Index Name' in node:
+            label += f" using {node['Index Name']}"
+            summary.indexes.append(node['Index Name'])
+        if 'Relation Name' in node:
+            label += f" on {node['Relation Name']}"
+            if node['Node Type'] == 'Seq Scan':
+                summary.seq_scans.append(node['Relation Name'])
+        summary.nodes.append(label)
+        stack.extend(reversed(node.get('Plans', [])))
+    return summary
+
+
+async def seed(session: AsyncSession, volumes: Optional[dict[str, int]] = None) -> None:
+    """
+    ## Создаёт таблицы и наполняет их тестовыми данными.
+
+    Args:
+        session: Асинхронная сессия БД (коммит выполняет вызывающий код).
+        volumes: Количество строк по таблицам (`users`, `products`, `orders`).
+    """
+    volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+    conn = await session.connection()
+    await conn.run_sync(metadata_obj.create_all)
+
+    await session.execute(
+        text(
+            "INSERT INTO users (email, full_name, is_hidden) "
+            "SELECT 'user' || g || '@example.com', 'User ' || g, g % 50 = 0 "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {'n': volumes['users']},
+    )
+    await session.execute(
+        text(
+            "INSERT INTO products (name, price, is_hidden) "
+            "SELECT 'Product ' || g, (g * 37) % 100000, g % 100 = 0 "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {'n': volumes['products']},
+    )
+    await session.execute(
+        text(
+            "INSERT INTO orders (user_id, product_id, quantity, is_hidden) "
+            "SELECT u.min_id + (g * 7919) % u.cnt, p.min_id + (g * 104729) % p.cnt, "
+            "1 + g % 5, g % 20 = 0 "
+            "FROM generate_series(1, :n) AS g, "
+            "(SELECT min(id) AS min_id, count(*) AS cnt FROM users) AS u, "
+            "(SELECT min(id) AS min_id, count(*) AS cnt FROM products) AS p"
+        ),
+        {'n': volumes['orders']},
+    )
+    for table in ('users', 'products', 'orders'):
+        await session.execute(text(f'ANALYZE {table}'))
+
+
+async def vacuum(db: DbConnection) -> None:
+    """
+    ## Выполняет `VACUUM ANALYZE` таблиц после `seed()`.
+
+    `VACUUM` заполняет карту видимости: без неё планировщик не выбирает
+    index-only scan для проекций, покрытых индексом. Команда не работает
+    в транзакции, поэтому соединение сессии переводится в autocommit.
+
+    Args:
+        db: Подключение к тестовой БД.
+    """
+    async with db.get_session() as session:
+        conn = await session.connection(execution_options={'isolation_level': 'AUTOCOMMIT'})
+        for table in ('users', 'products', 'orders'):
+            await conn.execute(text(f'VACUUM ANALYZE {table}'))
+
+
+async def _sample(session: AsyncSession) -> dict[str, Any]:
+    """
+    ## Выбирает существующие строки, на которых запускаются кейсы.
+    """
+    row = (await session.execute(text(
+        "SELECT u.id, u.email, o.id, o.product_id FROM orders o "
+        "JOIN users u ON u.id = o.user_id ORDER BY o.id LIMIT 1"
+    ))).one()
+    return {'user_id': row[0], 'email': row[1], 'order_id': row[2], 'product_id': row[3]}
+
+
+# Кейсы по всем запросам DAO
+DEFAULT_CASES: list[PlanCase] = [
+    PlanCase(
+        name='user_create',
+        call=lambda s, x: user_dao.create(
+            NewUser(email='explain@example.com', full_name='Explain'), session=s
+        ),
+        max_buffers=100,
+    ),
+    PlanCase(
+        name='user_get_by_email',
+        call=lambda s, x: user_dao.get_by_email(x['email'], session=s),
+        expect_indexes=('ix_users_email',),
+        forbid_seq_scan=('users',),
+        max_buffers=20,
+    ),
+    PlanCase(
+        name='user_hide',
+        call=lambda s, x: user_dao.hide(x['user_id'], session=s),
+        expect_indexes=('users_pkey',),
+        forbid_seq_scan=('users',),
+        max_buffers=50,
+    ),
+    PlanCase(
+        name='product_create',
+        call=lambda s, x: product_dao.create(NewProduct(name='Explain', price=1), session=s),
+        max_buffers=100,
+    ),
+    PlanCase(
+        # Полный список товаров — последовательное чтение здесь ожидаемо
+        name='product_get_all',
+        call=lambda s, x: product_dao.get_all(session=s),
+    ),
+    PlanCase(
+        # Проекция покрывается индексом — ожидается index-only scan
+        name='product_get_all_name_price',
+        call=lambda s, x: product_dao.get_all(session=s, fields=('name', 'price')),
+        expect_indexes=('idx_product_name_price',),
+    ),
+    PlanCase(
+        name='product_hide',
+        call=lambda s, x: product_dao.hide(x['product_id'], session=s),
+        expect_indexes=('products_pkey',),
+        forbid_seq_scan=('products',),
+        max_buffers=50,
+    ),
+    PlanCase(
+        name='order_create',
+        call=lambda s, x: order_dao.create(
+            NewOrder(user_id=x['user_id'], product_id=x['product_id']), session=s
+        ),
+        max_buffers=100,
+    ),
+    PlanCase(
+        name='order_get_by_user',
+        call=lambda s, x: order_dao.get_by_user(x['user_id'], session=s),
+        expect_indexes=('ix_orders_user_id', 'idx_order_user_id', 'idx_order_user_product'),
+        forbid_seq_scan=('orders',),
+        max_buffers=200,
+    ),
+    PlanCase(
+        name='order_get_by_user_product_id',
+        call=lambda s, x: order_dao.get_by_user(x['user_id'], session=s, fields=('product_id',)),
+        expect_indexes=('idx_order_user_product',),
+        forbid_seq_scan=('orders',),
+        max_buffers=200,
+    ),
+    PlanCase(
+        name='order_hide',
+        call=lambda s, x: order_dao.hide(x['order_id'], session=s),
+        expect_indexes=('orders_pkey',),
+        forbid_seq_scan=('orders',),
+        max_buffers=50,
+    ),
+]
+
+
+async def explain_case(
+    session: AsyncSession,
+    case: PlanCase,
+    sample: dict[str, Any]
+) -> list[PlanSummary]:
+    """
+    ## Выполняет кейс, перехватывает его SQL и снимает планы.
+
+    Каждый запрос и его `EXPLAIN ANALYZE` выполняются внутри savepoint,
+    который затем откатывается.
+
+    Args:
+        session: Асинхронная сессия БД.
+        case: Кейс проверки.
+        sample: Существующие строки из `_sample()`.
+
+    Returns:
+        list[PlanSummary]: Сводки планов в порядке выполнения запросов.
+    """
+    captured: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        if not statement.lstrip().upper().startswith('EXPLAIN'):
+            captured.append((statement, parameters))
+
+    savepoint = await session.begin_nested()
+    conn = await session.connection()
+    event.listen(conn.sync_connection, 'before_cursor_execute', capture)
+    try:
+        await case.call(session, sample)
+    finally:
+        event.remove(conn.sync_connection, 'before_cursor_execute', capture)
+        await savepoint.rollback()
+
+    plans = []
+    for statement, parameters in captured:
+        savepoint = await conn.begin_nested()
+        try:
+            res = await conn.exec_driver_sql(
+                f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}', parameters
+            )
+            plans.append(summarize_plan(statement, res.scalar_one()))
+        finally:
+            await savepoint.rollback()
+    return plans
+
+
+def check_case(
+    case: PlanCase,
+    plans: list[PlanSummary],
+    snapshot_dir: Path = SNAPSHOT_DIR,
+    update: bool = False,
+    write_missing: bool = False
+) -> CaseResult:
+    """
+    ## Проверяет планы кейса на ожидания и сравнивает со снимком.
+
+    Args:
+        case: Кейс проверки.
+        plans: Сводки планов из `explain_case()`.
+        snapshot_dir: Каталог со снимками.
+        update: Перезаписать снимок вместо сравнения. Без него отсутствующий
+            снимок — ошибка: базовые снимки хранятся в репозитории.
+        write_missing: Записать снимок, только если его ещё нет; существующие
+            снимки сравниваются как обычно (первичное создание базовых снимков).
+
+    Returns:
+        CaseResult: Результат с перечнем ошибок (пустой, если всё в порядке).
+    """
+    result = CaseResult(case=case.name, plans=plans)
+    used = {index for plan in plans for index in plan.indexes}
+    if case.expect_indexes and not used.intersection(case.expect_indexes):
+        result.errors.append(f'none of indexes {case.expect_indexes} used (used: {sorted(used)})')
+    for plan in plans:
+        for table in set(plan.seq_scans).intersection(case.forbid_seq_scan):
+            result.errors.append(f'Seq Scan on {table}: {plan.statement}')
+        if case.max_buffers is not None and plan.buffers > case.max_buffers:
+            result.errors.append(
+                f'buffers {plan.buffers} > budget {case.max_buffers}: {plan.statement}'
+            )
+
+    path = snapshot_dir / f'{case.name}.json'
+    current = [plan.snapshot() for plan in plans]
+    if update or (write_missing and not path.exists()):
+        result.snapshot_created = not path.exists()
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(current, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    elif not path.exists():
+        result.errors.append(f'no snapshot {path.name} (run with --write-missing and commit it)')
+    elif json.loads(path.read_text(encoding='utf-8')) != current:
+        result.errors.append(f'plan differs from snapshot {path.name}')
+    return result
+
+
+async def run_plan_checks(
+    db: DbConnection,
+    cases: Optional[list[PlanCase]] = None,
+    snapshot_dir: Path = SNAPSHOT_DIR,
+    update: bool = False,
+    write_missing: bool = False
+) -> list[CaseResult]:
+    """
+    ## Прогоняет все кейсы в одной транзакции и откатывает её.
+
+    Args:
+        db: Подключение к БД (с уже наполненными таблицами).
+        cases: Кейсы проверки (по умолчанию `DEFAULT_CASES`).
+        snapshot_dir: Каталог со снимками.
+        update: Перезаписать снимки.
+        write_missing: Записать только отсутствующие снимки.
+
+    Returns:
+        list[CaseResult]: Результаты по кейсам.
+    """
+    results = []
+    async with db.get_session() as session:
+        sample = await _sample(session)
+        for case in cases or DEFAULT_CASES:
+            plans = await explain_case(session, case, sample)
+            results.append(check_case(case, plans, snapshot_dir, update, write_missing))
+        await session.rollback()
+    return results
+
+
+# Публичный API модуля
+__all__ = [
+    'CaseResult',
+    'DEFAULT_CASES',
+    'PlanCase',
+    'PlanSummary',
+    'check_case',
+    'explain_case',
+    'run_plan_checks',
+    'seed',
+    'summarize_plan',
+    'vacuum',
+]
@@ -0,0 +1,17 @@
+"""Очередь фоновых задач на PostgreSQL для проекта SQLAlchemyExample."""
+
+from .queue import JOBS_CHANNEL, JobQueue, ORDERS_QUEUE, QueuedJob, job_queue
+from .worker import JobHandler, Worker, WorkerStats
+
+
+# Публичный API модуля
+__all__ = [
+    'JOBS_CHANNEL',
+    'JobHandler',
+    'JobQueue',
+    'ORDERS_QUEUE',
+    'QueuedJob',
+    'Worker',
+    'WorkerStats',
+    'job_queue',
+]
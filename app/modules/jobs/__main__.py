@@ -0,0 +1,81 @@
+"""Запуск воркера и обслуживание очереди задач.
+
+Запускать из корня:
+python -m app.modules.jobs work                    # воркер очереди orders (до Ctrl+C)
+python -m app.modules.jobs work --concurrency 8
+python -m app.modules.jobs status                  # задачи по статусам
+python -m app.modules.jobs dead                    # «мёртвые» задачи с ошибками
+python -m app.modules.jobs retry 17 42             # вернуть в очередь (без id — все)
+"""
+
+from argparse import ArgumentParser
+from asyncio import run
+
+from app.config.config_reader import env_config
+from app.database.connection import db_connection
+from app.modules.logging import get_logger, setup_logging
+
+from .queue import ORDERS_QUEUE, QueuedJob, job_queue
+from .worker import Worker
+
+
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+
+async def log_order(job: QueuedJob) -> None:
+    """
+    ## Обработчик-пример для очереди заказов: пишет заказ в лог.
+
+    Здесь выполняется работа, вынесенная из оформления заказа:
+    пересчёт агрегатов, уведомления, складские остатки.
+    """
+    logger.info(f"Заказ #{job.payload['id']}: попытка {job.attempts}, {job.payload}")
+
+
+async def main() -> None:
+    """
+    ## Разбирает аргументы и выполняет выбранную команду.
+    """
+    parser = ArgumentParser(description='Очередь фоновых задач')
+    parser.add_argument('--queue', default=ORDERS_QUEUE)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    work = commands.add_parser('work', help='запустить воркер')
+    work.add_argument('--concurrency', type=int, default=env_config.JOBS_CONCURRENCY)
+    work.add_argument('--batch-size', type=int, default=env_config.JOBS_BATCH_SIZE)
+    work.add_argument('--drain', action='store_true', help='завершиться, когда очередь опустеет')
+
+    commands.add_parser('status', help='задачи по статусам')
+    commands.add_parser('dead', help='«мёртвые» задачи')
+    retry = commands.add_parser('retry', help='вернуть «мёртвые» задачи в очередь')
+    retry.add_argument('ids', type=int, nargs='*')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'work':
+            worker = Worker(job_queue, args.queue, log_order, args.concurrency, args.batch_size)
+            logger.info(f"Воркер очереди {args.queue}: {args.concurrency} циклов по {args.batch_size} задач")
+            stats = await worker.run(drain=args.drain)
+            logger.info(
+                f"✓ Выполнено {stats.done}, ошибок {stats.failed}, в dead {stats.dead} "
+                f"({stats.jobs_per_second:.0f} задач/с)"
+            )
+        elif args.command == 'status':
+            logger.info(f"{args.queue}: {await job_queue.counts(args.queue)}")
+        elif args.command == 'dead':
+            for job in await job_queue.dead(args.queue):
+                logger.info(f"#{job.id} попыток {job.attempts}: {job.last_error} {job.payload}")
+        else:
+            count = await job_queue.retry_dead(args.queue, args.ids or None)
+            logger.info(f"✓ Возвращено в очередь: {count}")
+    finally:
+        await db_connection.db_close()
+
+
+
+if __name__ == "__main__":
+    run(main())
@@ -0,0 +1,321 @@
+"""Очередь фоновых задач в таблице `jobs` (PostgreSQL, `SKIP LOCKED`).
+
+Постановка — обычный `INSERT` в транзакции вызывающего кода плюс
+`pg_notify('jobs', <queue>)`: задача и уведомление появляются только
+после коммита, атомарно с заказом, ради которого задача создана.
+
+Выдача пачки — один запрос в короткой транзакции:
+
+    WITH batch AS (
+        SELECT id FROM jobs
+        WHERE queue = :queue AND status = 'ready' AND run_at <= now()
+          AND attempts < max_attempts
+        ORDER BY run_at, id LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE jobs SET attempts = attempts + 1, run_at = now() + :visibility_timeout
+    FROM batch WHERE jobs.id = batch.id
+    RETURNING ...
+
+Воркеры не мешают друг другу (`SKIP LOCKED`), а выданная задача невидима
+до истечения таймаута видимости. Подтверждение удаляет задачу, ошибка
+откладывает её с экспоненциальной паузой, после `max_attempts` попыток
+задача получает `status = 'dead'` (очередь «мёртвых» задач). Подтверждение
+и ошибка сверяют `attempts`: задачу, выданную повторно после таймаута,
+старая попытка уже не изменит. Гарантия — «хотя бы один раз».
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Iterable, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, literal_column, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.config_reader import env_config
+from app.database.admission import Priority
+from app.database.connection import DbConnection, db_connection
+from app.database.models import Job
+
+
+
+# Канал `NOTIFY`, payload — имя очереди
+JOBS_CHANNEL = 'jobs'
+# Очередь последующей обработки заказов (`OrderDAO.create(..., follow_up=ORDERS_QUEUE)`)
+ORDERS_QUEUE = 'orders'
+
+# Максимальная длина сохраняемого текста ошибки
+_ERROR_LIMIT = 2000
+# Литерал, а не параметр: иначе общий план подготовленного запроса
+# не сможет использовать частичный индекс `idx_job_ready`
+_READY = literal_column("'ready'")
+
+
+
+@dataclass
+class QueuedJob:
+    """
+    ## Задача, выданная воркеру.
+
+    Attributes:
+        id: ID задачи.
+        queue: Имя очереди.
+        payload: Данные задачи.
+        attempts: Номер текущей попытки (токен аренды для подтверждения).
+        max_attempts: Максимум попыток.
+        last_error: Ошибка предыдущей попытки.
+    """
+    id: int
+    queue: str
+    payload: dict[str, Any]
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+
+
+_RETURNING = (Job.id, Job.queue, Job.payload, Job.attempts, Job.max_attempts, Job.last_error)
+
+
+class JobQueue:
+    """
+    ## Операции над таблицей `jobs`.
+
+    Attributes:
+        db: Подключение к БД.
+        visibility_timeout: На сколько секунд выданная задача скрыта от других воркеров.
+        max_attempts: Число попыток по умолчанию для новых задач.
+        retry_delay: Пауза перед первым повтором, в секундах (дальше удваивается).
+    """
+
+    def __init__(self,
+        db: DbConnection,
+        visibility_timeout: float = env_config.JOBS_VISIBILITY_TIMEOUT,
+        max_attempts: int = env_config.JOBS_MAX_ATTEMPTS,
+        retry_delay: float = env_config.JOBS_RETRY_DELAY
+    ) -> None:
+        """
+        ## Инициализирует `JobQueue`.
+
+        Raises:
+            ValueError: Если `visibility_timeout` не больше 0 или `max_attempts` меньше 1.
+        """
+        if visibility_timeout <= 0:
+            raise ValueError('visibility_timeout must be > 0')
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be >= 1')
+        self.db = db
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    async def enqueue(self,
+        session: AsyncSession,
+        queue: str,
+        payload: dict[str, Any],
+        delay: float = 0.0,
+        max_attempts: Optional[int] = None
+    ) -> int:
+        """
+        ## Ставит задачу в очередь в транзакции сессии.
+
+        Коммит выполняет вызывающий код; до коммита задача невидима воркерам,
+        при откате исчезает вместе с остальными изменениями транзакции.
+
+        Args:
+            session: Асинхронная сессия БД (например, та же, что у `OrderDAO.create`).
+            queue: Имя очереди.
+            payload: JSON-сериализуемые данные задачи.
+            delay: Через сколько секунд задача станет доступной.
+            max_attempts: Число попыток (по умолчанию — `self.max_attempts`).
+
+        Returns:
+            int: ID задачи.
+        """
+        return (await self.enqueue_many(session, queue, [payload], delay, max_attempts))[0]
+
+    async def enqueue_many(self,
+        session: AsyncSession,
+        queue: str,
+        payloads: Iterable[dict[str, Any]],
+        delay: float = 0.0,
+        max_attempts: Optional[int] = None
+    ) -> list[int]:
+        """
+        ## Ставит много задач одним `INSERT` и одним `NOTIFY`.
+
+        Returns:
+            list[int]: ID задач в порядке `payloads`.
+        """
+        rows = [
+            {'queue': queue, 'payload': payload, 'max_attempts': max_attempts or self.max_attempts}
+            for payload in payloads
+        ]
+        if not rows:
+            return []
+        stmt = insert(Job).returning(Job.id, sort_by_parameter_order=True)
+        if delay:
+            stmt = stmt.values(run_at=func.now() + timedelta(seconds=delay))
+        res = await session.execute(stmt, rows)
+        ids = list(res.scalars())
+        await session.execute(select(func.pg_notify(JOBS_CHANNEL, queue)))
+        return ids
+
+    async def dequeue(self, queue: str, limit: int) -> list[QueuedJob]:
+        """
+        ## Выдаёт до `limit` доступных задач (отдельная короткая транзакция).
+
+        Returns:
+            list[QueuedJob]: Выданные задачи (пустой список — очередь пуста).
+        """
+        batch = (
+            select(Job.id)
+            .where(
+                Job.queue == queue,
+                Job.status == _READY,
+                Job.run_at <= func.now(),
+                Job.attempts < Job.max_attempts,
+            )
+            .order_by(Job.run_at, Job.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte('batch')
+        )
+        stmt = (
+            update(Job)
+            .where(Job.id == batch.c.id)
+            .values(
+                attempts=Job.attempts + 1,
+                run_at=func.now() + timedelta(seconds=self.visibility_timeout),
+            )
+            .returning(*_RETURNING)
+        )
+        async with self.db.get_session(Priority.BACKGROUND) as session:
+            res = await session.execute(stmt)
+            jobs = [QueuedJob(*row) for row in res]
+            await session.commit()
+        return jobs
+
+    async def complete(self, jobs: Sequence[QueuedJob]) -> int:
+        """
+        ## Подтверждает выполнение: удаляет задачи одним запросом.
+
+        Returns:
+            int: Сколько задач удалено (меньше `len(jobs)`, если аренда истекла
+                и задача уже выдана повторно).
+        """
+        if not jobs:
+            return 0
+        stmt = delete(Job).where(
+            tuple_(Job.id, Job.attempts).in_([(job.id, job.attempts) for job in jobs])
+        )
+        async with self.db.get_session(Priority.BACKGROUND) as session:
+            res = await session.execute(stmt)
+            await session.commit()
+        return res.rowcount
+
+    async def fail(self, job: QueuedJob, error: str) -> bool:
+        """
+        ## Отмечает неудачную попытку: откладывает задачу или переносит в `dead`.
+
+        Пауза перед повтором — `retry_delay * 2 ** (attempts - 1)`. Если задачу
+        уже выдали повторно (аренда истекла, `attempts` изменился) или
+        удалили, запрос ничего не меняет.
+
+        Returns:
+            bool: `True`, если этот вызов перенёс задачу в `dead`.
+        """
+        dead = job.attempts >= job.max_attempts
+        delay = self.retry_delay * 2 ** (job.attempts - 1)
+        stmt = (
+            update(Job)
+            .where(Job.id == job.id, Job.attempts == job.attempts)
+            .values(
+                status='dead' if dead else 'ready',
+                run_at=func.now() + timedelta(seconds=delay),
+                last_error=error[:_ERROR_LIMIT],
+            )
+        )
+        async with self.db.get_session(Priority.BACKGROUND) as session:
+            res = await session.execute(stmt)
+            await session.commit()
+        return dead and res.rowcount > 0
+
+    async def reap(self, queue: str) -> int:
+        """
+        ## Переносит в `dead` задачи, чья последняя аренда истекла без подтверждения.
+
+        Такие задачи (воркер упал или завис на последней попытке)
+        `dequeue` уже не выдаёт.
+
+        Returns:
+            int: Сколько задач перенесено.
+        """
+        stmt = (
+            update(Job)
+            .where(
+                Job.queue == queue,
+                Job.status == _READY,
+                Job.run_at <= func.now(),
+                Job.attempts >= Job.max_attempts,
+            )
+            .values(status='dead', last_error=func.coalesce(Job.last_error, 'visibility timeout expired'))
+        )
+        async with self.db.get_session(Priority.BACKGROUND) as session:
+            res = await session.execute(stmt)
+            await session.commit()
+        return res.rowcount
+
+    async def dead(self, queue: str, limit: int = 100) -> list[QueuedJob]:
+        """
+        ## Задачи очереди «мёртвых» задач, по возрастанию `id`.
+        """
+        query = (
+            select(*_RETURNING)
+            .where(Job.queue == queue, Job.status == 'dead')
+            .order_by(Job.id)
+            .limit(limit)
+        )
+        async with self.db.get_session(Priority.BACKGROUND) as session:
+            res = await session.execute(query)
+            return [QueuedJob(*row) for row in res]
+
+    async def retry_dead(self, queue: str, ids: Optional[Sequence[int]] = None) -> int:
+        """
+        ## Возвращает «мёртвые» задачи в очередь с обнулёнными попытками.
+
+        Args:
+            queue: Имя очереди.
+            ids: ID задач (`None` — все «мёртвые» задачи очереди).
+
+        Returns:
+            int: Сколько задач возвращено.
+        """
+        stmt = (
+            update(Job)
+            .where(Job.queue == queue, Job.status == 'dead')
+            .values(status='ready', attempts=0, run_at=func.now())
+        )
+        if ids is not None:
+            stmt = stmt.where(Job.id.in_(ids))
+        async with self.db.get_session(Priority.BACKGROUND) as session:
+            res = await session.execute(stmt)
+            await session.execute(select(func.pg_notify(JOBS_CHANNEL, queue)))
+            await session.commit()
+        return res.rowcount
+
+    async def counts(self, queue: str) -> dict[str, int]:
+        """
+        ## Число задач очереди по статусам (`ready` включает выданные воркерам).
+        """
+        query = select(Job.status, func.count()).where(Job.queue == queue).group_by(Job.status)
+        async with self.db.get_session(Priority.BACKGROUND) as session:
+            res = await session.execute(query)
+            return {status: count for status, count in res}
+
+
+# Глобальная очередь для основного подключения
+job_queue = JobQueue(db_connection)
+
+
+# Публичный API модуля
+__all__ = ['JOBS_CHANNEL', 'JobQueue', 'ORDERS_QUEUE', 'QueuedJob', 'job_queue']
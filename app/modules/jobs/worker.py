@@ -0,0 +1,200 @@
+"""Воркер очереди задач: `concurrency` циклов выдачи поверх `DbConnection`.
+
+Воркер держит одно соединение с `LISTEN jobs` (оно занимает разрешение
+контроля допуска, см. `DbConnection.open_listener`) и просыпается по `NOTIFY`
+своей очереди, а без уведомлений проверяет очередь раз в `poll_interval`
+секунд (задачи с отложенным `run_at`, истёкшие аренды) и переносит
+в `dead` задачи, у которых последняя аренда истекла.
+
+Каждый цикл берёт пачку через `JobQueue.dequeue`, выполняет задачи
+по очереди и подтверждает успешные одним запросом. На каждую задачу
+отводится остаток таймаута видимости пачки: задачи, на которые времени
+не хватило, не выполняются и вернутся в очередь после истечения аренды.
+"""
+
+from asyncio import Event, TaskGroup, wait_for
+from dataclasses import dataclass
+from time import monotonic, perf_counter
+from typing import Awaitable, Callable
+
+from app.config.config_reader import env_config
+from app.modules.logging import get_logger
+
+from .queue import JOBS_CHANNEL, JobQueue, QueuedJob
+
+
+
+logger = get_logger(__name__)
+
+# Обработчик задачи; исключение — неудачная попытка
+JobHandler = Callable[[QueuedJob], Awaitable[None]]
+
+
+
+@dataclass
+class WorkerStats:
+    """
+    ## Итоги работы воркера.
+
+    Attributes:
+        done: Сколько задач выполнено и подтверждено.
+        failed: Сколько попыток завершилось ошибкой.
+        dead: Сколько задач ушло в `dead`.
+        seconds: Длительность работы.
+    """
+    done: int = 0
+    failed: int = 0
+    dead: int = 0
+    seconds: float = 0.0
+
+    @property
+    def jobs_per_second(self) -> float:
+        """
+        ## Пропускная способность, задач в секунду.
+        """
+        return self.done / self.seconds if self.seconds else 0.0
+
+
+class Worker:
+    """
+    ## Воркер одной очереди.
+
+    Attributes:
+        queue: Очередь задач (`JobQueue`).
+        name: Имя обслуживаемой очереди.
+        handler: Обработчик задачи.
+        concurrency: Число параллельных циклов выдачи.
+        batch_size: Сколько задач цикл берёт за один запрос.
+        poll_interval: Проверка очереди без уведомлений, в секундах.
+        stats: Итоги текущего или последнего запуска.
+    """
+
+    def __init__(self,
+        queue: JobQueue,
+        name: str,
+        handler: JobHandler,
+        concurrency: int = env_config.JOBS_CONCURRENCY,
+        batch_size: int = env_config.JOBS_BATCH_SIZE,
+        poll_interval: float = env_config.JOBS_POLL_INTERVAL
+    ) -> None:
+        """
+        ## Инициализирует `Worker`.
+
+        Raises:
+            ValueError: Если `concurrency` или `batch_size` меньше 1.
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be >= 1')
+        if batch_size < 1:
+            raise ValueError('batch_size must be >= 1')
+        self.queue = queue
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stats = WorkerStats()
+        self._wakes: list[Event] = []
+        self._stopping = False
+
+    def _on_notify(self, channel: str, payload: str) -> None:
+        """
+        ## Колбэк `NOTIFY`: будит циклы, если задача пришла в эту очередь.
+
+        У каждого цикла своё событие: цикл сбрасывает только его, поэтому
+        уведомление не теряется для цикла, который ещё не дошёл до ожидания.
+        """
+        if payload == self.name:
+            for wake in self._wakes:
+                wake.set()
+
+    def stop(self) -> None:
+        """
+        ## Просит циклы завершиться после текущей пачки.
+        """
+        self._stopping = True
+        for wake in self._wakes:
+            wake.set()
+
+    async def _process(self, jobs: list[QueuedJob]) -> None:
+        """
+        ## Выполняет пачку и подтверждает успешные задачи.
+        """
+        deadline = monotonic() + self.queue.visibility_timeout
+        done = []
+        for job in jobs:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await wait_for(self.handler(job), remaining)
+            except Exception as exc:
+                self.stats.failed += 1
+                error = 'visibility timeout exceeded' if isinstance(exc, TimeoutError) else repr(exc)
+                if await self.queue.fail(job, error):
+                    self.stats.dead += 1
+                    logger.error(f'Задача {job.queue}#{job.id} перенесена в dead: {error}')
+            else:
+                done.append(job)
+        completed = await self.queue.complete(done)
+        self.stats.done += completed
+
+    async def _loop(self, drain: bool, wake: Event) -> None:
+        """
+        ## Цикл выдачи: берёт пачки, пока очередь не пуста, затем ждёт `NOTIFY`.
+
+        Args:
+            drain: Завершиться, когда доступных задач не осталось.
+            wake: Событие этого цикла, его выставляют `NOTIFY` и `stop()`.
+        """
+        while not self._stopping:
+            wake.clear()
+            jobs = await self.queue.dequeue(self.name, self.batch_size)
+            if jobs:
+                await self._process(jobs)
+                continue
+            if drain:
+                return
+            try:
+                await wait_for(wake.wait(), self.poll_interval)
+            except TimeoutError:
+                reaped = await self.queue.reap(self.name)
+                if reaped:
+                    self.stats.dead += reaped
+                    logger.error(f'{self.name}: {reaped} задач с истёкшей арендой перенесено в dead')
+
+    async def run(self, drain: bool = False) -> WorkerStats:
+        """
+        ## Обрабатывает задачи до `stop()` (или до опустошения очереди при `drain=True`).
+
+        Args:
+            drain: Завершиться, когда доступных задач не осталось (для бенчмарков и скриптов).
+
+        Returns:
+            WorkerStats: Итоги запуска.
+        """
+        self.stats = WorkerStats()
+        self._stopping = False
+        self._wakes = [Event() for _ in range(self.concurrency)]
+        db = self.queue.db
+        started = perf_counter()
+        listener = await db.open_listener()
+        try:
+            raw = await db.driver.raw_connection(listener)
+            await db.driver.listen(raw, JOBS_CHANNEL, self._on_notify)
+            try:
+                async with TaskGroup() as group:
+                    for wake in self._wakes:
+                        group.create_task(self._loop(drain, wake))
+            except ExceptionGroup as errors:
+                raise errors.exceptions[0]
+            finally:
+                await db.driver.unlisten(raw, JOBS_CHANNEL, self._on_notify)
+        finally:
+            await db.close_listener(listener)
+            self.stats.seconds = perf_counter() - started
+        return self.stats
+
+
+# Публичный API модуля
+__all__ = ['JobHandler', 'Worker', 'WorkerStats']
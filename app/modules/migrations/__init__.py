@@ -0,0 +1,29 @@
+"""Онлайн-миграции схемы для проекта SQLAlchemyExample."""
+
+from .autogenerate import diff_schema
+from .operations import (
+    Backfill,
+    CreateIndex,
+    DropIndex,
+    Execute,
+    MigrationContext,
+    Operation,
+    StepReport,
+)
+from .runner import Migration, MigrationRunner, load_migrations
+
+
+# Публичный API модуля
+__all__ = [
+    'Backfill',
+    'CreateIndex',
+    'DropIndex',
+    'Execute',
+    'Migration',
+    'MigrationContext',
+    'MigrationRunner',
+    'Operation',
+    'StepReport',
+    'diff_schema',
+    'load_migrations',
+]
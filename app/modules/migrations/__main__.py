@@ -0,0 +1,78 @@
+"""Управление онлайн-миграциями схемы.
+
+Запускать из корня:
+python -m app.modules.migrations status
+python -m app.modules.migrations upgrade              # все невыполненные шаги
+python -m app.modules.migrations upgrade --to 0002
+python -m app.modules.migrations generate "orders: индекс по quantity"
+"""
+
+import sys
+from argparse import ArgumentParser
+from asyncio import run
+
+from app.database.connection import db_connection
+from app.modules.logging import get_logger, setup_logging
+
+from .operations import StepReport
+from .runner import MigrationRunner
+
+
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+
+def log_report(reports: list[StepReport]) -> None:
+    """
+    ## Выводит отпечаток блокировок по шагам.
+    """
+    for report in reports:
+        locks = ', '.join(f'{table}: {mode}' for table, mode in report.locks.items()) or '—'
+        marker = '✗ блокирует запись' if report.blocks_writes else '✓ запись не блокируется'
+        logger.info(
+            f"{report.step}\n"
+            f"     блокировки: {locks} ({marker})\n"
+            f"     удержание: {report.lock_held:.3f} с, всего {report.seconds:.2f} с, "
+            f"транзакций {report.batches}, строк {report.rows}, повторов {report.retries}"
+        )
+
+
+async def main() -> int:
+    """
+    ## Разбирает команду и выполняет её.
+
+    Returns:
+        int: Код выхода.
+    """
+    parser = ArgumentParser(description='Онлайн-миграции схемы')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help='показать применённые миграции')
+    upgrade = commands.add_parser('upgrade', help='применить миграции')
+    upgrade.add_argument('--to', default=None, help='последняя применяемая версия')
+    generate = commands.add_parser('generate', help='сгенерировать миграцию по моделям')
+    generate.add_argument('name', help='описание миграции')
+    args = parser.parse_args()
+
+    runner = MigrationRunner(db_connection.engine)
+    try:
+        if args.command == 'status':
+            for migration, done in await runner.status():
+                state = '✓' if done == len(migration.steps) else f'{done}/{len(migration.steps)}'
+                logger.info(f"{migration.revision} {state} {migration.name}")
+        elif args.command == 'upgrade':
+            reports = await runner.upgrade(args.to)
+            log_report(reports)
+            logger.info(f"✓ Выполнено шагов: {len(reports)}")
+        else:
+            path = await runner.generate(args.name)
+            logger.info(f"✓ Создан {path}" if path else "✓ Схема соответствует моделям")
+    finally:
+        await db_connection.db_close()
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
@@ -0,0 +1,161 @@
+"""Генерация шагов миграции по расхождению `metadata_obj` и живой схемы.
+
+Правила генерации (только добавление — удаления пишутся вручную):
+    - новая таблица — `CREATE TABLE` и её индексы в транзакции
+      (таблица пустая, блокировка мгновенная);
+    - новая колонка:
+        * допускает NULL или имеет серверное / скалярное значение по умолчанию —
+          один `ADD COLUMN` (в PostgreSQL 11+ без перезаписи таблицы);
+        * `NOT NULL` без значения по умолчанию — `ADD COLUMN` без ограничения,
+          `Backfill` с `assignments=None` (выражение дописывается вручную,
+          раннер не выполнит шаг без него) и `NOT NULL` через
+          `CHECK ... NOT VALID` + `VALIDATE CONSTRAINT`, чтобы проверка строк
+          шла без блокировки записи; `CHECK` добавляется и удаляется
+          идемпотентно, и прерванную миграцию можно запустить повторно;
+    - новый индекс существующей таблицы — `CREATE INDEX CONCURRENTLY`.
+"""
+
+from sqlalchemy import Column, Connection, Index, MetaData, Table, inspect, literal
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateColumn, CreateIndex as CreateIndexDDL, CreateTable
+
+from app.database.models import metadata_obj
+
+from .operations import Backfill, CreateIndex, Execute, Operation
+
+
+
+_dialect = postgresql.dialect()
+
+
+
+def _compile(ddl) -> str:
+    """
+    ## Компилирует DDL-конструкцию под диалект PostgreSQL.
+    """
+    sql = str(ddl.compile(dialect=_dialect)).strip().replace('\t', '    ')
+    return '\n'.join(line.rstrip() for line in sql.splitlines())
+
+
+def _index_where(index: Index) -> str | None:
+    """
+    ## Условие частичного индекса (`postgresql_where`) в виде SQL.
+    """
+    where = index.dialect_options['postgresql'].get('where')
+    if where is None:
+        return None
+    return str(where.compile(dialect=_dialect, compile_kwargs={'literal_binds': True}))
+
+
+def _add_table(table: Table) -> list[Operation]:
+    """
+    ## Шаги создания новой таблицы вместе с индексами.
+    """
+    steps: list[Operation] = [
+        Execute(_compile(CreateTable(table, if_not_exists=True)), note=f'CREATE TABLE {table.name}')
+    ]
+    for index in sorted(table.indexes, key=lambda ix: ix.name):
+        steps.append(Execute(
+            _compile(CreateIndexDDL(index, if_not_exists=True)),
+            note=f'CREATE INDEX {index.name} ON {table.name} (новая таблица)',
+        ))
+    return steps
+
+
+def _add_column(table: Table, column: Column) -> list[Operation]:
+    """
+    ## Шаги добавления колонки без перезаписи и долгой блокировки таблицы.
+    """
+    spec = _compile(CreateColumn(column))
+    add = f'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {spec}'
+
+    if column.nullable or column.server_default is not None:
+        return [Execute(add, note=f'ADD COLUMN {table.name}.{column.name}')]
+
+    default = column.default
+    if default is not None and default.is_scalar:
+        value = str(literal(default.arg, column.type).compile(
+            dialect=_dialect, compile_kwargs={'literal_binds': True}
+        ))
+        return [
+            Execute(f'{add} DEFAULT {value}', note=f'ADD COLUMN {table.name}.{column.name}'),
+            Execute(
+                f'ALTER TABLE {table.name} ALTER COLUMN {column.name} DROP DEFAULT',
+                note=f'DROP DEFAULT {table.name}.{column.name}',
+            ),
+        ]
+
+    check = f'{table.name}_{column.name}_not_null'
+    nullable_spec = spec.replace(' NOT NULL', '')
+    return [
+        Execute(
+            f'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {nullable_spec}',
+            note=f'ADD COLUMN {table.name}.{column.name} (пока NULL)',
+        ),
+        Backfill(table.name, None, f'{column.name} IS NULL'),
+        Execute(
+            f"DO $$ BEGIN\n"
+            f"    IF NOT EXISTS (\n"
+            f"        SELECT 1 FROM pg_constraint\n"
+            f"        WHERE conname = '{check}' AND conrelid = '{table.name}'::regclass\n"
+            f"    ) THEN\n"
+            f"        ALTER TABLE {table.name} ADD CONSTRAINT {check}\n"
+            f"            CHECK ({column.name} IS NOT NULL) NOT VALID;\n"
+            f"    END IF;\n"
+            f"END $$",
+            note=f'CHECK {check} NOT VALID',
+        ),
+        Execute(
+            f'ALTER TABLE {table.name} VALIDATE CONSTRAINT {check}',
+            note=f'VALIDATE {check} (SHARE UPDATE EXCLUSIVE)',
+        ),
+        Execute(
+            f'ALTER TABLE {table.name} ALTER COLUMN {column.name} SET NOT NULL',
+            note=f'SET NOT NULL {table.name}.{column.name} (по проверенному CHECK)',
+        ),
+        Execute(f'ALTER TABLE {table.name} DROP CONSTRAINT IF EXISTS {check}', note=f'DROP {check}'),
+    ]
+
+
+def diff_schema(connection: Connection, metadata: MetaData = metadata_obj) -> list[Operation]:
+    """
+    ## Сравнивает модели с живой схемой и строит недостающие шаги.
+
+    Вызывается через `await conn.run_sync(diff_schema)`.
+
+    Args:
+        connection: Синхронное соединение (внутри `run_sync`).
+        metadata: Метаданные моделей.
+
+    Returns:
+        list[Operation]: Шаги миграции (пустой список — схема актуальна).
+    """
+    inspector = inspect(connection)
+    existing = set(inspector.get_table_names())
+    steps: list[Operation] = []
+
+    for table in metadata.sorted_tables:
+        if table.name not in existing:
+            steps.extend(_add_table(table))
+            continue
+
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                steps.extend(_add_column(table, column))
+
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name not in indexes:
+                steps.append(CreateIndex(
+                    index.name,
+                    table.name,
+                    tuple(column.name for column in index.columns),
+                    unique=bool(index.unique),
+                    where=_index_where(index),
+                ))
+    return steps
+
+
+# Публичный API модуля
+__all__ = ['diff_schema']
@@ -0,0 +1,416 @@
+"""Шаги онлайн-миграций схемы.
+
+Каждый шаг знает, как выполниться, не останавливая запись в таблицы:
+    - `Execute` — короткий DDL в транзакции с `lock_timeout`: если блокировку
+      не удалось получить быстро, транзакция откатывается и повторяется,
+      а не выстраивает очередь из пользовательских запросов за собой;
+    - `CreateIndex` / `DropIndex` — `CREATE / DROP INDEX CONCURRENTLY` вне
+      транзакции (блокировка `SHARE UPDATE EXCLUSIVE` запись не блокирует);
+    - `Backfill` — заполнение колонки пачками, каждая в своей транзакции,
+      с паузой между пачками.
+
+После выполнения шаг возвращает `StepReport` с отпечатком блокировок.
+"""
+
+from abc import ABC, abstractmethod
+from asyncio import sleep
+from dataclasses import dataclass, field
+from textwrap import indent
+from time import perf_counter
+from typing import Optional
+
+from sqlalchemy import Row, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.config_reader import env_config
+
+
+
+# SQLSTATE `lock_not_available` — сработал `lock_timeout`
+LOCK_NOT_AVAILABLE = '55P03'
+
+# Режимы блокировки таблицы, конфликтующие с INSERT / UPDATE / DELETE
+WRITE_BLOCKING_LOCKS = frozenset({
+    'ShareLock',
+    'ShareRowExclusiveLock',
+    'ExclusiveLock',
+    'AccessExclusiveLock',
+})
+
+# Блокировки таблиц, взятые текущей транзакцией (без системного каталога)
+_OWN_LOCKS = text("""
+    SELECT c.relname, l.mode
+    FROM pg_locks l
+    JOIN pg_class c ON c.oid = l.relation
+    WHERE l.pid = pg_backend_pid()
+      AND l.locktype = 'relation'
+      AND c.relnamespace <> 'pg_catalog'::regnamespace
+      AND c.relkind IN ('r', 'p')
+""")
+
+
+
+@dataclass
+class MigrationContext:
+    """
+    ## Параметры выполнения шагов миграции.
+
+    Attributes:
+        engine: Асинхронный движок SQLAlchemy.
+        lock_timeout: Сколько транзакционный шаг ждёт блокировку, в секундах.
+        lock_retries: Сколько раз повторить шаг после `lock_timeout`.
+    """
+    engine: AsyncEngine
+    lock_timeout: float = env_config.MIGRATION_LOCK_TIMEOUT
+    lock_retries: int = env_config.MIGRATION_LOCK_RETRIES
+
+
+@dataclass
+class StepReport:
+    """
+    ## Отпечаток блокировок одного шага миграции.
+
+    Attributes:
+        step: Описание шага.
+        locks: Таблица -> режим блокировки, удерживаемой шагом.
+        blocks_writes: Блокировал ли шаг запись хотя бы в одну таблицу.
+        seconds: Длительность шага.
+        lock_held: Сколько секунд блокировка удерживалась непрерывно
+            (для пачек — максимум по пачкам).
+        rows: Затронуто строк (для `Backfill`).
+        batches: Число транзакций (пачек) шага.
+        retries: Повторы из-за `lock_timeout`.
+    """
+    step: str
+    locks: dict[str, str] = field(default_factory=dict)
+    blocks_writes: bool = False
+    seconds: float = 0.0
+    lock_held: float = 0.0
+    rows: int = 0
+    batches: int = 0
+    retries: int = 0
+
+    def add_locks(self, locks: dict[str, str]) -> None:
+        """
+        ## Добавляет наблюдённые блокировки и обновляет `blocks_writes`.
+        """
+        self.locks.update(locks)
+        self.blocks_writes = any(mode in WRITE_BLOCKING_LOCKS for mode in self.locks.values())
+
+
+def _is_lock_timeout(error: DBAPIError) -> bool:
+    """
+    ## Прервана ли операция по `lock_timeout`.
+    """
+    return getattr(error.orig, 'sqlstate', None) == LOCK_NOT_AVAILABLE
+
+
+def _strongest(rows) -> dict[str, str]:
+    """
+    ## Сворачивает строки `pg_locks` в «таблица -> сильнейший режим».
+    """
+    order = [
+        'AccessShareLock', 'RowShareLock', 'RowExclusiveLock', 'ShareUpdateExclusiveLock',
+        'ShareLock', 'ShareRowExclusiveLock', 'ExclusiveLock', 'AccessExclusiveLock',
+    ]
+    locks: dict[str, str] = {}
+    for relname, mode in rows:
+        current = locks.get(relname)
+        if current is None or order.index(mode) > order.index(current):
+            locks[relname] = mode
+    return locks
+
+
+async def run_in_transaction(
+    ctx: MigrationContext,
+    report: StepReport,
+    statement: str,
+    params: Optional[dict] = None
+) -> list[Row]:
+    """
+    ## Выполняет SQL в отдельной транзакции с `lock_timeout` и повторами.
+
+    Перед коммитом из `pg_locks` читаются блокировки транзакции —
+    это фактический отпечаток шага.
+
+    Args:
+        ctx: Параметры выполнения.
+        report: Отчёт шага (дополняется блокировками, пачками и повторами).
+        statement: SQL-выражение (одно).
+        params: Параметры выражения.
+
+    Raises:
+        DBAPIError: Если блокировку не удалось получить за все повторы.
+
+    Returns:
+        list[Row]: Строки результата (пустой список, если выражение их не возвращает).
+    """
+    for attempt in range(ctx.lock_retries + 1):
+        try:
+            started = perf_counter()
+            async with ctx.engine.begin() as conn:
+                await conn.execute(text(f"SET LOCAL lock_timeout = '{int(ctx.lock_timeout * 1000)}ms'"))
+                result = await conn.execute(text(statement), params)
+                rows = list(result.all()) if result.returns_rows else []
+                report.add_locks(_strongest(await conn.execute(_OWN_LOCKS)))
+            report.lock_held = max(report.lock_held, perf_counter() - started)
+            report.batches += 1
+            return rows
+        except DBAPIError as error:
+            if not _is_lock_timeout(error) or attempt == ctx.lock_retries:
+                raise
+            report.retries += 1
+            await sleep(min(2 ** attempt * 0.1, 5.0))
+    return []
+
+
+async def run_autocommit(ctx: MigrationContext, statements: list[str]) -> None:
+    """
+    ## Выполняет SQL вне транзакции (для `... CONCURRENTLY`).
+
+    Args:
+        ctx: Параметры выполнения.
+        statements: SQL-выражения.
+    """
+    async with ctx.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        for statement in statements:
+            await conn.execute(text(statement))
+
+
+class Operation(ABC):
+    """
+    ## Базовый шаг миграции.
+
+    Attributes:
+        lock: Режим блокировки, который шаг берёт на таблицу
+            (для шагов вне транзакции — по документации PostgreSQL).
+    """
+    lock: str = 'AccessExclusiveLock'
+
+    @abstractmethod
+    def describe(self) -> str:
+        """
+        ## Короткое описание шага для отчёта.
+        """
+
+    @abstractmethod
+    def render(self) -> str:
+        """
+        ## Python-код шага для файла миграции.
+        """
+
+    @abstractmethod
+    async def apply(self, ctx: MigrationContext) -> StepReport:
+        """
+        ## Выполняет шаг и возвращает отпечаток блокировок.
+        """
+
+
+@dataclass
+class Execute(Operation):
+    """
+    ## Короткий DDL в транзакции (`CREATE TABLE`, `ADD COLUMN` без перезаписи таблицы).
+
+    Attributes:
+        sql: SQL-выражение (одно).
+        note: Пояснение для отчёта.
+    """
+    sql: str
+    note: str = ''
+
+    def describe(self) -> str:
+        return self.note or ' '.join(self.sql.split())[:80]
+
+    def render(self) -> str:
+        note = f', note={self.note!r}' if self.note else ''
+        sql = indent(self.sql.strip(), ' ' * 8)
+        return f'Execute("""\n{sql}\n    """{note})'
+
+    async def apply(self, ctx: MigrationContext) -> StepReport:
+        report = StepReport(self.describe())
+        started = perf_counter()
+        await run_in_transaction(ctx, report, self.sql)
+        report.seconds = perf_counter() - started
+        return report
+
+
+@dataclass
+class CreateIndex(Operation):
+    """
+    ## `CREATE INDEX CONCURRENTLY` вне транзакции.
+
+    Если предыдущая попытка была прервана, PostgreSQL оставляет невалидный
+    индекс с тем же именем — он удаляется (`DROP INDEX CONCURRENTLY`)
+    и строится заново.
+
+    Attributes:
+        name: Имя индекса.
+        table: Имя таблицы.
+        columns: Колонки индекса.
+        unique: Уникальный индекс.
+        where: Условие частичного индекса.
+    """
+    name: str
+    table: str
+    columns: tuple[str, ...]
+    unique: bool = False
+    where: Optional[str] = None
+    lock: str = field(default='ShareUpdateExclusiveLock', init=False, repr=False)
+
+    def describe(self) -> str:
+        return f'CREATE INDEX CONCURRENTLY {self.name} ON {self.table}'
+
+    def render(self) -> str:
+        args = [repr(self.name), repr(self.table), repr(tuple(self.columns))]
+        if self.unique:
+            args.append('unique=True')
+        if self.where:
+            args.append(f'where={self.where!r}')
+        return f"CreateIndex({', '.join(args)})"
+
+    def sql(self) -> str:
+        """
+        ## Текст `CREATE INDEX CONCURRENTLY`.
+        """
+        unique = 'UNIQUE ' if self.unique else ''
+        where = f' WHERE {self.where}' if self.where else ''
+        return (
+            f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {self.name} "
+            f"ON {self.table} ({', '.join(self.columns)}){where}"
+        )
+
+    async def apply(self, ctx: MigrationContext) -> StepReport:
+        report = StepReport(self.describe())
+        report.add_locks({self.table: self.lock})
+        started = perf_counter()
+        async with ctx.engine.connect() as conn:
+            valid = (await conn.execute(
+                text('SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)'),
+                {'name': self.name},
+            )).scalar_one_or_none()
+        statements = [self.sql()]
+        if valid is False:
+            statements.insert(0, f'DROP INDEX CONCURRENTLY IF EXISTS {self.name}')
+        await run_autocommit(ctx, statements)
+        report.seconds = report.lock_held = perf_counter() - started
+        report.batches = len(statements)
+        return report
+
+
+@dataclass
+class DropIndex(Operation):
+    """
+    ## `DROP INDEX CONCURRENTLY` вне транзакции.
+
+    Attributes:
+        name: Имя индекса.
+        table: Имя таблицы (для отчёта).
+    """
+    name: str
+    table: str
+    lock: str = field(default='ShareUpdateExclusiveLock', init=False, repr=False)
+
+    def describe(self) -> str:
+        return f'DROP INDEX CONCURRENTLY {self.name}'
+
+    def render(self) -> str:
+        return f'DropIndex({self.name!r}, {self.table!r})'
+
+    async def apply(self, ctx: MigrationContext) -> StepReport:
+        report = StepReport(self.describe())
+        report.add_locks({self.table: self.lock})
+        started = perf_counter()
+        await run_autocommit(ctx, [f'DROP INDEX CONCURRENTLY IF EXISTS {self.name}'])
+        report.seconds = report.lock_held = perf_counter() - started
+        report.batches = 1
+        return report
+
+
+@dataclass
+class Backfill(Operation):
+    """
+    ## Заполнение колонки пачками по первичному ключу.
+
+    Каждая пачка — отдельная транзакция:
+
+        UPDATE <table> SET <assignments>
+        WHERE id IN (
+            SELECT id FROM <table> WHERE (<where>) AND id > :after
+            ORDER BY id LIMIT :batch_size FOR UPDATE
+        )
+        RETURNING id
+
+    Строки блокируются только на время пачки, между пачками — пауза `throttle`.
+
+    Attributes:
+        table: Имя таблицы.
+        assignments: Правая часть `SET` (`hidden_at = now()`). `None` — выражение
+            ещё не написано (так генерирует `diff_schema`), шаг не выполняется.
+        where: Какие строки ещё нужно заполнить (`hidden_at IS NULL AND is_hidden`).
+        batch_size: Размер пачки.
+        throttle: Пауза между пачками, в секундах.
+    """
+    table: str
+    assignments: Optional[str]
+    where: str
+    batch_size: int = env_config.MIGRATION_BACKFILL_BATCH_SIZE
+    throttle: float = env_config.MIGRATION_BACKFILL_THROTTLE
+    lock: str = field(default='RowExclusiveLock', init=False, repr=False)
+
+    def describe(self) -> str:
+        return f'BACKFILL {self.table} SET {self.assignments or "<не задано>"}'
+
+    def render(self) -> str:
+        return f'Backfill({self.table!r}, assignments={self.assignments!r}, where={self.where!r})'
+
+    def sql(self) -> str:
+        """
+        ## Текст запроса одной пачки.
+        """
+        return (
+            f"WITH moved AS ("
+            f"UPDATE {self.table} SET {self.assignments} "
+            f"WHERE id IN ("
+            f"SELECT id FROM {self.table} WHERE ({self.where}) AND id > :after "
+            f"ORDER BY id LIMIT :batch_size FOR UPDATE"
+            f") RETURNING id"
+            f") SELECT count(*), max(id) FROM moved"
+        )
+
+    async def apply(self, ctx: MigrationContext) -> StepReport:
+        if self.assignments is None:
+            raise ValueError(
+                f'Backfill {self.table} WHERE {self.where}: assignments is not set, '
+                f'write the SET expression (e.g. "column = <expr>") in the migration file'
+            )
+        report = StepReport(self.describe())
+        started = perf_counter()
+        after = 0
+        while True:
+            [(count, last_id)] = await run_in_transaction(
+                ctx, report, self.sql(), {'after': after, 'batch_size': self.batch_size}
+            )
+            report.rows += count
+            if count < self.batch_size:
+                break
+            after = last_id
+            await sleep(self.throttle)
+        report.seconds = perf_counter() - started
+        return report
+
+
+# Публичный API модуля
+__all__ = [
+    'Backfill',
+    'CreateIndex',
+    'DropIndex',
+    'Execute',
+    'MigrationContext',
+    'Operation',
+    'StepReport',
+    'WRITE_BLOCKING_LOCKS',
+    'run_autocommit',
+    'run_in_transaction',
+]
@@ -0,0 +1,260 @@
+"""Применение версионированных миграций из каталога `versions/`.
+
+Файл миграции `versions/NNNN_<name>.py` задаёт `revision` и список `steps`.
+Прогресс хранится по шагам в таблице `schema_migrations`: шаги вне
+транзакции (`CREATE INDEX CONCURRENTLY`, пачки `Backfill`) нельзя откатить,
+поэтому прерванная миграция продолжается с первого невыполненного шага.
+Шаги должны быть идемпотентными (`IF NOT EXISTS`, условие в `Backfill`).
+
+Одновременный запуск двух раннеров исключён advisory-блокировкой,
+которую держит отдельное соединение в режиме autocommit: открытая
+транзакция не даёт завершиться `CREATE INDEX CONCURRENTLY`.
+"""
+
+import re
+from dataclasses import dataclass
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+from typing import Optional
+from zlib import crc32
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.config_reader import env_config
+from app.modules.logging import get_logger
+
+from .autogenerate import diff_schema
+from .operations import Backfill, MigrationContext, Operation, StepReport
+
+
+
+logger = get_logger(__name__)
+
+# Каталог с файлами миграций по умолчанию
+VERSIONS_DIR = Path(__file__).parent / 'versions'
+
+# Ключ advisory-блокировки раннера
+_ADVISORY_KEY = crc32(b'schema_migrations')
+
+_VERSION_TABLE = text("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        revision VARCHAR(32) NOT NULL,
+        step INTEGER NOT NULL,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        PRIMARY KEY (revision, step)
+    )
+""")
+
+_TEMPLATE = '''"""{name}
+
+Сгенерировано: python -m app.modules.migrations generate "{name}"
+"""
+
+from app.modules.migrations.operations import {imports}
+
+
+
+revision = '{revision}'
+
+steps = [
+{steps}
+]
+'''
+
+
+
+@dataclass
+class Migration:
+    """
+    ## Версионированная миграция.
+
+    Attributes:
+        revision: Номер версии (`0001`).
+        name: Описание (первая строка docstring файла).
+        steps: Шаги миграции.
+        path: Путь к файлу.
+    """
+    revision: str
+    name: str
+    steps: list[Operation]
+    path: Path
+
+
+def load_migrations(directory: Path = VERSIONS_DIR) -> list[Migration]:
+    """
+    ## Загружает миграции из каталога в порядке номеров.
+
+    Raises:
+        ValueError: Если номер в имени файла не совпадает с `revision`.
+
+    Returns:
+        list[Migration]: Миграции по возрастанию `revision`.
+    """
+    migrations = []
+    for path in sorted(directory.glob('[0-9][0-9][0-9][0-9]_*.py')):
+        spec = spec_from_file_location(f'_migration_{path.stem}', path)
+        module = module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if not path.stem.startswith(module.revision):
+            raise ValueError(f'{path.name}: revision {module.revision!r} does not match file name')
+        name = (module.__doc__ or path.stem).strip().splitlines()[0]
+        migrations.append(Migration(module.revision, name, list(module.steps), path))
+    return migrations
+
+
+def render_migration(revision: str, name: str, steps: list[Operation]) -> str:
+    """
+    ## Python-код файла миграции.
+    """
+    imports = sorted({type(step).__name__ for step in steps})
+    return _TEMPLATE.format(
+        name=name,
+        revision=revision,
+        imports=', '.join(imports),
+        steps='\n'.join(f'    {step.render()},' for step in steps),
+    )
+
+
+class MigrationRunner:
+    """
+    ## Применяет миграции и собирает отпечаток блокировок по шагам.
+
+    Attributes:
+        ctx: Параметры выполнения шагов.
+        versions_dir: Каталог с файлами миграций.
+    """
+
+    def __init__(self,
+        engine: AsyncEngine,
+        versions_dir: Path = VERSIONS_DIR,
+        lock_timeout: float = env_config.MIGRATION_LOCK_TIMEOUT,
+        lock_retries: int = env_config.MIGRATION_LOCK_RETRIES
+    ) -> None:
+        """
+        ## Инициализирует `MigrationRunner`.
+
+        Args:
+            engine: Асинхронный движок SQLAlchemy.
+            versions_dir: Каталог с файлами миграций.
+            lock_timeout: `lock_timeout` транзакционных шагов, в секундах.
+            lock_retries: Повторы шага после `lock_timeout`.
+        """
+        self.ctx = MigrationContext(engine, lock_timeout, lock_retries)
+        self.versions_dir = versions_dir
+
+    async def applied(self) -> dict[str, int]:
+        """
+        ## Сколько шагов каждой миграции уже выполнено.
+
+        Returns:
+            dict[str, int]: `revision` -> число выполненных шагов.
+        """
+        async with self.ctx.engine.begin() as conn:
+            await conn.execute(_VERSION_TABLE)
+            rows = await conn.execute(text(
+                'SELECT revision, count(*) FROM schema_migrations GROUP BY revision'
+            ))
+            return {revision: count for revision, count in rows}
+
+    async def status(self) -> list[tuple[Migration, int]]:
+        """
+        ## Миграции и число выполненных шагов каждой.
+        """
+        done = await self.applied()
+        return [(migration, done.get(migration.revision, 0)) for migration in load_migrations(self.versions_dir)]
+
+    async def _record(self, migration: Migration, number: int, step: Operation) -> None:
+        """
+        ## Отмечает шаг выполненным.
+        """
+        async with self.ctx.engine.begin() as conn:
+            await conn.execute(
+                text(
+                    'INSERT INTO schema_migrations (revision, step, description) '
+                    'VALUES (:revision, :step, :description) ON CONFLICT DO NOTHING'
+                ),
+                {'revision': migration.revision, 'step': number, 'description': step.describe()},
+            )
+
+    async def upgrade(self, target: Optional[str] = None) -> list[StepReport]:
+        """
+        ## Применяет невыполненные шаги до `target` включительно.
+
+        Args:
+            target: Последняя применяемая версия (`None` — все).
+
+        Raises:
+            RuntimeError: Если миграции уже выполняет другой процесс.
+            ValueError: Если у шага `Backfill` не задано выражение (`assignments=None`).
+
+        Returns:
+            list[StepReport]: Отпечатки блокировок выполненных шагов.
+        """
+        reports: list[StepReport] = []
+        async with self.ctx.engine.connect() as guard:
+            guard = await guard.execution_options(isolation_level='AUTOCOMMIT')
+            locked = (await guard.execute(
+                text('SELECT pg_try_advisory_lock(:key)'), {'key': _ADVISORY_KEY}
+            )).scalar_one()
+            if not locked:
+                raise RuntimeError('migrations are already running in another process')
+            try:
+                for migration, done in await self.status():
+                    if target is not None and migration.revision > target:
+                        break
+                    for number, step in enumerate(migration.steps):
+                        if number < done:
+                            continue
+                        if isinstance(step, Backfill) and step.assignments is None:
+                            raise ValueError(
+                                f'{migration.path.name}, step {number}: Backfill of {step.table} has '
+                                f'assignments=None, write the SET expression before applying'
+                            )
+                        report = await step.apply(self.ctx)
+                        await self._record(migration, number, step)
+                        reports.append(report)
+                        logger.info(f'{migration.revision}/{number}: {report.step} ({report.seconds:.2f} с)')
+            finally:
+                await guard.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': _ADVISORY_KEY})
+        return reports
+
+    async def generate(self, name: str) -> Optional[Path]:
+        """
+        ## Генерирует файл миграции по расхождению моделей и живой схемы.
+
+        Args:
+            name: Описание миграции (из него строится имя файла).
+
+        Raises:
+            RuntimeError: Если есть неприменённые миграции.
+
+        Returns:
+            Path | None: Путь к новому файлу или `None`, если схема актуальна.
+        """
+        pending = [m.revision for m, done in await self.status() if done < len(m.steps)]
+        if pending:
+            raise RuntimeError(f'apply pending migrations first: {", ".join(pending)}')
+
+        async with self.ctx.engine.connect() as conn:
+            steps = await conn.run_sync(diff_schema)
+        if not steps:
+            return None
+
+        migrations = load_migrations(self.versions_dir)
+        revision = f'{int(migrations[-1].revision) + 1 if migrations else 1:04d}'
+        slug = re.sub(r'\W+', '_', name.lower()).strip('_') or 'migration'
+        path = self.versions_dir / f'{revision}_{slug}.py'
+        path.write_text(render_migration(revision, name, steps), encoding='utf-8')
+        return path
+
+
+# Публичный API модуля
+__all__ = [
+    'Migration',
+    'MigrationRunner',
+    'VERSIONS_DIR',
+    'load_migrations',
+    'render_migration',
+]
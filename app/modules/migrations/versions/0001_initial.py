@@ -0,0 +1,60 @@
+"""Исходная схема: users, products, orders
+
+Схема, которую раньше создавал `metadata_obj.create_all` в `main.py`.
+`IF NOT EXISTS` делает шаги безопасными для уже созданных баз. В такой
+базе таблицы могут быть уже заполнены, поэтому индексы строятся
+`CREATE INDEX CONCURRENTLY` вне транзакции (`CreateIndex`), без
+блокировки записи.
+"""
+
+from app.modules.migrations.operations import CreateIndex, Execute
+
+
+
+revision = '0001'
+
+steps = [
+    Execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id BIGSERIAL NOT NULL,
+            name VARCHAR(255) NOT NULL,
+            price INTEGER NOT NULL,
+            is_hidden BOOLEAN NOT NULL,
+            PRIMARY KEY (id)
+        )
+    """, note='CREATE TABLE products'),
+    CreateIndex('idx_product_name_price', 'products', ('name', 'price')),
+    CreateIndex('ix_products_is_hidden', 'products', ('is_hidden',)),
+    CreateIndex('ix_products_name', 'products', ('name',)),
+    CreateIndex('ix_products_price', 'products', ('price',)),
+    Execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id BIGSERIAL NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            full_name VARCHAR(255) NOT NULL,
+            is_hidden BOOLEAN NOT NULL,
+            PRIMARY KEY (id)
+        )
+    """, note='CREATE TABLE users'),
+    CreateIndex('idx_user_full_name', 'users', ('full_name',)),
+    CreateIndex('ix_users_email', 'users', ('email',), unique=True),
+    CreateIndex('ix_users_is_hidden', 'users', ('is_hidden',)),
+    Execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id BIGSERIAL NOT NULL,
+            user_id BIGINT NOT NULL,
+            product_id BIGINT NOT NULL,
+            quantity INTEGER NOT NULL,
+            is_hidden BOOLEAN NOT NULL,
+            PRIMARY KEY (id),
+            FOREIGN KEY(product_id) REFERENCES products (id),
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        )
+    """, note='CREATE TABLE orders'),
+    CreateIndex('idx_order_product_id', 'orders', ('product_id',)),
+    CreateIndex('idx_order_user_id', 'orders', ('user_id',)),
+    CreateIndex('idx_order_user_product', 'orders', ('user_id', 'product_id')),
+    CreateIndex('ix_orders_is_hidden', 'orders', ('is_hidden',)),
+    CreateIndex('ix_orders_product_id', 'orders', ('product_id',)),
+    CreateIndex('ix_orders_user_id', 'orders', ('user_id',)),
+]
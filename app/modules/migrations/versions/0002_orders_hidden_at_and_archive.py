@@ -0,0 +1,33 @@
+"""orders.hidden_at и архив orders_archive
+
+Уже скрытые заказы получают `hidden_at = now()`: срок хранения перед
+архивацией отсчитывается от момента миграции, а не истекает сразу.
+"""
+
+from app.modules.migrations.operations import Backfill, Execute
+
+
+
+revision = '0002'
+
+steps = [
+    Execute("""
+        ALTER TABLE orders ADD COLUMN IF NOT EXISTS hidden_at TIMESTAMP WITH TIME ZONE
+    """, note='ADD COLUMN orders.hidden_at'),
+    Backfill('orders', 'hidden_at = now()', 'is_hidden AND hidden_at IS NULL'),
+    Execute("""
+        CREATE TABLE IF NOT EXISTS orders_archive (
+            id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            product_id BIGINT NOT NULL,
+            quantity INTEGER NOT NULL,
+            is_hidden BOOLEAN NOT NULL,
+            hidden_at TIMESTAMP WITH TIME ZONE,
+            archived_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            PRIMARY KEY (id)
+        )
+    """, note='CREATE TABLE orders_archive'),
+    Execute("""
+        CREATE INDEX IF NOT EXISTS idx_order_archive_user_id ON orders_archive (user_id)
+    """, note='CREATE INDEX idx_order_archive_user_id ON orders_archive'),
+]
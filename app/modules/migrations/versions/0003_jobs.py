@@ -0,0 +1,30 @@
+"""Очередь фоновых задач jobs
+
+Новая пустая таблица: создание и индекс выполняются в транзакции.
+"""
+
+from app.modules.migrations.operations import Execute
+
+
+
+revision = '0003'
+
+steps = [
+    Execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id BIGSERIAL NOT NULL,
+            queue VARCHAR(64) NOT NULL,
+            payload JSONB NOT NULL,
+            status VARCHAR(16) DEFAULT 'ready' NOT NULL,
+            attempts INTEGER DEFAULT 0 NOT NULL,
+            max_attempts INTEGER NOT NULL,
+            run_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            last_error TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            PRIMARY KEY (id)
+        )
+    """, note='CREATE TABLE jobs'),
+    Execute("""
+        CREATE INDEX IF NOT EXISTS idx_job_ready ON jobs (queue, run_at) WHERE status = 'ready'
+    """, note='CREATE INDEX idx_job_ready ON jobs'),
+]
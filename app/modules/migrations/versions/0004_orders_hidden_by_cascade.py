@@ -0,0 +1,20 @@
+"""orders.hidden_by_cascade
+
+Отмечает заказы, скрытые каскадом вместе с пользователем или товаром,
+чтобы `unhide_cascade()` не восстанавливал заказы, удалённые отдельно.
+`ADD COLUMN` с константным `DEFAULT` не переписывает таблицу. Уже скрытые
+заказы получают `false`: как они были скрыты, неизвестно, поэтому
+каскадное восстановление их не трогает.
+"""
+
+from app.modules.migrations.operations import Execute
+
+
+
+revision = '0004'
+
+steps = [
+    Execute("""
+        ALTER TABLE orders ADD COLUMN IF NOT EXISTS hidden_by_cascade BOOLEAN DEFAULT false NOT NULL
+    """, note='ADD COLUMN orders.hidden_by_cascade'),
+]
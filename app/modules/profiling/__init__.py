@@ -0,0 +1,19 @@
+"""Выборочное профилирование вызовов DAO для проекта SQLAlchemyExample."""
+
+from .profiler import (
+    DaoProfiler,
+    ProfileSample,
+    current_sample,
+    dao_profiler,
+    profiled,
+)
+
+
+# Публичный API модуля
+__all__ = [
+    'DaoProfiler',
+    'ProfileSample',
+    'current_sample',
+    'dao_profiler',
+    'profiled',
+]
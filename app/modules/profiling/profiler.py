@@ -0,0 +1,321 @@
+"""Выборочное профилирование вызовов DAO.
+
+Включается через `.env` (`PROFILING_ENABLED=True`). Для доли вызовов
+`PROFILING_SAMPLE_RATE` собирается разбивка времени по фазам:
+
+    - `execute`  — отправка запроса и получение строк драйвером
+                   (asyncpg буферизует результат внутри `execute`);
+    - `hydrate`  — построение ORM-объектов (`scalars().all()`);
+    - `to_dict`  — `BaseDAO._return_dict_from_obj`;
+    - `validate` — создание Pydantic-схем `Exists*`.
+
+Для каждой выборки также считаются запросы (`QueryBudget`): вероятный N+1
+внутри вызова попадает в лог предупреждением. Намеренные повторы (пачки
+`update_many`, каскад по частям) DAO выполняет внутри `batched_queries()`,
+и они предупреждений не дают.
+
+Опционально для выборки включаются сэмплирующий профайлер стеков
+(`PROFILING_STACKS`) и дельты аллокаций `tracemalloc` (`PROFILING_TRACEMALLOC`).
+Стеки пишутся в `<PROFILING_OUTPUT_DIR>/<DAO.method>.collapsed` в формате
+«collapsed stacks» (`flamegraph.pl`, speedscope).
+
+Ограничения:
+    - стек снимается со всего потока цикла событий; снимок учитывается,
+      только если в этот момент выполняется задача профилируемого вызова,
+      но задача может смениться между проверкой и снятием стека, поэтому
+      изредка в выборку попадают чужие стеки;
+    - `tracemalloc` общий на процесс: пересекающиеся выборки держат одну
+      сессию трассировки (счётчик ссылок), и дельта аллокаций одной выборки
+      включает аллокации конкурентных задач.
+
+Если профилирование выключено, декоратор `profiled` возвращает функцию
+без изменений, а хелперы `BaseDAO` делают одну проверку `ContextVar`.
+"""
+
+import sys
+import threading
+import tracemalloc
+from asyncio import AbstractEventLoop, Task, current_task, get_running_loop
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from pathlib import Path
+from random import random
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+from app.config.config_reader import env_config
+from app.modules.logging import get_logger
+from app.modules.query_budget import QueryBudget
+
+
+
+logger = get_logger(__name__)
+
+# Текущая выборка профилирования (на задачу asyncio)
+_current: ContextVar[Optional['ProfileSample']] = ContextVar('profile_sample', default=None)
+
+
+
+@dataclass
+class ProfileSample:
+    """
+    ## Результат профилирования одного вызова DAO.
+
+    Attributes:
+        name: Имя метода (`ProductDAO.get_all`).
+        phases: Время по фазам, в секундах.
+        total: Полное время вызова, в секундах.
+        queries: Число SQL-запросов за вызов.
+        stacks: Собранные стеки `{"a;b;c": count}`.
+        allocations: Топ дельт аллокаций `tracemalloc` (строки `file:line +N KiB`).
+    """
+    name: str
+    phases: dict[str, float] = field(default_factory=dict)
+    total: float = 0.0
+    queries: int = 0
+    stacks: Counter = field(default_factory=Counter)
+    allocations: list[str] = field(default_factory=list)
+
+    def add(self, phase: str, seconds: float) -> None:
+        """
+        ## Добавляет время к фазе.
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+class _TraceSession:
+    """
+    ## Общая на процесс сессия `tracemalloc` со счётчиком пользователей.
+
+    Трассировка запускается первой выборкой и останавливается последней,
+    если её не включил кто-то другой (`python -X tracemalloc`, отладчик).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._users = 0
+        self._owned = False
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owned = True
+            self._users += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._users -= 1
+            if self._users == 0 and self._owned:
+                tracemalloc.stop()
+                self._owned = False
+
+
+_trace_session = _TraceSession()
+
+
+def current_sample() -> Optional[ProfileSample]:
+    """
+    ## Возвращает активную выборку текущей задачи или None.
+    """
+    return _current.get()
+
+
+class _StackSampler(threading.Thread):
+    """
+    ## Фоновый поток, периодически снимающий стек целевого потока.
+
+    Снимки, сделанные, пока в цикле `loop` выполняется не задача `task`, отбрасываются.
+    """
+
+    def __init__(self,
+        target_thread_id: int,
+        interval: float,
+        sample: ProfileSample,
+        loop: AbstractEventLoop,
+        task: Optional[Task]
+    ) -> None:
+        super().__init__(name='dao-stack-sampler', daemon=True)
+        self._target = target_thread_id
+        self._interval = interval
+        self._sample = sample
+        self._loop = loop
+        self._task = task
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            if self._task is not None and current_task(self._loop) is not self._task:
+                continue
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{frame.f_globals.get("__name__", "?")}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self._sample.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class DaoProfiler:
+    """
+    ## Сборщик выборок профилирования вызовов DAO.
+
+    Attributes:
+        sample_rate: Доля профилируемых вызовов (0..1).
+        stacks: Включён ли сэмплирующий профайлер стеков.
+        stack_interval: Интервал снятия стеков, в секундах.
+        trace_allocations: Включены ли дельты `tracemalloc`.
+        output_dir: Каталог для `.collapsed`-файлов.
+        totals: Суммарное время по методам и фазам.
+        calls: Число профилированных вызовов по методам.
+    """
+
+    def __init__(self,
+        sample_rate: float,
+        stacks: bool = False,
+        stack_interval: float = 0.001,
+        trace_allocations: bool = False,
+        output_dir: str = 'profiles'
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.stacks = stacks
+        self.stack_interval = stack_interval
+        self.trace_allocations = trace_allocations
+        self.output_dir = Path(output_dir)
+        self.totals: dict[str, dict[str, float]] = {}
+        self.calls: Counter = Counter()
+        self._sampler_busy = threading.Lock()
+
+    def _record(self, sample: ProfileSample) -> None:
+        """
+        ## Сохраняет выборку: агрегаты, лог и `.collapsed`-файл.
+        """
+        totals = self.totals.setdefault(sample.name, {})
+        for phase, seconds in {**sample.phases, 'total': sample.total}.items():
+            totals[phase] = totals.get(phase, 0.0) + seconds
+        self.calls[sample.name] += 1
+
+        phases = ', '.join(f'{k}={v * 1000:.3f}ms' for k, v in sample.phases.items())
+        logger.debug(
+            f'{sample.name}: total={sample.total * 1000:.3f}ms queries={sample.queries} ({phases})'
+        )
+        for line in sample.allocations:
+            logger.debug(f'{sample.name}: alloc {line}')
+
+        if sample.stacks:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            path = self.output_dir / f'{sample.name}.collapsed'
+            with path.open('a', encoding='utf-8') as fh:
+                for stack, hits in sample.stacks.items():
+                    fh.write(f'{stack} {hits}\n')
+
+    async def run(self, name: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        ## Выполняет корутину DAO, профилируя её с вероятностью `sample_rate`.
+
+        Args:
+            name: Имя метода для отчёта.
+            func: Асинхронная функция DAO.
+            *args: Позиционные аргументы вызова.
+            **kwargs: Именованные аргументы вызова.
+
+        Returns:
+            Any: Результат вызова `func`.
+        """
+        if _current.get() is not None or random() >= self.sample_rate:
+            return await func(*args, **kwargs)
+
+        sample = ProfileSample(name=name)
+        token = _current.set(sample)
+
+        sampler = None
+        if self.stacks and self._sampler_busy.acquire(blocking=False):
+            sampler = _StackSampler(
+                threading.get_ident(), self.stack_interval, sample, get_running_loop(), current_task()
+            )
+            sampler.start()
+
+        before = None
+        if self.trace_allocations:
+            _trace_session.acquire()
+            before = tracemalloc.take_snapshot()
+
+        budget = QueryBudget(raise_on_exceed=False, sample_rate=1.0, name=name)
+        started = perf_counter()
+        try:
+            with budget:
+                return await func(*args, **kwargs)
+        finally:
+            sample.total = perf_counter() - started
+            sample.queries = budget.stats.total if budget.stats is not None else 0
+            _current.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                self._sampler_busy.release()
+            if before is not None:
+                try:
+                    diff = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+                    sample.allocations = [
+                        f'{stat.traceback} {stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d})'
+                        for stat in diff[:10]
+                    ]
+                finally:
+                    _trace_session.release()
+            self._record(sample)
+
+
+def _build_profiler() -> Optional[DaoProfiler]:
+    """
+    ## Создаёт профайлер по настройкам `.env` или None, если он выключен.
+    """
+    if not env_config.PROFILING_ENABLED:
+        return None
+    return DaoProfiler(
+        sample_rate=env_config.PROFILING_SAMPLE_RATE,
+        stacks=env_config.PROFILING_STACKS,
+        trace_allocations=env_config.PROFILING_TRACEMALLOC,
+        output_dir=env_config.PROFILING_OUTPUT_DIR,
+    )
+
+
+# Глобальный профайлер (None, если профилирование выключено)
+dao_profiler: Optional[DaoProfiler] = _build_profiler()
+
+
+def profiled(func: Callable) -> Callable:
+    """
+    ## Декоратор для асинхронных методов DAO.
+
+    При выключенном профилировании возвращает `func` без обёртки.
+
+    Args:
+        func: Асинхронный метод DAO.
+
+    Returns:
+        Callable: Исходный или обёрнутый метод.
+    """
+    if dao_profiler is None:
+        return func
+
+    @wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await dao_profiler.run(func.__qualname__, func, *args, **kwargs)
+
+    return wrapper
+
+
+# Публичный API модуля
+__all__ = [
+    'DaoProfiler',
+    'ProfileSample',
+    'current_sample',
+    'dao_profiler',
+    'profiled',
+]
@@ -0,0 +1,13 @@
+"""Бюджет запросов и поиск N+1 для проекта SQLAlchemyExample."""
+
+from .budget import QueryBudget, QueryBudgetExceeded, QueryStats, batched_queries, normalize_sql
+
+
+# Публичный API модуля
+__all__ = [
+    'QueryBudget',
+    'QueryBudgetExceeded',
+    'QueryStats',
+    'batched_queries',
+    'normalize_sql',
+]
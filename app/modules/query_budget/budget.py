@@ -0,0 +1,272 @@
+"""Бюджет числа запросов и поиск N+1 для участков кода с DAO.
+
+Один глобальный слушатель `before_cursor_execute` на классе `Engine`
+(подходит для всех движков: основного, шардов, бенчмарков) передаёт
+каждый отправленный SQL во все активные `QueryBudget` текущей задачи.
+Активные бюджеты хранятся в `ContextVar`, поэтому параллельные задачи
+считаются раздельно, а задачи, созданные внутри блока
+(`gather_in_sessions`, `TaskGroup`), попадают в бюджет блока.
+
+Запросы группируются по «форме» — SQL без литералов и параметров.
+Одна и та же форма, повторённая `n_plus_one_threshold` раз и больше,
+помечается как вероятный N+1 (запрос в цикле). Намеренные повторы —
+пачки `update_many`, каскад по частям — выполняются внутри
+`batched_queries()`: они учитываются в `total`, но не считаются N+1.
+
+Пример:
+
+    with QueryBudget(max_queries=2, name='checkout') as stats:
+        await order_dao.get_by_user(user_id, session=session)
+
+    @QueryBudget(max_queries=1)
+    async def load_products(session): ...
+
+В продакшене блок включается для доли вызовов `sample_rate`
+и при `raise_on_exceed=False` только пишет предупреждение в лог.
+"""
+
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from random import random
+from typing import Any, Callable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config.config_reader import env_config
+from app.modules.logging import get_logger
+
+
+
+logger = get_logger(__name__)
+
+# Активные счётчики текущей задачи (вложенные блоки считают одновременно)
+_active: ContextVar[tuple['QueryStats', ...]] = ContextVar('query_budgets', default=())
+# Выполняются ли сейчас намеренно повторяющиеся запросы (пачки)
+_batched: ContextVar[bool] = ContextVar('query_budget_batched', default=False)
+
+# Нормализация SQL: параметры с приведением типа, строки, числа, списки значений
+_PARAM = re.compile(
+    r"(?:\$\d+|%\(\w+\)s|%s|(?<!:):\w+|\?)"
+    r"(?:::[A-Z_]+(?: [A-Z_]+)*(?:\(\d+\))?(?:\[\])?)?"
+)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACES = re.compile(r"\s+")
+
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    ## «Форма» запроса: SQL без литералов, параметров и длины списков.
+
+    `WHERE id IN ($1::BIGINT, $2::BIGINT)` и `WHERE id IN ($1::BIGINT)`
+    дают одну форму `WHERE id IN (?)`.
+
+    Args:
+        statement: SQL, отправленный драйверу.
+
+    Returns:
+        str: Нормализованный SQL.
+    """
+    sql = _STRING.sub('?', statement)
+    sql = _PARAM.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _LIST.sub('(?)', sql)
+    sql = _ROWS.sub('(?), ...', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+@dataclass
+class QueryStats:
+    """
+    ## Запросы, выполненные внутри одного блока `QueryBudget`.
+
+    Attributes:
+        name: Имя блока для отчёта.
+        total: Всего запросов.
+        shapes: Число запросов по формам SQL.
+        batched: Формы, выполненные внутри `batched_queries()`.
+    """
+    name: str
+    total: int = 0
+    shapes: Counter = field(default_factory=Counter)
+    batched: set[str] = field(default_factory=set)
+
+    def add(self, statement: str, batched: bool = False) -> None:
+        """
+        ## Учитывает один запрос.
+        """
+        shape = normalize_sql(statement)
+        self.total += 1
+        self.shapes[shape] += 1
+        if batched:
+            self.batched.add(shape)
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """
+        ## Формы, повторённые не меньше `threshold` раз (вероятный N+1), кроме пачек.
+        """
+        return {
+            shape: count for shape, count in self.shapes.most_common()
+            if count >= threshold and shape not in self.batched
+        }
+
+    def report(self, limit: int = 5) -> str:
+        """
+        ## Текстовый отчёт: всего запросов и самые частые формы.
+        """
+        lines = [f'{self.name}: {self.total} запросов, {len(self.shapes)} форм']
+        for shape, count in self.shapes.most_common(limit):
+            lines.append(f'  x{count}: {shape[:200]}')
+        return '\n'.join(lines)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """
+    ## Блок превысил бюджет запросов или содержит вероятный N+1.
+
+    Attributes:
+        stats: Собранная статистика блока.
+    """
+
+    def __init__(self, message: str, stats: QueryStats) -> None:
+        super().__init__(f'{message}\n{stats.report()}')
+        self.stats = stats
+
+
+def _on_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """
+    ## Слушатель `before_cursor_execute`: передаёт SQL активным блокам.
+    """
+    budgets = _active.get()
+    if not budgets:
+        return
+    batched = _batched.get()
+    for stats in budgets:
+        stats.add(statement, batched)
+
+
+@contextmanager
+def batched_queries() -> Iterator[None]:
+    """
+    ## Помечает запросы блока как намеренные повторы (пачки), а не N+1.
+
+    Пример:
+
+        with batched_queries():
+            for chunk in chunks:
+                await session.execute(update_chunk(chunk))
+    """
+    token = _batched.set(True)
+    try:
+        yield
+    finally:
+        _batched.reset(token)
+
+
+class QueryBudget:
+    """
+    ## Контекстный менеджер (и декоратор) с бюджетом запросов.
+
+    Attributes:
+        max_queries: Максимум запросов в блоке (`None` — без ограничения).
+        n_plus_one_threshold: С какого числа повторов одной формы считать N+1
+            (`None` — не проверять).
+        raise_on_exceed: Бросать `QueryBudgetExceeded` (иначе — предупреждение в лог).
+        sample_rate: Доля блоков, в которых запросы считаются.
+        name: Имя блока для отчёта.
+        stats: Статистика последнего выполнения (`None`, если блок не попал в выборку).
+    """
+
+    def __init__(self,
+        max_queries: Optional[int] = None,
+        n_plus_one_threshold: Optional[int] = env_config.QUERY_BUDGET_N_PLUS_ONE_THRESHOLD,
+        raise_on_exceed: bool = env_config.QUERY_BUDGET_RAISE,
+        sample_rate: float = env_config.QUERY_BUDGET_SAMPLE_RATE,
+        name: str = 'block'
+    ) -> None:
+        """
+        ## Инициализирует `QueryBudget`.
+        """
+        self.max_queries = max_queries
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.raise_on_exceed = raise_on_exceed
+        self.sample_rate = sample_rate
+        self.name = name
+        self.stats: Optional[QueryStats] = None
+        self._token = None
+
+    def __enter__(self) -> Optional[QueryStats]:
+        if self.sample_rate < 1.0 and random() >= self.sample_rate:
+            self.stats = None
+            return None
+        self.stats = QueryStats(self.name)
+        self._token = _active.set((*_active.get(), self.stats))
+        return self.stats
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.stats is None:
+            return
+        _active.reset(self._token)
+        self._token = None
+        if exc_type is None:
+            self.check(self.stats)
+
+    def check(self, stats: QueryStats) -> None:
+        """
+        ## Проверяет статистику блока на бюджет и N+1.
+
+        Raises:
+            QueryBudgetExceeded: Если нарушение найдено и `raise_on_exceed=True`.
+        """
+        problems = []
+        if self.max_queries is not None and stats.total > self.max_queries:
+            problems.append(f'{stats.name}: {stats.total} запросов при бюджете {self.max_queries}')
+        if self.n_plus_one_threshold is not None:
+            for shape, count in stats.repeated(self.n_plus_one_threshold).items():
+                problems.append(f'{stats.name}: вероятный N+1, x{count}: {shape[:200]}')
+        if not problems:
+            return
+        message = '\n'.join(problems)
+        if self.raise_on_exceed:
+            raise QueryBudgetExceeded(message, stats)
+        logger.warning(f'{message}\n{stats.report()}')
+
+    def __call__(self, func: Callable) -> Callable:
+        """
+        ## Оборачивает асинхронную функцию: каждый вызов — отдельный блок.
+        """
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            budget = QueryBudget(
+                self.max_queries,
+                self.n_plus_one_threshold,
+                self.raise_on_exceed,
+                self.sample_rate,
+                self.name if self.name != 'block' else func.__qualname__,
+            )
+            with budget:
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+
+# Один слушатель на все движки: без активных блоков стоит одного `ContextVar.get`
+event.listen(Engine, 'before_cursor_execute', _on_execute)
+
+
+# Публичный API модуля
+__all__ = [
+    'QueryBudget',
+    'QueryBudgetExceeded',
+    'QueryStats',
+    'batched_queries',
+    'normalize_sql',
+]
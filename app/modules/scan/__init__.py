@@ -0,0 +1,16 @@
+"""Параллельный обход таблиц по диапазонам id для проекта SQLAlchemyExample."""
+
+from .checks import HIDDEN_REFERENCES_COLUMNS, HIDDEN_REFERENCES_WHERE, hidden_references, rows_checksum
+from .scanner import ChunkHandler, ScanStats, TableScanner
+
+
+# Публичный API модуля
+__all__ = [
+    'ChunkHandler',
+    'HIDDEN_REFERENCES_COLUMNS',
+    'HIDDEN_REFERENCES_WHERE',
+    'ScanStats',
+    'TableScanner',
+    'hidden_references',
+    'rows_checksum',
+]
@@ -0,0 +1,88 @@
+"""Запуск параллельного обхода таблиц.
+
+Запускать из корня (можно в рабочие часы с ограничением скорости):
+python -m app.modules.scan orphans --rate 50000         # заказы скрытых пользователей / товаров
+python -m app.modules.scan orphans --restart            # начать заново, без контрольной точки
+python -m app.modules.scan checksum orders --processes 4
+"""
+
+from argparse import ArgumentParser
+from asyncio import run
+from pathlib import Path
+
+from app.config.config_reader import env_config
+from app.database.connection import db_connection
+from app.database.models import Order, Product, User
+from app.modules.checkpoint import FileCheckpoint
+from app.modules.logging import get_logger, setup_logging
+
+from .checks import HIDDEN_REFERENCES_COLUMNS, HIDDEN_REFERENCES_WHERE, hidden_references, rows_checksum
+from .scanner import TableScanner
+
+
+
+setup_logging()
+logger = get_logger(__name__)
+
+_MODELS = {model.__tablename__: model for model in (User, Product, Order)}
+
+
+
+async def main() -> None:
+    """
+    ## Разбирает аргументы и запускает выбранный обход.
+    """
+    parser = ArgumentParser(description='Параллельный обход таблиц по диапазонам id')
+    parser.add_argument('--chunk-size', type=int, default=env_config.SCAN_CHUNK_SIZE)
+    parser.add_argument('--concurrency', type=int, default=env_config.SCAN_CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=env_config.SCAN_MAX_ROWS_PER_SECOND,
+                        help='максимум строк в секунду')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    orphans = commands.add_parser('orphans', help='видимые заказы скрытых пользователей или товаров')
+    orphans.add_argument('--restart', action='store_true', help='удалить контрольную точку')
+
+    checksum = commands.add_parser('checksum', help='контрольная сумма таблицы (CPU в пуле процессов)')
+    checksum.add_argument('table', choices=sorted(_MODELS))
+    checksum.add_argument('--processes', type=int, default=0)
+
+    args = parser.parse_args()
+
+    if args.command == 'orphans':
+        checkpoint = FileCheckpoint(Path(env_config.SCAN_CHECKPOINT_DIR) / 'scan_orphans.json')
+        if args.restart:
+            checkpoint.clear()
+        scanner = TableScanner(
+            db_connection, Order, args.chunk_size, args.concurrency, args.rate, checkpoint=checkpoint
+        )
+        stats = await scanner.run(
+            hidden_references, where=HIDDEN_REFERENCES_WHERE, columns=HIDDEN_REFERENCES_COLUMNS
+        )
+        logger.info(f"✓ Найдено заказов со скрытыми ссылками: {stats.matched}")
+    else:
+        # Без контрольной точки: сумма складывается из всех кусков одного запуска
+        scanner = TableScanner(
+            db_connection, _MODELS[args.table], args.chunk_size, args.concurrency, args.rate,
+            processes=args.processes,
+        )
+        total = 0
+
+        async def handler(rows, session) -> None:
+            nonlocal total
+            # Сначала дождаться результата: `total ^= await ...` читает `total` до await
+            value = await scanner.offload(rows_checksum, [tuple(row) for row in rows])
+            total ^= value
+
+        stats = await scanner.run(handler)
+        logger.info(f"✓ {args.table}: {stats.rows} строк, checksum {total:08x}")
+
+    await db_connection.db_close()
+    logger.info(
+        f"✓ {stats.chunks} кусков (пропущено {stats.skipped}) за {stats.seconds:.1f} с, "
+        f"{stats.rows_per_second:.0f} строк/с"
+    )
+
+
+
+if __name__ == "__main__":
+    run(main())
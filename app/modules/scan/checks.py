@@ -0,0 +1,84 @@
+"""Готовые обработчики кусков для `TableScanner`.
+
+- `hidden_references` — видимые заказы, ссылающиеся на скрытых
+  пользователей или скрытые товары (проверка согласованности после
+  `hide()` без каскада);
+- `rows_checksum` — CPU-ёмкая контрольная сумма строк куска для
+  выполнения в пуле процессов (`TableScanner.offload`).
+"""
+
+from typing import Any, Sequence
+from zlib import crc32
+
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import Order, Product, User
+from app.modules.logging import get_logger
+
+
+
+logger = get_logger(__name__)
+
+# Колонки `orders`, нужные `hidden_references`
+HIDDEN_REFERENCES_COLUMNS = ('id', 'user_id', 'product_id')
+# Условие на заказы для `hidden_references`
+HIDDEN_REFERENCES_WHERE = (Order.is_hidden.is_(False),)
+
+
+
+async def hidden_references(rows: Sequence[Row], session: AsyncSession) -> int:
+    """
+    ## Находит в куске видимые заказы скрытых пользователей или товаров.
+
+    Проверяет только пользователей и товары, встретившиеся в куске:
+    два запроса по первичному ключу на кусок.
+
+    Args:
+        rows: Строки `orders` с колонками `HIDDEN_REFERENCES_COLUMNS`.
+        session: Сессия куска.
+
+    Returns:
+        int: Сколько заказов куска ссылается на скрытые записи.
+    """
+    user_ids = {row.user_id for row in rows}
+    product_ids = {row.product_id for row in rows}
+    hidden_users = set((await session.execute(
+        select(User.id).where(User.id.in_(user_ids), User.is_hidden)
+    )).scalars())
+    hidden_products = set((await session.execute(
+        select(Product.id).where(Product.id.in_(product_ids), Product.is_hidden)
+    )).scalars())
+
+    found = [
+        row.id for row in rows
+        if row.user_id in hidden_users or row.product_id in hidden_products
+    ]
+    if found:
+        logger.warning(f'Заказы со скрытым пользователем или товаром: {found[:20]}')
+    return len(found)
+
+
+def rows_checksum(rows: Sequence[tuple[Any, ...]]) -> int:
+    """
+    ## CRC32 строк куска (функция уровня модуля — выполняется в пуле процессов).
+
+    Args:
+        rows: Строки куска в виде кортежей.
+
+    Returns:
+        int: Контрольная сумма, не зависящая от порядка строк.
+    """
+    checksum = 0
+    for row in rows:
+        checksum ^= crc32(repr(row).encode())
+    return checksum
+
+
+# Публичный API модуля
+__all__ = [
+    'HIDDEN_REFERENCES_COLUMNS',
+    'HIDDEN_REFERENCES_WHERE',
+    'hidden_references',
+    'rows_checksum',
+]
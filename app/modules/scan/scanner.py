@@ -0,0 +1,302 @@
+"""Параллельный обход таблицы по диапазонам первичного ключа.
+
+Диапазон `[min(id), max(id)]` делится на куски по `chunk_size` значений id.
+Куски обрабатывают `concurrency` задач, каждая в своей сессии из пула
+(приоритет `BACKGROUND`):
+
+    SELECT <columns> FROM <table>
+    WHERE id >= :start AND id < :start + :chunk_size AND <where>
+    ORDER BY id
+
+Строки куска передаются обработчику `handler(rows, session)`, после чего
+транзакция куска коммитится — так обработчик может и проверять данные,
+и дописывать их (backfill). Тяжёлые вычисления обработчик выносит
+в пул процессов через `await scanner.offload(func, *args)`.
+
+Нагрузку на БД ограничивает `max_rows_per_second`, прогресс сохраняется
+в контрольную точку: после перезапуска обход продолжается, пропуская
+готовые куски.
+"""
+
+from asyncio import TaskGroup, get_running_loop, sleep
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from time import monotonic, perf_counter
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from sqlalchemy import ColumnElement, Row, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.config_reader import env_config
+from app.database.admission import Priority
+from app.database.connection import DbConnection
+from app.database.models import Base
+from app.modules.checkpoint import FileCheckpoint
+from app.modules.logging import get_logger
+
+
+
+logger = get_logger(__name__)
+
+# Обработчик куска: строки и сессия куска -> число найденных/изменённых записей
+ChunkHandler = Callable[[Sequence[Row], AsyncSession], Awaitable[Optional[int]]]
+
+
+
+@dataclass
+class ScanStats:
+    """
+    ## Итоги обхода таблицы.
+
+    Attributes:
+        table: Имя таблицы.
+        rows: Сколько строк передано обработчику в этом запуске.
+        matched: Сумма значений, которые вернул обработчик, за весь обход
+            (включая запуски до возобновления с контрольной точки).
+        chunks: Сколько кусков обработано в этом запуске.
+        skipped: Сколько кусков пропущено по контрольной точке.
+        seconds: Длительность запуска.
+    """
+    table: str
+    rows: int = 0
+    matched: int = 0
+    chunks: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """
+        ## Скорость обхода, строк в секунду.
+        """
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class _RateLimiter:
+    """
+    ## Ограничение скорости в строках в секунду, общее для всех задач обхода.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self._next = monotonic()
+
+    async def acquire(self, rows: int) -> None:
+        """
+        ## Учитывает `rows` строк и ждёт, если скорость превышена.
+        """
+        now = monotonic()
+        start = max(now, self._next)
+        self._next = start + rows / self.rate
+        if start > now:
+            await sleep(start - now)
+
+
+class TableScanner:
+    """
+    ## Параллельный обход таблицы модели кусками по `id`.
+
+    Attributes:
+        db: Подключение к БД.
+        model: Модель с целочисленным `id` (`User`, `Product`, `Order`).
+        chunk_size: Ширина куска в значениях `id`.
+        concurrency: Сколько кусков обрабатывается одновременно.
+        max_rows_per_second: Ограничение скорости (`None` — без ограничения).
+        processes: Размер пула процессов для `offload` (`0` — вычислять в цикле событий).
+        checkpoint: Контрольная точка прогресса (`None` — без возобновления).
+    """
+
+    def __init__(self,
+        db: DbConnection,
+        model: type[Base],
+        chunk_size: int = env_config.SCAN_CHUNK_SIZE,
+        concurrency: int = env_config.SCAN_CONCURRENCY,
+        max_rows_per_second: Optional[float] = env_config.SCAN_MAX_ROWS_PER_SECOND,
+        processes: int = 0,
+        checkpoint: Optional[FileCheckpoint] = None
+    ) -> None:
+        """
+        ## Инициализирует `TableScanner`.
+
+        Raises:
+            ValueError: Если `chunk_size` или `concurrency` меньше 1,
+                `max_rows_per_second` не больше 0 или `processes` меньше 0.
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be >= 1')
+        if concurrency < 1:
+            raise ValueError('concurrency must be >= 1')
+        if max_rows_per_second is not None and max_rows_per_second <= 0:
+            raise ValueError('max_rows_per_second must be > 0')
+        if processes < 0:
+            raise ValueError('processes must be >= 0')
+        self.db = db
+        self.model = model
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.max_rows_per_second = max_rows_per_second
+        self.processes = processes
+        self.checkpoint = checkpoint
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def offload(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        ## Выполняет CPU-ёмкую функцию в пуле процессов.
+
+        Функция и аргументы должны сериализоваться `pickle`
+        (функция уровня модуля, строки — кортежами). Без пула процессов
+        функция выполняется сразу, в цикле событий.
+
+        Args:
+            func: Функция.
+            *args: Аргументы функции.
+
+        Returns:
+            Any: Результат функции.
+        """
+        if self._pool is None:
+            return func(*args)
+        return await get_running_loop().run_in_executor(self._pool, partial(func, *args))
+
+    async def _bounds(self) -> tuple[Optional[int], Optional[int]]:
+        """
+        ## Минимальный и максимальный `id` таблицы (два чтения индекса первичного ключа).
+        """
+        query = select(func.min(self.model.id), func.max(self.model.id))
+        async with self.db.get_session(Priority.BACKGROUND) as session:
+            res = await session.execute(query)
+            return tuple(res.one())
+
+    def _load_state(self, lower: int) -> tuple[int, set[int], int]:
+        """
+        ## Готовая часть обхода из контрольной точки: нижняя граница, куски выше неё
+        и сумма `matched` по готовым кускам.
+        """
+        if self.checkpoint is None:
+            return lower, set(), 0
+        state = self.checkpoint.load()
+        if not state:
+            return lower, set(), 0
+        if state.get('table') != self.model.__tablename__ or state.get('chunk_size') != self.chunk_size:
+            logger.warning(f'Контрольная точка {self.checkpoint.path} от другого обхода, начинаем заново')
+            return lower, set(), 0
+        return max(lower, state['watermark']), set(state.get('done', [])), state.get('matched', 0)
+
+    async def run(self,
+        handler: ChunkHandler,
+        where: Sequence[ColumnElement[bool]] = (),
+        columns: Optional[Sequence[str]] = None,
+        progress_every: int = 100
+    ) -> ScanStats:
+        """
+        ## Обходит таблицу и передаёт каждый непустой кусок обработчику.
+
+        При ошибке обработчика остальные задачи отменяются, а контрольная
+        точка сохраняет всё, что успело завершиться. После полного прохода
+        контрольная точка удаляется.
+
+        Args:
+            handler: `async handler(rows, session) -> int | None`.
+            where: Дополнительные условия на строки.
+            columns: Имена выбираемых колонок (по умолчанию — все; `id` добавляется всегда).
+            progress_every: Через сколько кусков писать прогресс в лог.
+
+        Returns:
+            ScanStats: Итоги запуска.
+        """
+        table_columns = self.model.__table__.columns
+        names = list(columns) if columns else table_columns.keys()
+        if 'id' not in names:
+            names = ['id', *names]
+        cols = [table_columns[name] for name in names]
+
+        stats = ScanStats(self.model.__tablename__)
+        started = perf_counter()
+        lower, upper = await self._bounds()
+        if lower is None:
+            if self.checkpoint is not None:
+                self.checkpoint.clear()
+            return stats
+
+        # Границы кусков кратны `chunk_size` и не зависят от `min(id)` —
+        # контрольная точка остаётся верной, даже если начало таблицы удалено
+        lowest = lower // self.chunk_size * self.chunk_size
+        watermark, done, stats.matched = self._load_state(lowest)
+        first = watermark // self.chunk_size * self.chunk_size
+        starts = range(first, upper + 1, self.chunk_size)
+        pending = [start for start in starts if start not in done]
+        stats.skipped = len(starts) - len(pending) + (first - lowest) // self.chunk_size
+        total = stats.skipped + len(pending)
+        limiter = _RateLimiter(self.max_rows_per_second) if self.max_rows_per_second else None
+        in_flight: set[int] = set()
+        taken = 0
+
+        def save() -> None:
+            # Всё ниже самого раннего незавершённого куска готово
+            unfinished = [*in_flight, *pending[taken:taken + 1]]
+            mark = min(unfinished) if unfinished else upper + 1
+            self.checkpoint.save({
+                'table': self.model.__tablename__,
+                'chunk_size': self.chunk_size,
+                'watermark': mark,
+                'done': sorted(start for start in done if start >= mark),
+                'matched': stats.matched,
+            })
+
+        async def worker() -> None:
+            nonlocal taken
+            while taken < len(pending):
+                start = pending[taken]
+                taken += 1
+                in_flight.add(start)
+                query = (
+                    select(*cols)
+                    .where(self.model.id >= start, self.model.id < start + self.chunk_size, *where)
+                    .order_by(self.model.id)
+                )
+                async with self.db.get_session(Priority.BACKGROUND) as session:
+                    rows = (await session.execute(query)).all()
+                    matched = await handler(rows, session) if rows else None
+                    await session.commit()
+                in_flight.discard(start)
+                done.add(start)
+                stats.rows += len(rows)
+                stats.matched += matched or 0
+                stats.chunks += 1
+                if self.checkpoint is not None:
+                    save()
+                if stats.chunks % progress_every == 0:
+                    elapsed = perf_counter() - started
+                    logger.info(
+                        f'{stats.table}: {stats.chunks + stats.skipped}/{total} кусков, '
+                        f'{stats.rows} строк, {stats.rows / elapsed:.0f} строк/с'
+                    )
+                if limiter is not None and rows:
+                    await limiter.acquire(len(rows))
+
+        if self.processes:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        try:
+            async with TaskGroup() as group:
+                for _ in range(min(self.concurrency, len(pending))):
+                    group.create_task(worker())
+        except ExceptionGroup as errors:
+            raise errors.exceptions[0]
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+            stats.seconds = perf_counter() - started
+
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+        logger.info(
+            f'{stats.table}: {stats.rows} строк за {stats.seconds:.1f} с '
+            f'({stats.rows_per_second:.0f} строк/с), найдено {stats.matched}'
+        )
+        return stats
+
+
+# Публичный API модуля
+__all__ = ['ChunkHandler', 'ScanStats', 'TableScanner']
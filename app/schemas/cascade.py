@@ -0,0 +1,28 @@
+"""Pydantic-схема результата каскадного скрытия/восстановления.
+
+Возвращается из `UserDAO.hide_cascade()` / `ProductDAO.hide_cascade()`
+и парных `unhide_cascade()`.
+"""
+
+from typing import Annotated
+
+from pydantic import BaseModel, Field
+
+
+
+class CascadeResult(BaseModel):
+    """
+    ## Результат каскадного изменения флага `is_hidden`.
+
+    Attributes:
+        found (bool): Найдена ли родительская запись (пользователь / товар).
+        orders (int): Сколько зависимых заказов изменено.
+        chunks (int): Сколько пачек (транзакций) понадобилось.
+    """
+    found: bool
+    orders: Annotated[int, Field(ge=0, description='Изменено заказов')] = 0
+    chunks: Annotated[int, Field(ge=0, description='Выполнено пачек')] = 0
+
+
+# Публичный API модуля
+__all__ = ['CascadeResult']
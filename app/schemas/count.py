@@ -0,0 +1,46 @@
+"""Pydantic-схема результата подсчёта строк.
+
+Возвращается из `ProductDAO.count()` / `OrderDAO.count_by_user()`.
+"""
+
+from typing import Annotated, Literal
+
+from pydantic import BaseModel, Field
+
+
+
+# Способ подсчёта:
+#   exact    — `SELECT count(*)` (по возможности index-only scan);
+#   estimate — статистика: `pg_class.reltuples` для всей таблицы,
+#              оценка планировщика (`EXPLAIN`) для запроса с фильтром;
+#   auto     — оценка, а если она меньше порога — точный подсчёт.
+CountStrategy = Literal['exact', 'estimate', 'auto']
+
+
+class CountResult(BaseModel):
+    """
+    ## Число строк с признаком точности.
+
+    Attributes:
+        value (int): Число строк (точное или оценка).
+        exact (bool): Точное ли число (`False` — оценка по статистике).
+        cached (bool): Взят ли результат из кеша DAO.
+    """
+    value: Annotated[int, Field(ge=0, description='Число строк')]
+    exact: bool
+    cached: bool = False
+
+    def display(self) -> str:
+        """
+        ## Строка для интерфейса: `1234` для точного числа, `~12.4M` для оценки.
+        """
+        if self.exact:
+            return str(self.value)
+        for suffix, size in (('B', 10 ** 9), ('M', 10 ** 6), ('K', 10 ** 3)):
+            if self.value >= size:
+                return f'~{self.value / size:.1f}{suffix}'
+        return f'~{self.value}'
+
+
+# Публичный API модуля
+__all__ = ['CountResult', 'CountStrategy']
@@ -4,7 +4,8 @@
 схемы для сущности `Order` в стиле `New*` / `Exists*`.
 """
 
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -32,10 +33,43 @@ class ExistsOrder(NewOrder):
     Attributes:
         id (int): Первичный ключ заказа в таблице.
         is_hidden (bool): Флаг скрытия (мягкое удаление).
+        hidden_at (datetime | None): Когда заказ скрыт.
     """
     id: int
     is_hidden: bool = False
+    hidden_at: Optional[datetime] = None
+
+
+# Почему заказ не оформлен (`OrderDAO.place` / `place_many`)
+OrderRejection = Literal[
+    'user_not_found',
+    'user_hidden',
+    'product_not_found',
+    'product_hidden',
+    'cart_rejected',
+]
+
+
+class PlacedOrder(BaseModel):
+    """
+    ## Результат оформления одной позиции заказа.
+
+    Attributes:
+        order (ExistsOrder | None): Созданный заказ или `None`, если он отклонён.
+        failed (OrderRejection | None): Невыполненное условие: пользователь / товар
+            не найден или скрыт; `cart_rejected` — позиция корректна, но отклонена
+            вместе с корзиной из-за ошибки в другой позиции.
+    """
+    order: Optional[ExistsOrder] = None
+    failed: Optional[OrderRejection] = None
+
+    @property
+    def ok(self) -> bool:
+        """
+        ## Оформлен ли заказ.
+        """
+        return self.order is not None
 
 
 # Публичный API модуля
-__all__ = ['NewOrder', 'ExistsOrder']
\ No newline at end of file
+__all__ = ['NewOrder', 'ExistsOrder', 'OrderRejection', 'PlacedOrder']
\ No newline at end of file
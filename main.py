@@ -12,7 +12,6 @@ from asyncio import run
 
 from app.config.config_reader import env_config
 
-from app.database.models import metadata_obj
 from app.database.connection import db_connection
 
 from app.dao.user import user_dao
@@ -23,7 +22,10 @@ from app.schemas.user import NewUser
 from app.schemas.order import NewOrder
 from app.schemas.product import NewProduct
 
+from app.modules.jobs import ORDERS_QUEUE
 from app.modules.logging import get_logger, setup_logging
+from app.modules.migrations import MigrationRunner
+from app.modules.query_budget import QueryBudget
 
 
 
@@ -39,11 +41,13 @@ async def main() -> None:
 
     Демонстрирует полный цикл работы:
     1. Читаем конфиг из `.env` через `env_config`.
-    2. Создаём таблицы по `metadata_obj`.
+    2. Применяем миграции схемы (`app/modules/migrations`).
     3. Демонстрируем все методы DAO:
        - UserDAO: create, get_by_email
-       - ProductDAO: create, get_all
-       - OrderDAO: create, get_by_user
+       - ProductDAO: create, get_all, count
+       - OrderDAO: create (с задачей в очереди), get_by_user, place, place_many
+       (выборка заказов — под бюджетом запросов `QueryBudget`)
+    4. Показываем параллельное чтение через `db_connection.gather_in_sessions`.
     
     Returns:
         None: Выводит результаты операций в консоль.
@@ -52,13 +56,11 @@ async def main() -> None:
     logger.info("="*70)
     logger.info("Запуск примера SQLAlchemy + DAO")
     logger.info("="*70)
-    logger.info(f"Подключаемся к БД: {env_config.DATABASE_URL_asyncpg}")
+    logger.info(f"Подключаемся к БД: {env_config.DATABASE_URL}")
 
-    # Создаём таблицы для примера
-    async with db_connection.get_session() as session:
-        conn = await session.connection()
-        await conn.run_sync(metadata_obj.create_all)
-        logger.info("✓ Таблицы созданы")
+    # Приводим схему к актуальной версии
+    await MigrationRunner(db_connection.engine).upgrade()
+    logger.info("✓ Миграции применены")
 
     async with db_connection.get_session() as session:
         logger.info("="*70)
@@ -114,7 +116,8 @@ async def main() -> None:
         # 4. Получение всех товаров
         logger.info("4. Получение всех товаров...")
         all_products = await product_dao.get_all(session=session)
-        logger.info(f"   ✓ Всего товаров: {len(all_products)}")
+        total = await product_dao.count(session=session)
+        logger.info(f"   ✓ Всего товаров: {len(all_products)} (count: {total.display()})")
         for p in all_products:
             logger.info(f"     - {p.name}: {p.price} руб.")
 
@@ -126,9 +129,11 @@ async def main() -> None:
         logger.info("5. Создание заказов...")
         order1 = await order_dao.create(
             NewOrder(user_id=user1.id, product_id=product1.id, quantity=1),
-            session=session
+            session=session,
+            follow_up=ORDERS_QUEUE
         )
         logger.info(f"   ✓ Заказ #{order1.id}: {user1.full_name} -> {product1.name} x{order1.quantity}")
+        logger.info(f"     задача в очереди '{ORDERS_QUEUE}' появится вместе с коммитом заказа")
 
         order2 = await order_dao.create(
             NewOrder(user_id=user1.id, product_id=product2.id, quantity=2),
@@ -144,12 +149,14 @@ async def main() -> None:
 
         # 6. Получение заказов пользователя
         logger.info("6. Получение заказов по пользователям...")
-        alice_orders = await order_dao.get_by_user(user_id=user1.id, session=session)
+        with QueryBudget(max_queries=2, name='main: заказы пользователей') as queries:
+            alice_orders = await order_dao.get_by_user(user_id=user1.id, session=session)
+            bob_orders = await order_dao.get_by_user(user_id=user2.id, session=session)
+        logger.info(f"   ✓ Запросов к БД: {queries.total if queries else 'N/A'}")
         logger.info(f"   ✓ Заказы {user1.full_name}: {len(alice_orders)} шт.")
         for order in alice_orders:
             logger.info(f"     - Заказ #{order.id}: product_id={order.product_id}, qty={order.quantity}")
 
-        bob_orders = await order_dao.get_by_user(user_id=user2.id, session=session)
         logger.info(f"   ✓ Заказы {user2.full_name}: {len(bob_orders)} шт.")
         for order in bob_orders:
             logger.info(f"     - Заказ #{order.id}: product_id={order.product_id}, qty={order.quantity}")
@@ -196,13 +203,47 @@ async def main() -> None:
         for order in all_alice_orders:
             logger.info(f"     - Заказ #{order.id}: product_id={order.product_id} (is_hidden={order.is_hidden})")
 
+        # 12. Оформление заказа с проверкой пользователя и товара одним запросом
+        logger.info("12. Оформление заказов через place / place_many...")
+        placed = await order_dao.place(
+            NewOrder(user_id=user2.id, product_id=product1.id, quantity=1),
+            session=session
+        )
+        logger.info(f"   ✓ Заказ оформлен: #{placed.order.id if placed.ok else placed.failed}")
+        rejected = await order_dao.place(
+            NewOrder(user_id=user1.id, product_id=product2.id, quantity=1),
+            session=session
+        )
+        logger.info(f"   ✓ Скрытый товар '{product2.name}' не заказан: {rejected.failed}")
+        cart = await order_dao.place_many(
+            [
+                NewOrder(user_id=user1.id, product_id=product1.id, quantity=1),
+                NewOrder(user_id=user1.id, product_id=product3.id, quantity=2),
+            ],
+            session=session
+        )
+        logger.info(f"   ✓ Корзина: {[line.order.id if line.ok else line.failed for line in cart]}")
+
         # Коммитим все изменения в базу данных
         await session.commit()
 
-        logger.info("="*70)
-        logger.info("✓ Все операции выполнены успешно!")
-        logger.info("✓ Каскадное удаление отключено - связи сохраняются!")
-        logger.info("="*70)
+    # 13. Параллельное чтение независимых данных (каждый вызов в своей сессии)
+    logger.info("13. Параллельное чтение: get_by_email + get_all + get_by_user...")
+    found_alice, products, alice_orders = await db_connection.gather_in_sessions(
+        lambda s: user_dao.get_by_email('alice@example.com', session=s),
+        lambda s: product_dao.get_all(session=s),
+        lambda s: order_dao.get_by_user(user_id=user1.id, session=s),
+        consistent=True,
+    )
+    logger.info(
+        f"   ✓ {found_alice.full_name if found_alice else 'N/A'}: "
+        f"товаров {len(products)}, заказов {len(alice_orders)}"
+    )
+
+    logger.info("="*70)
+    logger.info("✓ Все операции выполнены успешно!")
+    logger.info("✓ Каскадное удаление отключено - связи сохраняются!")
+    logger.info("="*70)
 
 
 